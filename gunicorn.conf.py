@@ -0,0 +1,31 @@
+"""Gunicorn settings; loaded from the working directory automatically.
+
+ASGI=True serves service_manager.asgi with uvicorn workers, so the async
+JSON views (option lists, popup labels, health, metrics) share each
+worker's event loop instead of queueing behind slow admin renders.
+Otherwise the sync WSGI application is served as before.
+
+The hooks keep Prometheus multiprocess metrics consistent: each worker
+writes its samples to PROMETHEUS_MULTIPROC_DIR. The directory is emptied
+when the master starts, so old runs do not leak into the totals, and the
+live gauges of a worker are dropped when it exits.
+"""
+import os
+import shutil
+
+if os.environ.get('ASGI', 'False') == 'True':
+    wsgi_app = 'service_manager.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'service_manager.wsgi:application'
+
+def on_starting(server):
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
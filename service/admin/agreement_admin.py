@@ -5,11 +5,20 @@ from django.urls import reverse, path
 from django.contrib import messages
 from django.shortcuts import redirect
 from django.core.management import call_command
-from django.db.models import Count, Q
+from django.db.models import Count, Q, Prefetch
 from django.template.response import TemplateResponse
 from ..models.agreement import ServiceAgreement, EntitlementType, Entitlement
 from ..models.instrument import Instrument
 from ..utils.status_colors import get_status_badge
+from ..utils.admin_labels import (
+    LabelledChoicesMixin,
+    LabelledRelatedFieldListFilter,
+    SharedChoicesInlineFormSet,
+)
+from ..utils.export import ExportMixin
+from ..utils.search import IndexedSearchMixin
+from ..db.routers import ReplicaChangelistMixin, use_replica
+from ..utils.cache_tags import agreement_tag, cached_panel, customer_tag
 from ..models.workorder import WorkOrder
 from ..models.servicereport import ServiceReport
 
@@ -21,29 +30,31 @@ class EntitlementInlineForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         
-        # Get the parent ServiceAgreement instance
-        if self.instance:
-            parent_obj = self.instance.agreement if self.instance.pk else kwargs.get('initial', {}).get('agreement')
-        else:
-            parent_obj = kwargs.get('initial', {}).get('agreement')
-
-        # If we're in a formset, try to get the parent object from there
+        # Inside the admin formset the parent comes from get_formset()
         if hasattr(self, 'parent_instance'):
             parent_obj = self.parent_instance
+        elif self.instance.pk:
+            parent_obj = self.instance.agreement
+        else:
+            parent_obj = kwargs.get('initial', {}).get('agreement')
 
         if parent_obj and hasattr(parent_obj, 'customer'):
             # Filter instruments by the agreement's customer
             self.fields['instrument'].queryset = Instrument.objects.filter(
                 customer=parent_obj.customer
-            ).select_related('instrument_type')
+            ).with_labels()
 
-class EntitlementInline(admin.TabularInline):
+class EntitlementInline(LabelledChoicesMixin, admin.TabularInline):
     model = Entitlement
     form = EntitlementInlineForm
+    formset = SharedChoicesInlineFormSet
     extra = 1
     fields = ('entitlement_type', 'instrument', 'total', 'remaining')
     readonly_fields = ('remaining',)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_labels()
+
     def get_formset(self, request, obj=None, **kwargs):
         formset = super().get_formset(request, obj, **kwargs)
         
@@ -57,23 +68,37 @@ class EntitlementInline(admin.TabularInline):
         return "-"
     remaining.short_description = 'Remaining'
 
+def agreement_panel_tags(agreement):
+    # Instruments and work orders of the customer appear in the panels too
+    return [agreement_tag(agreement.pk), customer_tag(agreement.customer_id)]
+
 # Remove @admin.register decorators
-class ServiceAgreementAdmin(admin.ModelAdmin):
+class ServiceAgreementAdmin(ReplicaChangelistMixin, ExportMixin, IndexedSearchMixin, LabelledChoicesMixin, admin.ModelAdmin):
     list_display = ('__str__', 'customer', 'po_number', 'start_date', 'end_date', 'status_badge')
     list_filter = ('status', 'customer')
     search_fields = ('customer__name', 'po_number')
+    search_tokens = {'SA': 'pk'}
     inlines = [EntitlementInline]
     autocomplete_fields = ['customer']
     change_list_template = 'admin/service/serviceagreement/change_list.html'
     readonly_fields = ('service_summary', 'service_history')  # Add service_history here
+    export_fields = (
+        ('id', 'SA #'),
+        ('customer__name', 'Customer'),
+        ('po_number', 'PO/CC Number'),
+        ('start_date', 'Start Date'),
+        ('end_date', 'End Date'),
+        ('status', 'Status'),
+        ('notes', 'Notes'),
+    )
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         return qs.select_related('customer').prefetch_related(
-            'entitlements',
-            'entitlements__workorders',
-            'entitlements__entitlement_type',
-            'entitlements__workorders__service_reports__created_by'  # Updated from technician
+            Prefetch(
+                'entitlements',
+                queryset=Entitlement.objects.with_usage().select_related('entitlement_type')
+            )
         )
 
     def changelist_view(self, request, extra_context=None):
@@ -137,7 +162,6 @@ class ServiceAgreementAdmin(admin.ModelAdmin):
         
         summary = []
         for ent in entitlements:
-            completed_count = ent.workorders.filter(status='completed').count()
             summary.append(
                 format_html(
                     '<div style="margin-bottom: 5px;">'
@@ -145,10 +169,10 @@ class ServiceAgreementAdmin(admin.ModelAdmin):
                     '<span style="color: {};">({} remaining)</span>'
                     '</div>',
                     ent.entitlement_type.name,
-                    completed_count,
+                    ent.used,
                     ent.total,
-                    '#28a745' if (ent.total - completed_count) > 0 else '#dc3545',
-                    ent.total - completed_count
+                    '#28a745' if ent.remaining > 0 else '#dc3545',
+                    ent.remaining
                 )
             )
         return format_html("".join(summary))
@@ -159,6 +183,8 @@ class ServiceAgreementAdmin(admin.ModelAdmin):
     update_sa_statuses.allow_tags = True
     update_sa_statuses.css_class = 'refresh-button'
 
+    @cached_panel('agreement_summary', agreement_panel_tags)
+    @use_replica
     def service_summary(self, obj):
         """Display summary of Work Orders and Service Reports."""
         html = ['<div class="service-summary">']
@@ -166,7 +192,7 @@ class ServiceAgreementAdmin(admin.ModelAdmin):
         # Work Orders Summary
         work_orders = WorkOrder.objects.filter(
             entitlement__agreement=obj
-        ).select_related('assigned_to', 'instrument')
+        ).select_related('assigned_to', 'instrument__instrument_type')
         
         html.append('<div class="summary-section"><h3>Work Orders</h3>')
         html.append('<table style="width: 100%; border-collapse: collapse;">')
@@ -263,6 +289,8 @@ class ServiceAgreementAdmin(admin.ModelAdmin):
     
     service_summary.short_description = 'Service Summary'
 
+    @cached_panel('agreement_history', agreement_panel_tags)
+    @use_replica
     def service_history(self, obj):
         work_orders = WorkOrder.objects.filter(
             entitlement__agreement=obj
@@ -341,9 +369,13 @@ class EntitlementTypeAdmin(admin.ModelAdmin):
     entitlement_count.short_description = "Usage Count"
     entitlement_count.admin_order_field = 'entitlement_count'
 
-class EntitlementAdmin(admin.ModelAdmin):
+class EntitlementAdmin(LabelledChoicesMixin, admin.ModelAdmin):
     list_display = ('entitlement_type', 'agreement', 'instrument', 'total', 'get_used', 'get_remaining')
-    list_filter = ('entitlement_type', 'agreement', 'instrument')
+    list_filter = (
+        'entitlement_type',
+        ('agreement', LabelledRelatedFieldListFilter),
+        ('instrument', LabelledRelatedFieldListFilter),
+    )
     search_fields = ('entitlement_type__name', 'agreement__customer__name', 'instrument__serial_number')
     readonly_fields = ('get_used', 'get_remaining')
     autocomplete_fields = ['agreement', 'instrument']
@@ -351,14 +383,16 @@ class EntitlementAdmin(admin.ModelAdmin):
     def get_used(self, obj):
         return obj.used
     get_used.short_description = 'Used'
+    get_used.admin_order_field = 'used_count'
 
     def get_remaining(self, obj):
         return obj.remaining
     get_remaining.short_description = 'Remaining'
+    get_remaining.admin_order_field = 'remaining_count'
 
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related(
-            'agreement',
+        return super().get_queryset(request).with_usage().select_related(
+            'agreement__customer',
             'entitlement_type',
-            'instrument'
-        ).prefetch_related('workorders')
+            'instrument__instrument_type'
+        )
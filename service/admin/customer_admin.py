@@ -2,18 +2,23 @@ import logging
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
-from django.db.models import Count, Q
+from django.db.models import Exists, OuterRef, Prefetch
 from django.db import models
 from django import forms
 from ..models import (
     Customer, 
     Contact, 
+    Entitlement,
     Instrument, 
     ServiceAgreement, 
     ServiceReport,
     WorkOrder
 )
 from ..utils.status_colors import get_status_badge
+from ..utils.search import IndexedSearchMixin
+from ..db.routers import ReplicaChangelistMixin, use_replica
+from ..utils.cache_tags import cached_panel, customer_tag
+from ..utils.admin_labels import LabelledChoicesMixin, SharedChoicesInlineFormSet
 
 logger = logging.getLogger(__name__)
 
@@ -31,13 +36,13 @@ class AgreementStatusFilter(admin.SimpleListFilter):
 
     def queryset(self, request, queryset):
         if self.value() == 'active':
-            return queryset.filter(agreements__status='active').distinct()
-        elif self.value() == 'draft':
-            return queryset.filter(agreements__status='draft').distinct()
-        elif self.value() == 'expired':
-            return queryset.filter(agreements__status='expired').distinct()
+            return queryset.filter(has_active_agreement=True)
+        elif self.value() in ('draft', 'expired'):
+            return queryset.filter(Exists(ServiceAgreement.objects.filter(
+                customer=OuterRef('pk'), status=self.value()
+            )))
         elif self.value() == 'none':
-            return queryset.filter(agreements__isnull=True)
+            return queryset.filter(~Exists(ServiceAgreement.objects.filter(customer=OuterRef('pk'))))
         return queryset
 
 class InstrumentCountFilter(admin.SimpleListFilter):
@@ -53,16 +58,14 @@ class InstrumentCountFilter(admin.SimpleListFilter):
         )
 
     def queryset(self, request, queryset):
-        queryset = queryset.annotate(total_instruments=Count('instruments'))
-        
         if self.value() == '0':
-            return queryset.filter(total_instruments=0)
+            return queryset.filter(instrument_count=0)
         elif self.value() == '1-5':
-            return queryset.filter(total_instruments__gte=1, total_instruments__lte=5)
+            return queryset.filter(instrument_count__gte=1, instrument_count__lte=5)
         elif self.value() == '6-10':
-            return queryset.filter(total_instruments__gte=6, total_instruments__lte=10)
+            return queryset.filter(instrument_count__gte=6, instrument_count__lte=10)
         elif self.value() == '10+':
-            return queryset.filter(total_instruments__gt=10)
+            return queryset.filter(instrument_count__gt=10)
         return queryset
 
 class ContactInline(admin.TabularInline):
@@ -71,12 +74,19 @@ class ContactInline(admin.TabularInline):
     fields = ('primary_contact', 'name', 'email', 'phone', 'role')
     ordering = ['-primary_contact']
 
-class InstrumentInline(admin.TabularInline):
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('customer')
+
+class InstrumentInline(LabelledChoicesMixin, admin.TabularInline):
     model = Instrument
+    formset = SharedChoicesInlineFormSet
     extra = 0
     fields = ('serial_number', 'instrument_type', 'installation_date', 'quick_actions')
     readonly_fields = ('quick_actions',)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_labels()
+
     def quick_actions(self, obj):
         if obj.pk:  # Only show actions for saved instruments
             wo_url = reverse('admin:service_workorder_add') + f'?instrument={obj.pk}'
@@ -96,6 +106,9 @@ class ServiceAgreementInline(admin.TabularInline):
     fields = ('start_date', 'end_date', 'status', 'actions')
     readonly_fields = ('status', 'actions')
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_labels()
+
     def actions(self, obj):
         if obj.pk:  # Only show actions for saved agreements
             view_url = reverse('admin:service_serviceagreement_change', args=[obj.pk])
@@ -106,7 +119,7 @@ class ServiceAgreementInline(admin.TabularInline):
         return ""
     actions.short_description = "Actions"
 
-class CustomerAdmin(admin.ModelAdmin):
+class CustomerAdmin(ReplicaChangelistMixin, IndexedSearchMixin, admin.ModelAdmin):
     list_display = ('name', 'website', 'agreement_status', 'instrument_count', 'contact_count', 'recent_service')
     search_fields = ('name', 'website', 'address')
     list_filter = [
@@ -120,25 +133,18 @@ class CustomerAdmin(admin.ModelAdmin):
         """Explicitly define allowed filters"""
         return self.list_filter
 
-    def get_queryset(self, request):
-        return super().get_queryset(request).annotate(
-            total_instruments=Count('instruments', distinct=True),
-            total_contacts=Count('contacts', distinct=True),
-            latest_workorder=models.Max('instruments__workorders__created_at')
-        ).select_related()
-
     def recent_service(self, obj):
-        if obj.latest_workorder:
+        if obj.last_service_at:
             return format_html(
                 '<span style="color: {};">{}</span>',
-                '#28a745' if obj.latest_workorder else '#dc3545',
-                obj.latest_workorder.strftime('%Y-%m-%d')
+                '#28a745',
+                obj.last_service_at.strftime('%Y-%m-%d')
             )
         return format_html(
             '<span style="color: #dc3545;">No service history</span>'
         )
     recent_service.short_description = "Last Service"
-    recent_service.admin_order_field = 'latest_workorder'
+    recent_service.admin_order_field = 'last_service_at'
 
     formfield_overrides = {
         models.TextField: {'widget': forms.Textarea(attrs={'rows': 4})},
@@ -160,151 +166,158 @@ class CustomerAdmin(admin.ModelAdmin):
             return "Save the customer first to see service overview."
             
         try:
-            html = [
-                '<div style="margin-top: 20px;">',
-                '<h2 style="background: #79aec8; color: white; padding: 8px 12px;">Service Overview</h2>'
-            ]
-
-            # Get agreements count and related data
-            agreements = obj.agreements.all().prefetch_related(
-                'entitlements', 
-                'entitlements__entitlement_type', 
-                'entitlements__instrument'
+            return self.render_service_overview(obj)
+        except Exception as e:
+            logger.exception("Error in service_overview")
+            return format_html(
+                '<div style="color: #721c24; background-color: #f8d7da; padding: 10px; border: 1px solid #f5c6cb;">'
+                f'Error loading service overview: {str(e)}'
+                '</div>'
             )
-            agreements_count = len(agreements)
-            logger.info(f"Found {agreements_count} agreements")
-            
-            # Recent Work Orders section
-            recent_work_orders = WorkOrder.objects.filter(
-                customer=obj
-            ).select_related('instrument').prefetch_related('service_reports').order_by('-created_at')[:5]
+    service_overview.short_description = 'Service Overview'  # Updated description
+
+    @cached_panel('customer_overview', lambda obj: [customer_tag(obj.pk)])
+    @use_replica
+    def render_service_overview(self, obj):
+        html = [
+            '<div style="margin-top: 20px;">',
+            '<h2 style="background: #79aec8; color: white; padding: 8px 12px;">Service Overview</h2>'
+        ]
+
+        # Get agreements count and related data
+        agreements = obj.agreements.all().prefetch_related(
+            Prefetch(
+                'entitlements',
+                queryset=Entitlement.objects.with_usage().select_related(
+                    'entitlement_type', 'instrument__instrument_type'
+                )
+            )
+        )
+        agreements_count = len(agreements)
+        logger.info(f"Found {agreements_count} agreements")
+        
+        # Recent Work Orders section
+        recent_work_orders = WorkOrder.objects.filter(
+            customer=obj
+        ).select_related('instrument__instrument_type').prefetch_related('service_reports').order_by('-created_at')[:5]
 
-            html.append('<div style="padding: 20px;">')
+        html.append('<div style="padding: 20px;">')
+        
+        # Work Orders Quick View
+        html.extend([
+            '<div style="margin-bottom: 20px;">',
+            '<h3 style="color: #666;">Recent Work Orders</h3>',
+            '<table style="width: 100%; border-collapse: collapse;">',
+            '<thead>',
+            '<tr style="background-color: #f5f5f5;">',
+            '<th style="padding: 8px; text-align: left; border: 1px solid #ddd;">WO #</th>',
+            '<th style="padding: 8px; text-align: left; border: 1px solid #ddd;">Status</th>',
+            '<th style="padding: 8px; text-align: left; border: 1px solid #ddd;">Instrument</th>',
+            '<th style="padding: 8px; text-align: left; border: 1px solid #ddd;">Description</th>',
+            '<th style="padding: 8px; text-align: left; border: 1px solid #ddd;">Actions</th>',
+            '</tr>',
+            '</thead>',
+            '<tbody>'
+        ])
+
+        for wo in recent_work_orders:
+            status_badge = get_status_badge(wo.status)
+            wo_url = reverse('admin:service_workorder_change', args=[wo.pk])
+            new_sr_url = reverse('admin:service_servicereport_add')
             
-            # Work Orders Quick View
-            html.extend([
-                '<div style="margin-bottom: 20px;">',
-                '<h3 style="color: #666;">Recent Work Orders</h3>',
-                '<table style="width: 100%; border-collapse: collapse;">',
-                '<thead>',
-                '<tr style="background-color: #f5f5f5;">',
-                '<th style="padding: 8px; text-align: left; border: 1px solid #ddd;">WO #</th>',
-                '<th style="padding: 8px; text-align: left; border: 1px solid #ddd;">Status</th>',
-                '<th style="padding: 8px; text-align: left; border: 1px solid #ddd;">Instrument</th>',
-                '<th style="padding: 8px; text-align: left; border: 1px solid #ddd;">Description</th>',
-                '<th style="padding: 8px; text-align: left; border: 1px solid #ddd;">Actions</th>',
-                '</tr>',
-                '</thead>',
-                '<tbody>'
-            ])
-
-            for wo in recent_work_orders:
-                status_badge = get_status_badge(wo.status)
-                wo_url = reverse('admin:service_workorder_change', args=[wo.pk])
-                new_sr_url = reverse('admin:service_servicereport_add')
-                
-                # Get related service reports
-                service_reports = wo.service_reports.all()
-                sr_links = []
-                for sr in service_reports:
-                    sr_url = reverse('admin:service_servicereport_change', args=[sr.pk])
-                    sr_links.append(
-                        f'<a href="{sr_url}" class="button" '
-                        f'style="margin-right: 5px; font-size: 0.8em;">SR-{sr.pk}</a>'
-                    )
-                
-                sr_html = ''.join(sr_links) if sr_links else ''
-                
-                # Truncate description if it's too long
-                description = wo.description or "-"
-                if len(description) > 50:
-                    description = description[:47] + "..."
-                
-                html.append(
-                    f'<tr style="border: 1px solid #ddd;">'
-                    f'<td style="padding: 8px;">WO-{wo.pk}</td>'
-                    f'<td style="padding: 8px;">{status_badge}</td>'
-                    f'<td style="padding: 8px;">{wo.instrument}</td>'
-                    f'<td style="padding: 8px;">{description}</td>'
-                    f'<td style="padding: 8px;">'
-                    f'<a href="{wo_url}" class="button" style="margin-right: 5px;" target="_blank">View WO</a>'
-                    f'<a href="{new_sr_url}?work_order={wo.pk}" class="button" style="margin-right: 5px;" target="_blank">New SR</a>'
-                    f'{sr_html}'
-                    f'</td>'
-                    f'</tr>'
+            # Get related service reports
+            service_reports = wo.service_reports.all()
+            sr_links = []
+            for sr in service_reports:
+                sr_url = reverse('admin:service_servicereport_change', args=[sr.pk])
+                sr_links.append(
+                    f'<a href="{sr_url}" class="button" '
+                    f'style="margin-right: 5px; font-size: 0.8em;">SR-{sr.pk}</a>'
                 )
+            
+            sr_html = ''.join(sr_links) if sr_links else ''
+            
+            # Truncate description if it's too long
+            description = wo.description or "-"
+            if len(description) > 50:
+                description = description[:47] + "..."
+            
+            html.append(
+                f'<tr style="border: 1px solid #ddd;">'
+                f'<td style="padding: 8px;">WO-{wo.pk}</td>'
+                f'<td style="padding: 8px;">{status_badge}</td>'
+                f'<td style="padding: 8px;">{wo.instrument}</td>'
+                f'<td style="padding: 8px;">{description}</td>'
+                f'<td style="padding: 8px;">'
+                f'<a href="{wo_url}" class="button" style="margin-right: 5px;" target="_blank">View WO</a>'
+                f'<a href="{new_sr_url}?work_order={wo.pk}" class="button" style="margin-right: 5px;" target="_blank">New SR</a>'
+                f'{sr_html}'
+                f'</td>'
+                f'</tr>'
+            )
 
-            html.extend([
-                '</tbody>',
-                '</table>',
-                '</div>'
-            ])
+        html.extend([
+            '</tbody>',
+            '</table>',
+            '</div>'
+        ])
 
-            # Service Agreements section
-            if agreements_count == 0:
-                html.append('<p style="padding: 20px;">No service agreements found for this customer.</p>')
-            else:
-                html.append(f'<p><strong>Total Agreements:</strong> {agreements_count}</p>')
+        # Service Agreements section
+        if agreements_count == 0:
+            html.append('<p style="padding: 20px;">No service agreements found for this customer.</p>')
+        else:
+            html.append(f'<p><strong>Total Agreements:</strong> {agreements_count}</p>')
+            
+            for agreement in agreements:
+                status_badge = get_status_badge(agreement.status)
+                agreement_url = reverse('admin:service_serviceagreement_change', args=[agreement.pk])
                 
-                for agreement in agreements:
-                    status_badge = get_status_badge(agreement.status)
-                    agreement_url = reverse('admin:service_serviceagreement_change', args=[agreement.pk])
-                    
-                    html.extend([
-                        '<div style="margin: 10px 0; padding: 15px; border: 1px solid #ddd; border-radius: 4px;">',
-                        f'<h3 style="margin: 0 0 10px 0;">'
-                        f'<a href="{agreement_url}" style="text-decoration: none;">Agreement #{agreement.id}</a></h3>',
-                        f'<p><strong>Status:</strong> {status_badge}</p>',
-                        f'<p><strong>Period:</strong> {agreement.start_date} to {agreement.end_date}</p>',
-                    ])
-
-                    # Add entitlements section
-                    entitlements = agreement.entitlements.all()
-                    if entitlements:
-                        html.append('<div style="margin-top: 10px;">')
-                        html.append('<h4 style="margin: 5px 0;">Entitlements:</h4>')
-                        html.append('<ul style="list-style-type: none; padding-left: 0;">')
-                        for ent in entitlements:
-                            remaining = ent.remaining
-                            used = ent.used
-                            html.append(
-                                f'<li style="margin: 5px 0;">'
-                                f'• {ent.entitlement_type.name} ({ent.instrument}): '
-                                f'<strong>{remaining}</strong> remaining '
-                                f'(<span style="color: #666;">{used}/{ent.total} used</span>)'
-                                f'</li>'
-                            )
-                        html.append('</ul>')
-                        html.append('</div>')
+                html.extend([
+                    '<div style="margin: 10px 0; padding: 15px; border: 1px solid #ddd; border-radius: 4px;">',
+                    f'<h3 style="margin: 0 0 10px 0;">'
+                    f'<a href="{agreement_url}" style="text-decoration: none;">Agreement #{agreement.id}</a></h3>',
+                    f'<p><strong>Status:</strong> {status_badge}</p>',
+                    f'<p><strong>Period:</strong> {agreement.start_date} to {agreement.end_date}</p>',
+                ])
 
+                # Add entitlements section
+                entitlements = agreement.entitlements.all()
+                if entitlements:
+                    html.append('<div style="margin-top: 10px;">')
+                    html.append('<h4 style="margin: 5px 0;">Entitlements:</h4>')
+                    html.append('<ul style="list-style-type: none; padding-left: 0;">')
+                    for ent in entitlements:
+                        remaining = ent.remaining
+                        used = ent.used
+                        html.append(
+                            f'<li style="margin: 5px 0;">'
+                            f'• {ent.entitlement_type.name} ({ent.instrument}): '
+                            f'<strong>{remaining}</strong> remaining '
+                            f'(<span style="color: #666;">{used}/{ent.total} used</span>)'
+                            f'</li>'
+                        )
+                    html.append('</ul>')
                     html.append('</div>')
-            
-            html.append('</div>')
-            html.append('</div>')
-            return format_html(''.join(html))
 
-        except Exception as e:
-            logger.exception("Error in service_overview")
-            return format_html(
-                '<div style="color: #721c24; background-color: #f8d7da; padding: 10px; border: 1px solid #f5c6cb;">'
-                f'Error loading service overview: {str(e)}'
-                '</div>'
-            )
-    service_overview.short_description = 'Service Overview'  # Updated description
+                html.append('</div>')
+        
+        html.append('</div>')
+        html.append('</div>')
+        return format_html(''.join(html))
 
     def agreement_status(self, obj):
-        active_agreement = obj.agreements.filter(status='active').first()
-        if active_agreement:
+        if obj.has_active_agreement:
             return get_status_badge('active', 'Active')
         return get_status_badge('expired', 'No Active Agreement')
     agreement_status.short_description = 'Agreement Status'
+    agreement_status.admin_order_field = 'has_active_agreement'
 
     def instrument_count(self, obj):
-        return obj.total_instruments
+        return obj.instrument_count
     instrument_count.short_description = "Instruments"
-    instrument_count.admin_order_field = 'total_instruments'
+    instrument_count.admin_order_field = 'instrument_count'
 
     def contact_count(self, obj):
-        return obj.total_contacts
+        return obj.contact_count
     contact_count.short_description = "Contacts"
-    contact_count.admin_order_field = 'total_contacts'
+    contact_count.admin_order_field = 'contact_count'
@@ -6,42 +6,58 @@ from ..models.servicereport import ServiceReport
 from ..models.agreement import ServiceAgreement
 from ..models.customer import Customer
 from ..models.instrument import Instrument
+from ..db.routers import use_replica
+from ..utils.cache_tags import get_or_set_tagged, model_tag
+
+DASHBOARD_CACHE_KEY = 'admin_dashboard_stats'
+DASHBOARD_CACHE_TIMEOUT = 60  # seconds
+# Counted models; a save to any of them expires the stats
+DASHBOARD_TAGS = [model_tag(model) for model in (
+    WorkOrder, ServiceReport, ServiceAgreement, Customer, Instrument,
+)]
 
 # Move the dashboard functionality to the CustomAdminSite class in site.py
 def get_admin_stats(request):
+    return get_or_set_tagged(
+        DASHBOARD_CACHE_KEY, DASHBOARD_TAGS, compute_admin_stats, DASHBOARD_CACHE_TIMEOUT,
+    )
+
+@use_replica
+def compute_admin_stats():
+    """Collect dashboard counts with one aggregate query per table"""
     today = timezone.now()
     thirty_days_ago = today - timedelta(days=30)
-    
+
+    work_orders = WorkOrder.objects.aggregate(
+        open=Count('pk', filter=Q(status=WorkOrder.STATUS_OPEN)),
+        in_progress=Count('pk', filter=Q(status=WorkOrder.STATUS_IN_PROGRESS)),
+        recent=Count('pk', filter=Q(created_at__gte=thirty_days_ago)),
+        total=Count('pk'),
+    )
+    service_reports = ServiceReport.objects.aggregate(
+        pending=Count('pk', filter=Q(approval_status=ServiceReport.STATUS_AWAITING)),
+        recent=Count('pk', filter=Q(service_date__gte=thirty_days_ago.date())),
+        approved=Count('pk', filter=Q(approval_status=ServiceReport.STATUS_APPROVED)),
+        rejected=Count('pk', filter=Q(approval_status=ServiceReport.STATUS_REJECTED)),
+    )
+    agreements = ServiceAgreement.objects.filter(
+        status=ServiceAgreement.STATUS_ACTIVE
+    ).aggregate(
+        active=Count('pk'),
+        expiring_soon=Count('pk', filter=Q(end_date__lte=(today + timedelta(days=30)).date())),
+        expired=Count('pk', filter=Q(end_date__lt=today.date())),
+    )
+
     return {
-        'work_orders': {
-            'open': WorkOrder.objects.filter(status='open').count(),
-            'in_progress': WorkOrder.objects.filter(status='in_progress').count(),
-            'recent': WorkOrder.objects.filter(created_at__gte=thirty_days_ago).count(),
-            'total': WorkOrder.objects.count()
-        },
-        'service_reports': {
-            'pending': ServiceReport.objects.filter(approval_status='pending').count(),
-            'recent': ServiceReport.objects.filter(service_date__gte=thirty_days_ago).count(),
-            'approved': ServiceReport.objects.filter(approval_status='approved').count(),
-            'rejected': ServiceReport.objects.filter(approval_status='rejected').count()
-        },
-        'agreements': {
-            'active': ServiceAgreement.objects.filter(status='active').count(),
-            'expiring_soon': ServiceAgreement.objects.filter(
-                status='active',
-                end_date__lte=today + timedelta(days=30)
-            ).count(),
-            'expired': ServiceAgreement.objects.filter(
-                status='active',
-                end_date__lt=today
-            ).count()
-        },
-        'recent_work_orders': WorkOrder.objects.select_related(
+        'work_orders': work_orders,
+        'service_reports': service_reports,
+        'agreements': agreements,
+        'recent_work_orders': list(WorkOrder.objects.select_related(
             'customer', 'assigned_to', 'instrument'
-        ).order_by('-created_at')[:5],
-        'recent_reports': ServiceReport.objects.select_related(
-            'work_order', 'created_by'
-        ).order_by('-service_date')[:5],
+        ).order_by('-created_at')[:5]),
+        'recent_reports': list(ServiceReport.objects.select_related(
+            'work_order', 'work_order__customer', 'created_by'
+        ).order_by('-service_date')[:5]),
         'total_customers': Customer.objects.count(),
         'total_instruments': Instrument.objects.count(),
     }
@@ -6,17 +6,18 @@ from django.contrib.auth.models import User
 from ..models.servicereport import ServiceReport
 from ..models.workorder import WorkOrder
 from ..utils.status_colors import get_status_badge
+from ..utils.admin_labels import LabelledChoicesMixin
+from ..utils.reference_data import ReferenceChoiceField
+from ..utils.export import ExportMixin
+from ..utils.search import IndexedSearchMixin
+from ..db.routers import ReplicaChangelistMixin, use_replica
 import logging
-from django.forms import ModelForm, ModelChoiceField
+from django.forms import ModelForm
 
 logger = logging.getLogger(__name__)
 
-class UserModelChoiceField(ModelChoiceField):
-    def label_from_instance(self, obj):
-        return obj.get_full_name() or obj.username
-
 class ServiceReportForm(ModelForm):
-    created_by = UserModelChoiceField(
+    created_by = ReferenceChoiceField(
         queryset=User.objects.all().order_by('first_name', 'last_name'),
         required=True
     )
@@ -42,8 +43,23 @@ class CreatedByFilter(SimpleListFilter):
         return queryset
 
 # Removed the @admin.register decorator
-class ServiceReportAdmin(admin.ModelAdmin):
+class ServiceReportAdmin(ReplicaChangelistMixin, ExportMixin, IndexedSearchMixin, LabelledChoicesMixin, admin.ModelAdmin):
     form = ServiceReportForm
+    change_list_template = 'admin/service/export_change_list.html'
+    export_fields = (
+        ('id', 'SR #'),
+        ('work_order_id', 'WO #'),
+        ('work_order__customer__name', 'Customer'),
+        ('work_order__instrument__serial_number', 'Serial Number'),
+        ('work_order__entitlement__agreement_id', 'Agreement #'),
+        ('service_date', 'Service Date'),
+        ('approval_status', 'Approval Status'),
+        ('approval_date', 'Approval Date'),
+        ('created_by__username', 'Created By'),
+        ('approved_by__username', 'Approved By'),
+        ('findings', 'Findings'),
+        ('actions_taken', 'Actions Taken'),
+    )
     
     class Media:
         css = {
@@ -67,6 +83,7 @@ class ServiceReportAdmin(admin.ModelAdmin):
     list_filter = ('approval_status', 'work_order__customer', 'service_date', CreatedByFilter)
     search_fields = ('work_order__instrument__serial_number', 'work_order__customer__name', 
                     'created_by__username', 'created_by__first_name', 'created_by__last_name')
+    search_tokens = {'SR': 'pk', 'WO': 'work_order_id'}
     readonly_fields = ('approval_date', 'approved_by')
     
     def get_form(self, request, obj=None, **kwargs):
@@ -80,7 +97,8 @@ class ServiceReportAdmin(admin.ModelAdmin):
             'work_order',
             'created_by',
             'approved_by',
-            'work_order__customer'
+            'work_order__customer',
+            'work_order__instrument__instrument_type'
         )
     
     def created_by_full_name(self, obj):
@@ -125,6 +143,7 @@ class ServiceReportAdmin(admin.ModelAdmin):
             obj.approved_by = request.user
         super().save_model(request, obj, form, change)
 
+    @use_replica
     def service_history(self, obj):
         """Display detailed service history for the instrument."""
         work_orders = WorkOrder.objects.filter(
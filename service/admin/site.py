@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.contrib.admin.sites import AdminSite
+from django.urls import path
 from .dashboard import get_admin_stats
 
 class CustomAdminSite(AdminSite):
@@ -9,7 +11,24 @@ class CustomAdminSite(AdminSite):
     def index(self, request, extra_context=None):
         extra_context = extra_context or {}
         extra_context.update(get_admin_stats(request))
+        extra_context['query_inspector_enabled'] = settings.QUERY_INSPECTOR
         return super().index(request, extra_context=extra_context)
 
+    def get_urls(self):
+        urls = super().get_urls()
+        custom_urls = [
+            path('bulk-import/', self.admin_view(self.bulk_import), name='bulk_import'),
+            path('query-report/', self.admin_view(self.query_report), name='query_report'),
+        ]
+        return custom_urls + urls
+
+    def bulk_import(self, request):
+        from .views import bulk_import_view
+        return bulk_import_view(request, self)
+
+    def query_report(self, request):
+        from .views import query_report_view
+        return query_report_view(request, self)
+
 # Create a single instance to be used throughout the application
 admin_site = CustomAdminSite(name='custom_admin')
@@ -1,35 +1,120 @@
-from django.http import JsonResponse
+import io
+from django import forms
+from django.conf import settings
+from django.http import Http404, HttpResponseRedirect, JsonResponse
 from django.contrib.admin.views.decorators import staff_member_required
-from django.shortcuts import get_object_or_404
+from django.core.exceptions import PermissionDenied
+from django.template.response import TemplateResponse
+from django.views.decorators.gzip import gzip_page
 from django.apps import apps
-from ..models import InstrumentType
+from ..utils.bulk_import import IMPORTERS, bulk_import, detect_format
+from ..utils.options import aobject_option, aobject_options, aoption_list, encode_payload
+from ..views.filter_views import option_response
+from ..middleware.query_inspector import clear_report, get_report
 
+MAX_BATCH_OPTIONS = 500
+
+@gzip_page
 @staff_member_required
-def instrument_type_options(request):
+async def instrument_type_options(request):
     """Return JSON data for instrument type options."""
-    instrument_types = InstrumentType.objects.all()
-    options = [{"value": it.pk, "label": str(it)} for it in instrument_types]
-    return JsonResponse(options, safe=False)
+    return option_response(request, await aoption_list('instrumenttypes', request.GET))
 
+@gzip_page
 @staff_member_required
-def get_model_option(request, model_name, object_id):
+async def get_model_option(request, model_name, object_id):
     """Return JSON data for popup form object selection."""
     try:
-        # Get the model class dynamically
         model = apps.get_model('service', model_name)
-        obj = get_object_or_404(model, pk=object_id)
-        
-        # Get the display value based on model
-        if hasattr(obj, 'name'):
-            label = obj.name
-        elif hasattr(obj, 'get_full_name'):
-            label = obj.get_full_name() or str(obj)
-        else:
-            label = str(obj)
-
-        return JsonResponse({
-            "value": str(obj.pk),
-            "label": label
-        })
     except LookupError:
         return JsonResponse({"error": "Model not found"}, status=404)
+
+    result = await aobject_option(model, object_id)
+    if result is None:
+        raise Http404(f'No {model._meta.verbose_name} with id {object_id}')
+    return option_response(request, result)
+
+@gzip_page
+@staff_member_required
+async def get_model_options(request):
+    """Return JSON labels for many popup selections at once.
+
+    Takes one `<model_name>=<id>,<id>,...` parameter per model and answers
+    {model_name: {id: {"value": ..., "label": ...}}}; unknown ids are omitted.
+    """
+    requested = {}
+    for model_name in request.GET:
+        try:
+            model = apps.get_model('service', model_name)
+        except LookupError:
+            return JsonResponse({"error": f"Model not found: {model_name}"}, status=404)
+        try:
+            pks = {int(pk) for value in request.GET.getlist(model_name)
+                   for pk in value.split(',') if pk}
+        except ValueError:
+            return JsonResponse({"error": f"Invalid id for {model_name}"}, status=400)
+        requested[model_name] = (model, pks)
+
+    if sum(len(pks) for _, pks in requested.values()) > MAX_BATCH_OPTIONS:
+        return JsonResponse({"error": "Too many ids"}, status=400)
+
+    payload = {
+        model_name: await aobject_options(model, sorted(pks))
+        for model_name, (model, pks) in requested.items()
+    }
+    return option_response(request, encode_payload(payload))
+
+class BulkImportForm(forms.Form):
+    kind = forms.ChoiceField(choices=[(kind, kind.title()) for kind in IMPORTERS])
+    file = forms.FileField(help_text='CSV with a header row, or JSONL (one object per line)')
+    chunk_size = forms.IntegerField(min_value=1, max_value=10000, initial=1000)
+    dry_run = forms.BooleanField(required=False, help_text='Validate everything, then roll back')
+
+def bulk_import_view(request, admin_site):
+    """Upload a CSV/JSONL file and stream it through the bulk import pipeline."""
+    form = BulkImportForm(request.POST or None, request.FILES or None)
+    stats = None
+
+    if request.method == 'POST' and form.is_valid():
+        kind = form.cleaned_data['kind']
+        opts = IMPORTERS[kind].model._meta
+        if not request.user.has_perms([
+            f'{opts.app_label}.add_{opts.model_name}',
+            f'{opts.app_label}.change_{opts.model_name}',
+        ]):
+            raise PermissionDenied
+
+        upload = form.cleaned_data['file']
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        stats = bulk_import(
+            kind,
+            stream,
+            fmt=detect_format(upload.name),
+            chunk_size=form.cleaned_data['chunk_size'],
+            dry_run=form.cleaned_data['dry_run'],
+        )
+
+    context = {
+        **admin_site.each_context(request),
+        'title': 'Bulk Import',
+        'form': form,
+        'stats': stats,
+    }
+    return TemplateResponse(request, 'admin/service/bulk_import.html', context)
+
+def query_report_view(request, admin_site):
+    """Views with the most repeated queries, as recorded by QueryInspectorMiddleware."""
+    if not request.user.is_superuser:
+        raise PermissionDenied
+    if request.method == 'POST':
+        clear_report()
+        return HttpResponseRedirect(request.path)
+
+    context = {
+        **admin_site.each_context(request),
+        'title': 'Query Report',
+        'enabled': settings.QUERY_INSPECTOR,
+        'threshold': settings.QUERY_INSPECTOR_THRESHOLD,
+        'views': get_report(),
+    }
+    return TemplateResponse(request, 'admin/service/query_report.html', context)
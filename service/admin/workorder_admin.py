@@ -1,7 +1,8 @@
 from django.contrib import admin
-from django.forms import ModelForm, ModelChoiceField
+from django.forms import ModelForm
 from django.db.models import F, Count
 from django.contrib import messages
+from django.db import transaction
 from django.utils.html import format_html
 from django.urls import reverse
 from django.contrib.admin import SimpleListFilter
@@ -12,13 +13,14 @@ from ..models.servicereport import ServiceReport
 from ..models.agreement import Entitlement
 from ..models.instrument import Instrument
 from ..utils.status_colors import get_status_badge
-
-class UserModelChoiceField(ModelChoiceField):
-    def label_from_instance(self, obj):
-        return obj.get_full_name() or obj.username
+from ..utils.admin_labels import LabelledChoicesMixin
+from ..utils.reference_data import ReferenceChoiceField
+from ..utils.export import ExportMixin
+from ..utils.search import IndexedSearchMixin
+from ..db.routers import ReplicaChangelistMixin
 
 class WorkOrderForm(ModelForm):
-    assigned_to = UserModelChoiceField(
+    assigned_to = ReferenceChoiceField(
         queryset=User.objects.all().order_by('first_name', 'last_name'),
         required=False
     )
@@ -31,12 +33,28 @@ class WorkOrderForm(ModelForm):
         super().__init__(*args, **kwargs)
         # Rest of your initialization code...
 
-class WorkOrderAdmin(admin.ModelAdmin):
+class WorkOrderAdmin(ReplicaChangelistMixin, ExportMixin, IndexedSearchMixin, LabelledChoicesMixin, admin.ModelAdmin):
     form = WorkOrderForm
+    change_list_template = 'admin/service/export_change_list.html'
+    export_fields = (
+        ('id', 'WO #'),
+        ('status', 'Status'),
+        ('customer__name', 'Customer'),
+        ('instrument__serial_number', 'Serial Number'),
+        ('instrument__instrument_type__name', 'Instrument Type'),
+        ('entitlement__agreement_id', 'Agreement #'),
+        ('entitlement__entitlement_type__name', 'Entitlement'),
+        ('assigned_to__username', 'Assigned To'),
+        ('created_by__username', 'Created By'),
+        ('created_at', 'Created'),
+        ('description', 'Description'),
+    )
     list_display = ('__str__', 'customer', 'instrument', 'status_badge', 'assigned_to', 'created_at')
     list_filter = ('status', 'customer', 'assigned_to', 'created_at')
     search_fields = ('customer__name', 'instrument__serial_number', 'description')
+    search_tokens = {'WO': 'pk'}
     readonly_fields = ('created_at',)
+    actions = [*ExportMixin.actions, 'mark_completed']
     
     def status_badge(self, obj):
         return get_status_badge(obj.status)
@@ -88,12 +106,6 @@ class WorkOrderAdmin(admin.ModelAdmin):
                 pass
         return initial
 
-    def formfield_for_foreignkey(self, db_field, request, **kwargs):
-        if db_field.name == "assigned_to":
-            kwargs["queryset"] = User.objects.all().order_by('first_name', 'last_name')
-            kwargs["label_from_instance"] = lambda obj: obj.get_full_name() or obj.username
-        return super().formfield_for_foreignkey(db_field, request, **kwargs)
-
     class Media:
         js = ('js/workorder_admin.js',)
 
@@ -109,8 +121,9 @@ class WorkOrderAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         return super().get_queryset(request).select_related(
+            'customer',
             'instrument',
-            'instrument__customer',
+            'instrument__instrument_type',
             'assigned_to',
             'created_by'
         )
@@ -147,6 +160,27 @@ class WorkOrderAdmin(admin.ModelAdmin):
             self.message_user(request, "Please select only one work order to create a service report.")
     create_service_report.short_description = "Create Service Report"
 
+    @admin.action(description='Mark selected work orders as completed')
+    def mark_completed(self, request, queryset):
+        """Complete the selected work orders that pass validation, checked
+        together with WorkOrder.validate_batch()
+        """
+        work_orders = list(queryset.exclude(status=WorkOrder.STATUS_COMPLETED).order_by('pk'))
+        for work_order in work_orders:
+            work_order.status = WorkOrder.STATUS_COMPLETED
+        errors = WorkOrder.validate_batch(work_orders, user=request.user)
+        failed = {work_order.pk for work_order, _ in errors}
+
+        with transaction.atomic():
+            completed = [wo for wo in work_orders if wo.pk not in failed]
+            for work_order in completed:
+                work_order.save()
+
+        if completed:
+            self.message_user(request, f"Marked {len(completed)} work orders as completed.", messages.SUCCESS)
+        for work_order, error in errors:
+            self.message_user(request, f"{work_order}: {' '.join(error.messages)}", messages.WARNING)
+
     def customer_link(self, obj):
         url = reverse("admin:service_customer_change", args=[obj.customer.id])
         return format_html(
@@ -5,6 +5,9 @@ class ServiceConfig(AppConfig):
     name = 'service'
 
     def ready(self):
+        # Connect signal handlers
+        from .signals import cache_handlers, customer_handlers, search_handlers
+
         # Import the custom admin site
         from .admin.site import admin_site
         
@@ -0,0 +1,18 @@
+"""PostgreSQL backend reporting connection checkout latency and pool usage.
+
+Behaves exactly like django.db.backends.postgresql. settings.py selects
+it for PostgreSQL databases, and it only times get_new_connection():
+a pool checkout with DB_POOL=True, a new connection otherwise.
+"""
+import time
+from django.conf import settings
+from django.db.backends.postgresql import base
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        started = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        if settings.PROMETHEUS_METRICS:
+            from ...utils.metrics import observe_connection
+            observe_connection(self, time.perf_counter() - started)
+        return connection
@@ -0,0 +1,95 @@
+"""Send reporting reads to the read replica, with read-your-writes pinning.
+
+Configuring DATABASE_REPLICA_URL adds a 'replica' alias and installs
+ReplicaRouter. Reads go to the replica only where code opts in:
+- inside `replica_reads()` or a `@use_replica` function: dashboard
+  stats, the service summary/history/overview panels, metrics;
+- through `read_alias()` for querysets evaluated later: exports and
+  changelists.
+Everything else, and every write, uses the primary.
+
+A request with an unsafe method runs entirely on the primary. When it
+succeeds, PrimaryPinningMiddleware sets a cookie that keeps the browser's
+requests on the primary for REPLICA_PIN_SECONDS, so a user never sees
+replication lag right after saving.
+"""
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_ALIAS = 'replica'
+PIN_COOKIE = 'primary_pin'
+
+# True while the current request must not read from the replica
+_pinned = ContextVar('primary_pinned', default=False)
+_replica_reads = ContextVar('replica_reads', default=False)
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+def read_alias():
+    """Alias for reads that tolerate replication lag in the current context"""
+    if not replica_configured() or _pinned.get():
+        return DEFAULT_DB_ALIAS
+    return REPLICA_ALIAS
+
+@contextmanager
+def replica_reads():
+    """Route the reads made inside the block to the replica when allowed"""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+def use_replica(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return func(*args, **kwargs)
+    return wrapper
+
+@contextmanager
+def pinned_to_primary(pinned=True):
+    token = _pinned.set(pinned)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        # Cache tag versions must never be read behind the primary
+        if _replica_reads.get() and model._meta.app_label != 'django_cache':
+            return read_alias()
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Explicit, or Django would write instances back where they were read
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives its schema through replication
+        return db != REPLICA_ALIAS
+
+class ReplicaChangelistMixin:
+    """ModelAdmin mixin listing the changelist from the replica.
+
+    Only GET requests are affected; change forms, actions and saves keep
+    reading the primary, so nothing is ever edited from a stale copy.
+    """
+
+    def changelist_view(self, request, extra_context=None):
+        if request.method in ('GET', 'HEAD'):
+            request.changelist_read_alias = read_alias()
+        return super().changelist_view(request, extra_context)
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        alias = getattr(request, 'changelist_read_alias', None)
+        return queryset.using(alias) if alias else queryset
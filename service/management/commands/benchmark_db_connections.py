@@ -0,0 +1,95 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+MODES = ('new', 'persistent', 'pool')
+
+class Command(BaseCommand):
+    help = (
+        'Measures the connection overhead of a request cycle with a new connection per '
+        'request, persistent connections (CONN_MAX_AGE) and the psycopg pool'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            '--requests', type=int, default=200,
+            help='Request cycles per mode (default 200)',
+        )
+        parser.add_argument(
+            '--modes', default=','.join(MODES),
+            help=f'Comma-separated subset of {", ".join(MODES)}',
+        )
+
+    def handle(self, *args, **options):
+        base = connections[options['database']]
+        if base.vendor != 'postgresql':
+            raise CommandError('Connection benchmarks need a PostgreSQL database')
+        modes = [mode.strip() for mode in options['modes'].split(',') if mode.strip()]
+        unknown = set(modes) - set(MODES)
+        if unknown:
+            raise CommandError(f'Unknown modes: {", ".join(sorted(unknown))}')
+
+        results = {}
+        for mode in modes:
+            samples = self.run_mode(base, mode, options['requests'])
+            results[mode] = samples
+            self.stdout.write(
+                f'{mode:<11} mean {statistics.mean(samples):7.2f} ms  '
+                f'p50 {statistics.median(samples):7.2f} ms  '
+                f'p95 {percentile(samples, 95):7.2f} ms'
+            )
+
+        if 'new' in results:
+            baseline = statistics.mean(results['new'])
+            for mode in modes:
+                if mode != 'new':
+                    saved = baseline - statistics.mean(results[mode])
+                    self.stdout.write(self.style.SUCCESS(
+                        f'{mode}: {saved:.2f} ms saved per request '
+                        f'({saved / baseline:.0%} of the connection cycle)'
+                    ))
+
+    def run_mode(self, base, mode, requests):
+        """Time `requests` cycles of what Django does around each request:
+        close_old_connections on request_started, one query, and
+        close_old_connections again on request_finished.
+        """
+        settings_dict = {**base.settings_dict, 'OPTIONS': dict(base.settings_dict['OPTIONS'])}
+        settings_dict['OPTIONS'].pop('pool', None)
+        settings_dict['CONN_HEALTH_CHECKS'] = True
+        if mode == 'new':
+            settings_dict['CONN_MAX_AGE'] = 0
+        elif mode == 'persistent':
+            settings_dict['CONN_MAX_AGE'] = 600
+        else:
+            settings_dict['CONN_MAX_AGE'] = 0
+            settings_dict['OPTIONS']['pool'] = {'min_size': 1, 'max_size': 1}
+
+        connection = base.__class__(settings_dict, alias=f'benchmark_{mode}')
+        samples = []
+        try:
+            # Warm up: import costs and the pool's first connection are not per request
+            self.request_cycle(connection)
+            for _ in range(requests):
+                started = time.perf_counter()
+                self.request_cycle(connection)
+                samples.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection.close()
+            if connection.pool:
+                connection.close_pool()
+        return samples
+
+    @staticmethod
+    def request_cycle(connection):
+        connection.close_if_unusable_or_obsolete()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        connection.close_if_unusable_or_obsolete()
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))]
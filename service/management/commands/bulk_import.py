@@ -0,0 +1,57 @@
+import io
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from service.utils.bulk_import import IMPORTERS, bulk_import, detect_format
+
+class Command(BaseCommand):
+    help = 'Streams customers, instruments, agreements or entitlements from CSV/JSONL into the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS))
+        parser.add_argument('path', help="CSV or JSONL file, or '-' for stdin")
+        parser.add_argument(
+            '--format',
+            choices=['csv', 'jsonl'],
+            help='Input format (default: from the file extension)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Rows validated and written per batch',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate and write everything, then roll back',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('csv' if path == '-' else detect_format(path))
+
+        try:
+            if path == '-':
+                stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+            else:
+                stream = open(path, encoding='utf-8-sig', newline='')
+        except OSError as e:
+            raise CommandError(f'Cannot open {path}: {e}')
+
+        with stream:
+            stats = bulk_import(
+                options['kind'],
+                stream,
+                fmt=fmt,
+                chunk_size=options['chunk_size'],
+                dry_run=options['dry_run'],
+            )
+
+        for line_number, message in stats.errors:
+            self.stdout.write(self.style.WARNING(f'Line {line_number}: {message}'))
+        if stats.failed > len(stats.errors):
+            self.stdout.write(f'... and {stats.failed - len(stats.errors)} more errors')
+
+        prefix = 'Dry run: ' if options['dry_run'] else ''
+        style = self.style.SUCCESS if not stats.failed else self.style.WARNING
+        self.stdout.write(style(f'{prefix}{stats.summary()}'))
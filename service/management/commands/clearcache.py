@@ -1,9 +1,42 @@
-from django.core.management.base import BaseCommand
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
 from django.core.cache import cache
+from service.utils.cache_tags import invalidate_model, invalidate_tags
 
 class Command(BaseCommand):
-    help = 'Clears Django cache'
+    help = (
+        'Clears Django cache, or with --tag/--model only the entries built from the '
+        'given tags or models'
+    )
 
-    def handle(self, *args, **kwargs):
-        cache.clear()
-        self.stdout.write('Cache has been cleared!\n')
\ No newline at end of file
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tag', action='append', default=[], dest='tags',
+            help='Expire entries tagged e.g. customer:12, agreement:3 or customer (all '
+                 'customers); repeatable',
+        )
+        parser.add_argument(
+            '--model', action='append', default=[], dest='models',
+            help='Expire entries built from a model, e.g. workorder or auth.user; repeatable',
+        )
+
+    def handle(self, *args, **options):
+        if not options['tags'] and not options['models']:
+            cache.clear()
+            self.stdout.write('Cache has been cleared!\n')
+            return
+
+        models = [self.get_model(label) for label in options['models']]
+        invalidate_tags(options['tags'])
+        for model in models:
+            invalidate_model(model)
+        expired = options['tags'] + [model._meta.label_lower for model in models]
+        self.stdout.write(f'Expired cache entries for {", ".join(expired)}\n')
+
+    @staticmethod
+    def get_model(label):
+        app_label, _, model_name = label.rpartition('.')
+        try:
+            return apps.get_model(app_label or 'service', model_name)
+        except LookupError as exc:
+            raise CommandError(str(exc))
@@ -0,0 +1,63 @@
+import time
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from service.utils.query_plans import HOT_QUERIES, sequential_scans
+
+class Command(BaseCommand):
+    help = ('Runs EXPLAIN (ANALYZE on PostgreSQL) on the registered hot querysets '
+            'and fails if any of them sequentially scans a large table')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names',
+            nargs='*',
+            help=f'Only check these queries (default: all of {", ".join(HOT_QUERIES)})',
+        )
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=10000,
+            help='Ignore sequential scans on tables with fewer rows than this',
+        )
+
+    def handle(self, *args, **options):
+        unknown = set(options['names']) - set(HOT_QUERIES)
+        if unknown:
+            raise CommandError(f'Unknown queries: {", ".join(sorted(unknown))}')
+
+        tables = {model._meta.db_table: model for model in apps.get_models()}
+        row_counts = {}
+        failures = []
+
+        for name in options['names'] or HOT_QUERIES:
+            queryset = HOT_QUERIES[name]()
+            if connection.vendor == 'postgresql':
+                plan = queryset.explain(analyze=True)
+            else:
+                plan = queryset.explain()
+
+            started = time.monotonic()
+            list(queryset)
+            elapsed = (time.monotonic() - started) * 1000
+
+            offending = []
+            for table in sequential_scans(plan, connection.vendor):
+                if table not in row_counts:
+                    model = tables.get(table)
+                    row_counts[table] = model._default_manager.count() if model else 0
+                if row_counts[table] >= options['min_rows']:
+                    offending.append(f'{table} ({row_counts[table]} rows)')
+
+            if offending:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(
+                    f'{name}: sequential scan on {", ".join(offending)} ({elapsed:.1f}ms)'
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'{name}: ok ({elapsed:.1f}ms)'))
+            if offending or options['verbosity'] > 1:
+                self.stdout.write(plan)
+
+        if failures:
+            raise CommandError(f'{len(failures)} hot queries fell back to sequential scans')
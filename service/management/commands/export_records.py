@@ -0,0 +1,73 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from service.admin.site import admin_site
+from service.models import WorkOrder, ServiceReport, ServiceAgreement
+from service.utils.export import EXPORT_FORMATS, export_rows, iter_encoded
+
+EXPORTABLE = {
+    'workorders': WorkOrder,
+    'servicereports': ServiceReport,
+    'agreements': ServiceAgreement,
+}
+
+class Command(BaseCommand):
+    help = 'Streams work orders, service reports or agreements to CSV/JSONL with the admin export columns'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTABLE))
+        parser.add_argument(
+            '--format',
+            choices=EXPORT_FORMATS,
+            default='csv',
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Compress the output with gzip',
+        )
+        parser.add_argument(
+            '--output', '-o',
+            default='-',
+            help="Output file (default: stdout)",
+        )
+        parser.add_argument(
+            '--filter',
+            action='append',
+            default=[],
+            metavar='LOOKUP=VALUE',
+            help='ORM filter to apply, e.g. --filter status=completed; repeatable',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Rows fetched per database round trip',
+        )
+
+    def handle(self, *args, **options):
+        model = EXPORTABLE[options['kind']]
+        model_admin = admin_site._registry[model]
+
+        filters = {}
+        for item in options['filter']:
+            lookup, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f'Invalid --filter "{item}", expected LOOKUP=VALUE')
+            filters[lookup] = value
+
+        queryset = model._default_manager.filter(**filters).order_by('pk')
+        chunks = iter_encoded(
+            export_rows(queryset, model_admin.export_fields, options['format'],
+                        chunk_size=options['chunk_size']),
+            compress=options['gzip'],
+        )
+
+        if options['output'] == '-':
+            out = sys.stdout.buffer
+            for data in chunks:
+                out.write(data)
+            out.flush()
+        else:
+            with open(options['output'], 'wb') as out:
+                for data in chunks:
+                    out.write(data)
@@ -0,0 +1,37 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from service.utils.search import SEARCH_DOCUMENTS, refresh_search_vectors
+
+class Command(BaseCommand):
+    help = 'Recomputes the admin search vectors (PostgreSQL only), e.g. after bulk imports'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of rows to update per query',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING(
+                f'{connection.vendor} has no search vectors; admin search uses plain lookups'
+            ))
+            return
+
+        batch_size = options['batch_size']
+        for model in SEARCH_DOCUMENTS:
+            started = time.monotonic()
+            pks = list(model.objects.order_by('pk').values_list('pk', flat=True))
+            updated = 0
+            for start in range(0, len(pks), batch_size):
+                batch = pks[start:start + batch_size]
+                updated += refresh_search_vectors(
+                    model.objects.filter(pk__gte=batch[0], pk__lte=batch[-1])
+                )
+            elapsed = time.monotonic() - started
+            self.stdout.write(self.style.SUCCESS(
+                f'Rebuilt {updated} {model._meta.verbose_name_plural} ({elapsed:.3f}s)'
+            ))
@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+from service.models import Entitlement, WorkOrder
+
+class Command(BaseCommand):
+    help = 'Recomputes entitlement usage counters from completed work orders and reports drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drift without writing corrected counters',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of entitlements to update per query',
+        )
+
+    def handle(self, *args, **options):
+        entitlements = (Entitlement.objects
+                        .annotate(actual=Count(
+                            'workorders',
+                            filter=Q(workorders__status=WorkOrder.STATUS_COMPLETED)
+                        ))
+                        .only('id', 'total', 'used_count')
+                        .order_by('id'))
+
+        drifted = []
+        overdrawn = 0
+        for ent in entitlements.iterator(chunk_size=options['batch_size']):
+            if ent.used_count == ent.actual:
+                continue
+
+            self.stdout.write(
+                f'Entitlement {ent.pk}: stored {ent.used_count}, actual {ent.actual}'
+            )
+            if ent.actual > ent.total:
+                overdrawn += 1
+                self.stdout.write(self.style.WARNING(
+                    f'Entitlement {ent.pk} is overdrawn ({ent.actual}/{ent.total}); '
+                    f'raise its total before reconciling'
+                ))
+                continue
+
+            ent.used_count = ent.actual
+            drifted.append(ent)
+
+        if not options['dry_run'] and drifted:
+            with transaction.atomic():
+                Entitlement.objects.bulk_update(
+                    drifted, ['used_count'], batch_size=options['batch_size']
+                )
+
+        action = 'Found' if options['dry_run'] else 'Reconciled'
+        self.stdout.write(
+            self.style.SUCCESS(f'{action} {len(drifted)} drifted entitlements')
+        )
+        if overdrawn:
+            self.stdout.write(
+                self.style.WARNING(f'Skipped {overdrawn} overdrawn entitlements')
+            )
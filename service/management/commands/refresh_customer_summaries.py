@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+from service.models import Customer
+
+class Command(BaseCommand):
+    help = 'Recomputes the denormalized summary columns on every customer'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'customer_ids',
+            nargs='*',
+            type=int,
+            help='Only refresh these customers',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        updated = Customer.refresh_summaries(options['customer_ids'] or None)
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Refreshed {updated} customer summaries ({elapsed:.3f}s)')
+        )
@@ -0,0 +1,31 @@
+import sqlite3
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from service.db.routers import REPLICA_ALIAS, replica_configured
+
+class Command(BaseCommand):
+    help = (
+        'Copies the primary SQLite database onto the replica, standing in for replication '
+        'when trying the read-replica setup locally'
+    )
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError('No replica configured; set DATABASE_REPLICA_URL')
+        primary, replica = connections[DEFAULT_DB_ALIAS], connections[REPLICA_ALIAS]
+        if primary.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError(
+                'Only SQLite databases can be copied; PostgreSQL replicas are fed by '
+                'streaming replication'
+            )
+
+        replica.close()
+        primary.ensure_connection()
+        target = sqlite3.connect(replica.settings_dict['NAME'])
+        try:
+            primary.connection.backup(target)
+        finally:
+            target.close()
+        self.stdout.write(self.style.SUCCESS(
+            f"Copied {primary.settings_dict['NAME']} to {replica.settings_dict['NAME']}"
+        ))
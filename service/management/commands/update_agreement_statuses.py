@@ -1,21 +1,50 @@
+import time
+from contextlib import nullcontext
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.utils import timezone
+from django.db.models import Count
 from service.models import ServiceAgreement
 
 class Command(BaseCommand):
     help = 'Updates the status of all service agreements based on their dates'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report pending transitions per status without changing anything',
+        )
+
     def handle(self, *args, **options):
-        agreements = ServiceAgreement.objects.exclude(status=ServiceAgreement.STATUS_DRAFT)
-        updated_count = 0
+        started = time.monotonic()
+
+        if options['dry_run']:
+            total = 0
+            for new_status, queryset in ServiceAgreement.pending_transitions().items():
+                pending = queryset.order_by().values('status').annotate(n=Count('pk'))
+                for row in pending.order_by('status'):
+                    self.stdout.write(f"{row['status']} -> {new_status}: {row['n']}")
+                    total += row['n']
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                self.style.SUCCESS(f'{total} agreements would be updated ({elapsed:.3f}s)')
+            )
+            return
 
-        for agreement in agreements:
-            old_status = agreement.status
-            agreement.update_status()
-            if old_status != agreement.status:
-                agreement.save()
-                updated_count += 1
+        if settings.PROMETHEUS_METRICS:
+            from service.utils.metrics import agreement_status_job
+            job = agreement_status_job()
+        else:
+            job = nullcontext(lambda updated: None)
+        with job as record_updates:
+            counts = ServiceAgreement.apply_status_transitions()
+            record_updates(sum(counts.values()))
+        for new_status, count in counts.items():
+            self.stdout.write(f'{new_status}: {count}')
+        elapsed = time.monotonic() - started
 
         self.stdout.write(
-            self.style.SUCCESS(f'Successfully updated {updated_count} agreements')
-        )
\ No newline at end of file
+            self.style.SUCCESS(
+                f'Successfully updated {sum(counts.values())} agreements ({elapsed:.3f}s)'
+            )
+        )
@@ -1,19 +1,52 @@
 import time
-from django.db import connections
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 class Command(BaseCommand):
     """Django command to pause execution until database is available"""
 
+    help = 'Waits until the database accepts connections, retrying with exponential backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            '--timeout', type=float, default=60,
+            help='Give up after this many seconds (default 60)',
+        )
+        parser.add_argument(
+            '--initial-delay', type=float, default=0.5,
+            help='First retry delay in seconds; doubles after every failure',
+        )
+        parser.add_argument(
+            '--max-delay', type=float, default=5,
+            help='Upper bound for the retry delay in seconds',
+        )
+
     def handle(self, *args, **options):
         self.stdout.write('Waiting for database...')
-        db_conn = None
-        while not db_conn:
+        connection = connections[options['database']]
+        deadline = time.monotonic() + options['timeout']
+        delay = options['initial_delay']
+        attempt = 0
+
+        while True:
+            attempt += 1
             try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('Database unavailable, waiting 1 second...')
-                time.sleep(1)
+                connection.ensure_connection()
+                break
+            except OperationalError as exc:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f'Database unavailable after {attempt} attempts: {exc}'
+                    )
+                wait = min(delay, options['max_delay'], remaining)
+                self.stdout.write(
+                    f'Database unavailable (attempt {attempt}), retrying in {wait:.1f}s...'
+                )
+                time.sleep(wait)
+                delay *= 2
 
-        self.stdout.write(self.style.SUCCESS('Database available!'))
+        connection.close()
+        self.stdout.write(self.style.SUCCESS(f'Database available after {attempt} attempt(s)!'))
@@ -1,15 +1,87 @@
-from threading import local
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 
-_thread_locals = local()
+_request_context = ContextVar('request_context', default=None)
+
+class RequestContext:
+    """Per-request state shared by models and admin code.
+
+    Group names and permission checks are memoized, so however many work
+    orders a request validates or renders, membership is queried once.
+    `cache` is a scratch dict that lives exactly as long as the request.
+    """
+
+    def __init__(self, user=None):
+        self.user = user
+        self.cache = {}
+        self._group_names = None
+        self._perms = {}
+
+    @property
+    def user_id(self):
+        if self.user is None or not self.user.is_authenticated:
+            return None
+        return self.user.pk
+
+    @property
+    def group_names(self):
+        if self._group_names is None:
+            if self.user_id is None:
+                self._group_names = frozenset()
+            else:
+                self._group_names = frozenset(
+                    self.user.groups.values_list('name', flat=True)
+                )
+        return self._group_names
+
+    def in_group(self, name):
+        return name in self.group_names
+
+    @property
+    def is_manager(self):
+        return self.in_group('Manager')
+
+    def has_perm(self, perm):
+        if perm not in self._perms:
+            self._perms[perm] = self.user_id is not None and self.user.has_perm(perm)
+        return self._perms[perm]
 
 class CurrentUserMiddleware:
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        _thread_locals.user = getattr(request, 'user', None)
-        response = self.get_response(request)
-        return response
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _request_context.set(RequestContext(getattr(request, 'user', None)))
+        try:
+            return self.get_response(request)
+        finally:
+            _request_context.reset(token)
+
+    async def __acall__(self, request):
+        token = _request_context.set(RequestContext(getattr(request, 'user', None)))
+        try:
+            return await self.get_response(request)
+        finally:
+            _request_context.reset(token)
+
+def get_request_context():
+    """Return the RequestContext of the request being handled, if any"""
+    return _request_context.get()
 
 def get_current_user():
-    return getattr(_thread_locals, 'user', None)
\ No newline at end of file
+    context = get_request_context()
+    if context is None or context.user_id is None:
+        return None
+    return context.user
+
+def request_cache():
+    """Scratch dict for the current request; a throwaway dict outside one"""
+    context = get_request_context()
+    return context.cache if context is not None else {}
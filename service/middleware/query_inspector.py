@@ -0,0 +1,172 @@
+"""Development-only detector for N+1 and duplicate queries.
+
+Enabled with QUERY_INSPECTOR=True. Every statement a request executes is
+recorded with the innermost project stack frame that issued it. Statements
+are reduced to fingerprints (literals and IN lists collapsed), and any
+fingerprint seen QUERY_INSPECTOR_THRESHOLD times or more in one request is
+reported as a likely N+1. Findings go to the 'service.queries' logger and
+to a per-view summary in the cache behind the admin's query report.
+"""
+import logging
+import re
+import time
+import traceback
+from collections import defaultdict
+from contextlib import ExitStack
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('service.queries')
+
+REPORT_CACHE_KEY = 'query_inspector:report'
+REPORT_MAX_VIEWS = 50
+REPORT_TIMEOUT = 24 * 60 * 60
+
+PROJECT_ROOT = str(Path(__file__).resolve().parent.parent)
+# Middleware frames wrap every query, so they never explain one
+MIDDLEWARE_DIR = str(Path(__file__).resolve().parent)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?|[0-9]+)\s*,?)+\)', re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+def fingerprint(sql):
+    """Normalize `sql` so statements differing only in values compare equal"""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _WHITESPACE_RE.sub(' ', sql).strip()
+
+FRAME_DEPTH = 3
+
+def calling_frame():
+    """Innermost project frames as 'path:line in function <- caller ...', or None.
+
+    A model's __str__ is rarely the culprit on its own, so the callers up
+    the stack are included to show which admin method looped over it.
+    """
+    frames = []
+    for frame in reversed(traceback.extract_stack()):
+        if frame.filename.startswith(PROJECT_ROOT) and not frame.filename.startswith(MIDDLEWARE_DIR):
+            frames.append(f'{Path(frame.filename).relative_to(PROJECT_ROOT)}:{frame.lineno} in {frame.name}')
+            if len(frames) == FRAME_DEPTH:
+                break
+    return ' <- '.join(frames) or None
+
+class QueryRecorder:
+    """execute_wrapper collecting every statement of one request"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append({
+                'sql': sql,
+                'params': repr(params),
+                'duration': time.perf_counter() - started,
+                'frame': calling_frame(),
+            })
+
+    def findings(self, threshold):
+        """Return (repeated fingerprints, duplicate statement count)"""
+        groups = defaultdict(list)
+        seen = set()
+        duplicates = 0
+        for query in self.queries:
+            groups[fingerprint(query['sql'])].append(query)
+            key = (query['sql'], query['params'])
+            if key in seen:
+                duplicates += 1
+            seen.add(key)
+
+        repeated = []
+        for sql, queries in groups.items():
+            if len(queries) < threshold:
+                continue
+            frames = defaultdict(int)
+            for query in queries:
+                frames[query['frame']] += 1
+            repeated.append({
+                'fingerprint': sql,
+                'count': len(queries),
+                'duration_ms': round(sum(q['duration'] for q in queries) * 1000, 2),
+                'frame': max(frames, key=frames.get),
+            })
+        repeated.sort(key=lambda item: item['count'], reverse=True)
+        return repeated, duplicates
+
+def record_report(view_name, total, repeated, duplicates):
+    """Fold one request's findings into the per-view report in the cache"""
+    report = cache.get(REPORT_CACHE_KEY) or {}
+    entry = report.setdefault(view_name, {
+        'view': view_name, 'requests': 0, 'max_queries': 0,
+        'total_queries': 0, 'duplicates': 0, 'offenders': {},
+    })
+    entry['requests'] += 1
+    entry['total_queries'] += total
+    entry['max_queries'] = max(entry['max_queries'], total)
+    entry['duplicates'] += duplicates
+    for item in repeated:
+        known = entry['offenders'].get(item['fingerprint'])
+        if known is None or item['count'] > known['count']:
+            entry['offenders'][item['fingerprint']] = item
+
+    if len(report) > REPORT_MAX_VIEWS:
+        worst = sorted(report.values(), key=lambda e: e['max_queries'], reverse=True)
+        report = {e['view']: e for e in worst[:REPORT_MAX_VIEWS]}
+    cache.set(REPORT_CACHE_KEY, report, REPORT_TIMEOUT)
+
+def get_report():
+    """Views ordered worst first by the largest repeated-query count seen"""
+    report = (cache.get(REPORT_CACHE_KEY) or {}).values()
+    views = []
+    for entry in report:
+        offenders = sorted(entry['offenders'].values(), key=lambda item: item['count'], reverse=True)
+        views.append({
+            **entry,
+            'offenders': offenders,
+            'worst_repeat': offenders[0]['count'] if offenders else 0,
+            'avg_queries': round(entry['total_queries'] / entry['requests'], 1),
+        })
+    views.sort(key=lambda e: (e['worst_repeat'], e['max_queries']), reverse=True)
+    return views
+
+def clear_report():
+    cache.delete(REPORT_CACHE_KEY)
+
+class QueryInspectorMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_INSPECTOR', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'QUERY_INSPECTOR_THRESHOLD', 3)
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = (match.view_name if match else None) or request.path
+        repeated, duplicates = recorder.findings(self.threshold)
+        if repeated:
+            logger.warning(
+                '%s: %d queries, %d duplicates, likely N+1:\n%s',
+                view_name, len(recorder.queries), duplicates,
+                '\n'.join(
+                    f"  {item['count']}x from {item['frame']}: {item['fingerprint'][:200]}"
+                    for item in repeated
+                ),
+            )
+        record_report(view_name, len(recorder.queries), repeated, duplicates)
+        return response
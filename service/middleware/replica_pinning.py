@@ -0,0 +1,52 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from ..db.routers import PIN_COOKIE, pinned_to_primary, replica_configured
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+class PrimaryPinningMiddleware:
+    """Keep a browser on the primary database for a while after it writes.
+
+    Requests with unsafe methods, and requests carrying the pin cookie,
+    never read from the replica. A successful write sets the cookie for
+    REPLICA_PIN_SECONDS. Listed before SessionMiddleware so session saves
+    happen inside the pinned context too.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not replica_configured():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with pinned_to_primary(self.is_pinned(request)):
+            response = self.get_response(request)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        with pinned_to_primary(self.is_pinned(request)):
+            response = await self.get_response(request)
+        return self.pin(request, response)
+
+    @staticmethod
+    def is_pinned(request):
+        return request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES
+
+    @staticmethod
+    def pin(request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
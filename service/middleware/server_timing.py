@@ -0,0 +1,228 @@
+"""Per-request timing breakdown as a Server-Timing header and a log line.
+
+With SERVER_TIMING on (it is off by default), every request is measured
+for total time, database queries (count and duration), template
+rendering and cache hits/misses. The breakdown is logged on the
+'service.timing' logger as key=value pairs, with the same values under
+`extra['timing']` for structured handlers. It is also sent as a
+Server-Timing header to staff users, so browser devtools show it next
+to the network request. The same measurements feed the Prometheus
+metrics behind /metrics (PROMETHEUS_METRICS).
+
+Queries run lazily while a template renders count towards both db and
+tpl, so the two can add up to more than the total.
+"""
+import functools
+import logging
+import time
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('service.timing')
+
+_MISSING = object()
+
+class RequestTimings:
+    """Counters filled in while one request is handled"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = 0.0
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_started = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_time += time.perf_counter() - started
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.total * 1000, 1),
+            'db_queries': self.db_queries,
+            'db_ms': round(self.db_time * 1000, 1),
+            'template_ms': round(self.template_time * 1000, 1),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+
+    def header(self):
+        return ', '.join([
+            f'total;dur={self.total * 1000:.1f}',
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.db_queries} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+        ])
+
+# Timings of the request being handled. Context variables follow the
+# request into sync_to_async threads, where ASGI runs its queries.
+_current = ContextVar('server_timing', default=None)
+# Set inside a counted cache call: BaseCache.get_many() loops over get()
+# and DatabaseCache.get() calls get_many(), so each key counts once
+_in_cache_lookup = ContextVar('server_timing_cache_lookup', default=False)
+
+def _record_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings.execute_wrapper(execute, sql, params, many, context)
+
+def _attach_query_recorder(connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+def _counted_get(get):
+    @functools.wraps(get)
+    def counted_get(key, default=None, version=None):
+        timings = _current.get()
+        if timings is None or _in_cache_lookup.get():
+            return get(key, default, version)
+        token = _in_cache_lookup.set(True)
+        try:
+            value = get(key, _MISSING, version)
+        finally:
+            _in_cache_lookup.reset(token)
+        if value is _MISSING:
+            timings.cache_misses += 1
+            return default
+        timings.cache_hits += 1
+        return value
+    return counted_get
+
+def _counted_get_many(get_many):
+    @functools.wraps(get_many)
+    def counted_get_many(keys, version=None):
+        timings = _current.get()
+        if timings is None or _in_cache_lookup.get():
+            return get_many(keys, version)
+        keys = list(keys)
+        token = _in_cache_lookup.set(True)
+        try:
+            found = get_many(keys, version)
+        finally:
+            _in_cache_lookup.reset(token)
+        timings.cache_hits += len(found)
+        timings.cache_misses += len(keys) - len(found)
+        return found
+    return counted_get_many
+
+def install_instrumentation():
+    """Hook query accounting in once per process.
+
+    Every database connection gets an execute wrapper as it connects.
+    Outside a measured request it passes straight through.
+    """
+    connection_created.connect(_attach_query_recorder, dispatch_uid='server_timing')
+    for connection in connections.all(initialized_only=True):
+        _attach_query_recorder(connection)
+
+def count_cache_lookups():
+    """Count get()/get_many() results of the cache instances this request uses.
+
+    Cache instances are per thread (per request context under ASGI), so
+    their bound methods are wrapped as each one is first seen; the backend
+    classes and other code sharing them are left alone. The async cache
+    API delegates to these methods, so it is counted too.
+    """
+    for alias in settings.CACHES:
+        cache = caches[alias]
+        if 'get' not in cache.__dict__:
+            cache.get = _counted_get(cache.get)
+            cache.get_many = _counted_get_many(cache.get_many)
+
+class ServerTimingMiddleware:
+    """Measure each request; listed first in MIDDLEWARE so the total covers
+    the other middleware and rendering starts right after its template hook.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.report = getattr(settings, 'SERVER_TIMING', False)
+        self.metrics = getattr(settings, 'PROMETHEUS_METRICS', False)
+        if not (self.report or self.metrics):
+            raise MiddlewareNotUsed
+        if self.metrics:
+            # prometheus_client is only imported when metrics are switched on
+            from ..utils.metrics import observe_request
+            self.observe_request = observe_request
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+        install_instrumentation()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        count_cache_lookups()
+        timings = request.server_timing = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        timings.total = time.perf_counter() - timings.started
+        if self.report:
+            user = getattr(request, 'user', None)
+            self.add_report(request, response, timings, user is not None and user.is_staff)
+        return self.observe(request, response, timings)
+
+    async def __acall__(self, request):
+        count_cache_lookups()
+        timings = request.server_timing = RequestTimings()
+        token = _current.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        timings.total = time.perf_counter() - timings.started
+        if self.report:
+            # request.user would query synchronously on the event loop
+            user = await request.auser() if hasattr(request, 'auser') else None
+            self.add_report(request, response, timings, user is not None and user.is_staff)
+        return self.observe(request, response, timings)
+
+    def observe(self, request, response, timings):
+        if self.metrics:
+            self.observe_request(request, response, timings)
+        return response
+
+    def add_report(self, request, response, timings, is_staff):
+        if is_staff:
+            response['Server-Timing'] = timings.header()
+
+        match = getattr(request, 'resolver_match', None)
+        data = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            **timings.as_dict(),
+        }
+        logger.info(
+            ' '.join(f'{key}={value}' for key, value in data.items()),
+            extra={'timing': data},
+        )
+
+    def process_template_response(self, request, response):
+        # Runs after every other middleware's hook, immediately before render()
+        timings = request.server_timing
+        timings.template_started = time.perf_counter()
+        response.add_post_render_callback(lambda rendered: self._rendered(timings))
+        return response
+
+    @staticmethod
+    def _rendered(timings):
+        timings.template_time += time.perf_counter() - timings.template_started
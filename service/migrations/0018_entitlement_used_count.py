@@ -0,0 +1,60 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:01
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_used_count(apps, schema_editor):
+    Entitlement = apps.get_model('service', 'Entitlement')
+    WorkOrder = apps.get_model('service', 'WorkOrder')
+    completed = (WorkOrder.objects
+                 .filter(entitlement=OuterRef('pk'), status='completed')
+                 .order_by()
+                 .values('entitlement')
+                 .annotate(n=Count('pk'))
+                 .values('n'))
+    Entitlement.objects.update(used_count=Coalesce(Subquery(completed), 0))
+
+
+def check_overdrawn_entitlements(apps, schema_editor):
+    """Fail with the rows to fix instead of letting the constraint below reject them.
+
+    Before this migration nothing stopped a work order from completing
+    against an exhausted entitlement, so some may hold more completed
+    work orders than their total.
+    """
+    Entitlement = apps.get_model('service', 'Entitlement')
+    overdrawn = list(Entitlement.objects
+                     .filter(used_count__gt=models.F('total'))
+                     .order_by('pk')
+                     .values_list('pk', 'used_count', 'total'))
+    if overdrawn:
+        rows = ', '.join(f'{pk} ({used}/{total})' for pk, used, total in overdrawn[:50])
+        more = f' and {len(overdrawn) - 50} more' if len(overdrawn) > 50 else ''
+        raise RuntimeError(
+            f'{len(overdrawn)} entitlements have more completed work orders than their '
+            f'total: {rows}{more}. Raise their totals or move the extra work orders to '
+            f'another entitlement, then run migrate again.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0017_add_po_number_to_agreement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='entitlement',
+            name='used_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of completed work orders drawn against this entitlement'),
+        ),
+        migrations.RunPython(populate_used_count, migrations.RunPython.noop),
+        migrations.RunPython(check_overdrawn_entitlements, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='entitlement',
+            constraint=models.CheckConstraint(condition=models.Q(('used_count__lte', models.F('total'))), name='entitlement_used_within_total'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0018_entitlement_used_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgreementStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(choices=[('draft', 'Draft'), ('active', 'Active'), ('expired', 'Expired'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('to_status', models.CharField(choices=[('draft', 'Draft'), ('active', 'Active'), ('expired', 'Expired'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('changed_at', models.DateTimeField(auto_now_add=True)),
+                ('agreement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='service.serviceagreement')),
+            ],
+            options={
+                'ordering': ['-changed_at'],
+            },
+        ),
+    ]
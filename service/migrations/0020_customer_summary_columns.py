@@ -0,0 +1,64 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:04
+
+from django.db import migrations, models
+from django.db.models import Count, Exists, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_summaries(apps, schema_editor):
+    Customer = apps.get_model('service', 'Customer')
+    Contact = apps.get_model('service', 'Contact')
+    Instrument = apps.get_model('service', 'Instrument')
+    ServiceAgreement = apps.get_model('service', 'ServiceAgreement')
+    WorkOrder = apps.get_model('service', 'WorkOrder')
+
+    def count_of(model):
+        return Coalesce(Subquery(
+            model.objects.filter(customer=OuterRef('pk'))
+            .order_by().values('customer')
+            .annotate(n=Count('pk')).values('n')
+        ), 0)
+
+    Customer.objects.update(
+        instrument_count=count_of(Instrument),
+        contact_count=count_of(Contact),
+        last_service_at=Subquery(
+            WorkOrder.objects.filter(instrument__customer=OuterRef('pk'))
+            .order_by().values('instrument__customer')
+            .annotate(latest=Max('created_at')).values('latest')
+        ),
+        has_active_agreement=Exists(
+            ServiceAgreement.objects.filter(customer=OuterRef('pk'), status='active')
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0019_agreementstatusevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='contact_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='has_active_agreement',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='instrument_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='last_service_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,99 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:19
+
+import django.contrib.postgres.search
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+# (index name, table, expression) for the trigram indexes behind icontains.
+# Django compiles icontains to UPPER(column::text) LIKE UPPER(%s), so the
+# indexed expression has to match that exactly.
+TRIGRAM_INDEXES = [
+    ('service_customer_name_trgm', 'service_customer', 'name'),
+    ('service_customer_website_trgm', 'service_customer', 'website'),
+    ('service_customer_address_trgm', 'service_customer', 'address'),
+    ('service_instrument_serial_trgm', 'service_instrument', 'serial_number'),
+    ('service_instrumenttype_name_trgm', 'service_instrumenttype', 'name'),
+    ('service_agreement_po_number_trgm', 'service_serviceagreement', 'po_number'),
+]
+
+VECTOR_INDEXES = [
+    ('service_workorder_search_gin', 'service_workorder'),
+    ('service_servicereport_search_gin', 'service_servicereport'),
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+            f'USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+    for name, table in VECTOR_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (search_vector)'
+        )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, *_ in TRIGRAM_INDEXES + VECTOR_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+def populate_search_vectors(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    WorkOrder = apps.get_model('service', 'WorkOrder')
+    ServiceReport = apps.get_model('service', 'ServiceReport')
+    Customer = apps.get_model('service', 'Customer')
+    Instrument = apps.get_model('service', 'Instrument')
+    User = apps.get_model('auth', 'User')
+
+    def related(model, column, field):
+        return Subquery(model.objects.filter(pk=OuterRef(column)).values(field)[:1])
+
+    WorkOrder.objects.update(search_vector=SearchVector(
+        'description',
+        related(Customer, 'customer_id', 'name'),
+        related(Instrument, 'instrument_id', 'serial_number'),
+        related(User, 'created_by_id', 'username'),
+        related(User, 'created_by_id', 'first_name'),
+        related(User, 'created_by_id', 'last_name'),
+        config='simple',
+    ))
+    ServiceReport.objects.update(search_vector=SearchVector(
+        related(WorkOrder, 'work_order_id', 'instrument__serial_number'),
+        related(WorkOrder, 'work_order_id', 'customer__name'),
+        related(User, 'created_by_id', 'username'),
+        related(User, 'created_by_id', 'first_name'),
+        related(User, 'created_by_id', 'last_name'),
+        config='simple',
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('service', '0020_customer_summary_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='servicereport',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='workorder',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+        migrations.RunPython(populate_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.15 on 2026-10-18 17:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('service', '0021_search_vectors'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['customer', '-primary_contact', 'name'], name='contact_customer_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='entitlement',
+            index=models.Index(fields=['instrument', 'is_active'], name='entitlement_instr_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='serviceagreement',
+            index=models.Index(fields=['status', 'end_date'], name='agreement_status_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicereport',
+            index=models.Index(fields=['approval_status', '-service_date'], name='report_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='servicereport',
+            index=models.Index(fields=['-service_date'], name='report_service_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['status', '-created_at'], name='workorder_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['-created_at'], name='workorder_created_idx'),
+        ),
+    ]
@@ -1,5 +1,5 @@
 from .customer import Customer, Contact
 from .instrument import InstrumentType, Instrument
-from .agreement import ServiceAgreement, EntitlementType, Entitlement
+from .agreement import ServiceAgreement, AgreementStatusEvent, EntitlementType, Entitlement
 from .workorder import WorkOrder
 from .servicereport import ServiceReport
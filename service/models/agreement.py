@@ -1,10 +1,17 @@
-from django.db import models
+from django.db import models, transaction
+from django.core.exceptions import ValidationError
 from django.utils import timezone
 from django.db.models.signals import pre_save
 from django.dispatch import receiver
 from django.utils.html import format_html
 from django.urls import reverse
 from .customer import Customer
+from .instrument import Instrument
+
+class ServiceAgreementQuerySet(models.QuerySet):
+    def with_labels(self):
+        """Annotate what __str__ needs so listing agreements costs one query"""
+        return self.annotate(customer_name=models.F('customer__name'))
 
 class ServiceAgreement(models.Model):
     STATUS_DRAFT = 'draft'
@@ -27,6 +34,14 @@ class ServiceAgreement(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_DRAFT)
     notes = models.TextField(blank=True)
 
+    objects = ServiceAgreementQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Active and expiring agreements on the dashboard
+            models.Index(fields=['status', 'end_date'], name='agreement_status_end_idx'),
+        ]
+
     def update_status(self):
         """Update agreement status based on dates"""
         today = timezone.now().date()
@@ -39,8 +54,60 @@ class ServiceAgreement(models.Model):
         elif today >= self.start_date:
             self.status = self.STATUS_ACTIVE
 
+    @classmethod
+    def pending_transitions(cls, today=None):
+        """Return {new_status: queryset} of agreements whose dates call for a new status"""
+        today = today or timezone.now().date()
+        candidates = cls.objects.exclude(status=cls.STATUS_DRAFT)
+        return {
+            cls.STATUS_EXPIRED: candidates.filter(
+                end_date__lt=today
+            ).exclude(status=cls.STATUS_EXPIRED),
+            cls.STATUS_ACTIVE: candidates.filter(
+                start_date__lte=today, end_date__gte=today
+            ).exclude(status=cls.STATUS_ACTIVE),
+        }
+
+    @classmethod
+    def apply_status_transitions(cls, today=None):
+        """Apply update_status() to all agreements with one UPDATE per new status.
+
+        Bypasses save() and its signals. Returns {new_status: rows_changed},
+        records an AgreementStatusEvent for every changed agreement and
+        expires cached agreement data when the transaction commits.
+        """
+        from ..utils.cache_tags import invalidate_model
+
+        counts = {}
+        with transaction.atomic():
+            for new_status, queryset in cls.pending_transitions(today).items():
+                rows = list(queryset.select_for_update().values_list('pk', 'status', 'customer_id'))
+                counts[new_status] = len(rows)
+                if not rows:
+                    continue
+
+                queryset.update(status=new_status)
+                Customer.refresh_summaries(customer_id for _, _, customer_id in rows)
+                AgreementStatusEvent.objects.bulk_create(
+                    [
+                        AgreementStatusEvent(
+                            agreement_id=pk,
+                            from_status=old_status,
+                            to_status=new_status,
+                        )
+                        for pk, old_status, _ in rows
+                    ],
+                    batch_size=1000,
+                )
+            if any(counts.values()):
+                invalidate_model(cls)
+        return counts
+
     def __str__(self):
-        return f"SA-{self.id} ({self.customer.name})"
+        customer_name = getattr(self, 'customer_name', None)
+        if customer_name is None:
+            customer_name = self.customer.name
+        return f"SA-{self.id} ({customer_name})"
 
     def get_status_display(self):
         """Custom method to get display value for status"""
@@ -54,6 +121,23 @@ def auto_update_agreement_status(sender, instance, **kwargs):
     """Signal to automatically update agreement status before saving"""
     instance.update_status()
 
+class AgreementStatusEvent(models.Model):
+    """Status change applied to an agreement by the status update job"""
+    agreement = models.ForeignKey(
+        ServiceAgreement,
+        on_delete=models.CASCADE,
+        related_name='status_events'
+    )
+    from_status = models.CharField(max_length=20, choices=ServiceAgreement.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=ServiceAgreement.STATUS_CHOICES)
+    changed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-changed_at']
+
+    def __str__(self):
+        return f"SA-{self.agreement_id}: {self.from_status} -> {self.to_status}"
+
 class EntitlementType(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
@@ -61,6 +145,23 @@ class EntitlementType(models.Model):
     def __str__(self):
         return self.name
 
+class EntitlementQuerySet(models.QuerySet):
+    def with_usage(self):
+        """Annotate remaining_count in SQL; used_count is already a stored column"""
+        return self.annotate(
+            remaining_count=models.ExpressionWrapper(
+                models.F('total') - models.F('used_count'),
+                output_field=models.IntegerField()
+            )
+        )
+
+    def with_labels(self):
+        """Annotate what __str__ needs so listing entitlements costs one query"""
+        return self.with_usage().annotate(
+            entitlement_type_name=models.F('entitlement_type__name'),
+            instrument_label=Instrument.label_expression('instrument__'),
+        )
+
 class Entitlement(models.Model):
     agreement = models.ForeignKey(
         ServiceAgreement,
@@ -79,17 +180,60 @@ class Entitlement(models.Model):
     total = models.PositiveIntegerField(
         help_text="Total number of visits/services allowed"
     )
+    used_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of completed work orders drawn against this entitlement"
+    )
     is_active = models.BooleanField(default=True)
 
+    objects = EntitlementQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(used_count__lte=models.F('total')),
+                name='entitlement_used_within_total',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['instrument', 'is_active'], name='entitlement_instr_active_idx'),
+        ]
+
+    @classmethod
+    def consume(cls, pk):
+        """Atomically draw one visit; returns False if none remain"""
+        return bool(cls.objects.filter(
+            pk=pk, used_count__lt=models.F('total')
+        ).update(used_count=models.F('used_count') + 1))
+
+    @classmethod
+    def release(cls, pk):
+        """Atomically give back one previously drawn visit"""
+        return bool(cls.objects.filter(
+            pk=pk, used_count__gt=0
+        ).update(used_count=models.F('used_count') - 1))
+
+    def clean(self):
+        super().clean()
+        if self.total is not None and self.total < self.used_count:
+            raise ValidationError({
+                'total': f'Total cannot be less than the {self.used_count} visits already used.'
+            })
+
     @property
     def used(self):
-        """Calculate number of used visits"""
-        return self.workorders.filter(status='completed').count()
+        """Number of used visits, maintained by WorkOrder.save()"""
+        return self.used_count
 
     @property
     def remaining(self):
-        """Calculate number of remaining visits"""
+        """Number of remaining visits, from the with_usage() annotation when present"""
+        if hasattr(self, 'remaining_count'):
+            return self.remaining_count
         return max(0, self.total - self.used)
 
     def __str__(self):
-        return f"{self.entitlement_type} ({self.remaining}/{self.total} remaining) - {self.instrument}"
+        type_name = getattr(self, 'entitlement_type_name', None) or self.entitlement_type
+        instrument = getattr(self, 'instrument_label', None) or self.instrument
+        return f"{type_name} ({self.remaining}/{self.total} remaining) - {instrument}"
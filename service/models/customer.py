@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import Count, Exists, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django import forms
 
 class Customer(models.Model):
@@ -7,9 +9,52 @@ class Customer(models.Model):
     website = models.URLField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Summary columns maintained by refresh_summaries()
+    instrument_count = models.PositiveIntegerField(default=0, editable=False)
+    contact_count = models.PositiveIntegerField(default=0, editable=False)
+    last_service_at = models.DateTimeField(null=True, blank=True, editable=False)
+    has_active_agreement = models.BooleanField(default=False, editable=False)
+
     def __str__(self):
         return self.name
 
+    @classmethod
+    def refresh_summaries(cls, customer_ids=None):
+        """Recompute summary columns in a single UPDATE; all customers if no ids given"""
+        from .instrument import Instrument
+        from .agreement import ServiceAgreement
+        from .workorder import WorkOrder
+
+        def count_of(model):
+            return Coalesce(Subquery(
+                model.objects.filter(customer=OuterRef('pk'))
+                .order_by().values('customer')
+                .annotate(n=Count('pk')).values('n')
+            ), 0)
+
+        queryset = cls.objects.all()
+        if customer_ids is not None:
+            customer_ids = {pk for pk in customer_ids if pk}
+            if not customer_ids:
+                return 0
+            queryset = queryset.filter(pk__in=customer_ids)
+
+        return queryset.update(
+            instrument_count=count_of(Instrument),
+            contact_count=count_of(Contact),
+            last_service_at=Subquery(
+                WorkOrder.objects.filter(instrument__customer=OuterRef('pk'))
+                .order_by().values('instrument__customer')
+                .annotate(latest=Max('created_at')).values('latest')
+            ),
+            has_active_agreement=Exists(
+                ServiceAgreement.objects.filter(
+                    customer=OuterRef('pk'),
+                    status=ServiceAgreement.STATUS_ACTIVE
+                )
+            ),
+        )
+
     class Meta:
         verbose_name = 'Customer'
         verbose_name_plural = 'Customers'
@@ -27,3 +72,7 @@ class Contact(models.Model):
 
     class Meta:
         ordering = ['-primary_contact', 'name']
+        indexes = [
+            # A customer's contacts in their default order
+            models.Index(fields=['customer', '-primary_contact', 'name'], name='contact_customer_order_idx'),
+        ]
@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Concat
 from django.contrib.auth.models import User
 from .customer import Customer
 
@@ -9,6 +11,11 @@ class InstrumentType(models.Model):
     def __str__(self):
         return self.name
 
+class InstrumentQuerySet(models.QuerySet):
+    def with_labels(self):
+        """Annotate what __str__ needs so listing instruments costs one query"""
+        return self.annotate(instrument_label=Instrument.label_expression())
+
 class Instrument(models.Model):
     instrument_type = models.ForeignKey(
         InstrumentType,
@@ -26,5 +33,20 @@ class Instrument(models.Model):
         related_name='assigned_instruments'
     )
 
+    objects = InstrumentQuerySet.as_manager()
+
+    @staticmethod
+    def label_expression(prefix=''):
+        """SQL expression producing __str__ for the instrument at `prefix`"""
+        return Concat(
+            F(f'{prefix}instrument_type__name'),
+            Value(' - '),
+            F(f'{prefix}serial_number'),
+            output_field=models.CharField()
+        )
+
     def __str__(self):
+        label = getattr(self, 'instrument_label', None)
+        if label is not None:
+            return label
         return f"{self.instrument_type.name} - {self.serial_number}"
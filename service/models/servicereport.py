@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 from django.utils import timezone
 
 class ServiceReport(models.Model):
@@ -40,9 +41,15 @@ class ServiceReport(models.Model):
         blank=True,
         related_name='approved_reports'
     )
+    # Maintained on PostgreSQL by the search signal handlers
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         ordering = ['-service_date']
+        indexes = [
+            models.Index(fields=['approval_status', '-service_date'], name='report_status_date_idx'),
+            models.Index(fields=['-service_date'], name='report_service_date_idx'),
+        ]
 
     def __str__(self):
         return f"SR-{self.id} ({self.work_order})"
@@ -1,15 +1,36 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Exists, F, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import User, Group
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import ValidationError, PermissionDenied
 from .customer import Customer
 from .instrument import Instrument
 from .agreement import Entitlement
 from .servicereport import ServiceReport
+from ..middleware.current_user import get_current_user, get_request_context
+
+def _context_for(user):
+    """Return the request context if it belongs to `user`"""
+    context = get_request_context()
+    if context is not None and context.user_id is not None and context.user_id == user.pk:
+        return context
+    return None
 
 def is_manager(user):
     """Check if user belongs to manager group"""
+    context = _context_for(user)
+    if context is not None:
+        return context.is_manager
     return user.groups.filter(name='Manager').exists()
 
+class WorkOrderQuerySet(models.QuerySet):
+    def with_labels(self):
+        """Annotate what __str__ needs so listing work orders costs one query"""
+        return self.annotate(instrument_label=Instrument.label_expression('instrument__'))
+
 class WorkOrder(models.Model):
     STATUS_DRAFT = 'draft'
     STATUS_OPEN = 'open'
@@ -51,59 +72,244 @@ class WorkOrder(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_DRAFT)
+    # Maintained on PostgreSQL by the search signal handlers
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = WorkOrderQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Status filters on the dashboard and changelist, newest first
+            models.Index(fields=['status', '-created_at'], name='workorder_status_created_idx'),
+            models.Index(fields=['-created_at'], name='workorder_created_idx'),
+        ]
+
+    # Entitlement this work order was drawing a visit from when it was loaded
+    _loaded_usage = None
+    # _validation_state() of the last successful clean(), reset by save()
+    _validated_state = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_usage = cls._usage_for(
+            instance.__dict__.get('status'),
+            instance.__dict__.get('entitlement_id')
+        )
+        return instance
+
+    @classmethod
+    def _usage_for(cls, status, entitlement_id):
+        """Return the entitlement a work order in this state counts against"""
+        if status == cls.STATUS_COMPLETED and entitlement_id:
+            return entitlement_id
+        return None
+
+    def _sync_entitlement_usage(self, previous_usage):
+        """Move the used visit between entitlements after a status change"""
+        current_usage = self._usage_for(self.status, self.entitlement_id)
+        if previous_usage == current_usage:
+            return
+
+        if previous_usage:
+            Entitlement.release(previous_usage)
+        if current_usage and not Entitlement.consume(current_usage):
+            raise ValidationError({
+                'status': 'Cannot complete work order. No remaining entitlements available.'
+            })
 
     def has_approved_reports(self):
         """Check if all submitted reports are approved"""
         reports = self.service_reports.all()
         return reports.exists() and not reports.exclude(approval_status='approved').exists()
 
-    def clean(self):
-        cleaned_data = super().clean()
-        
-        # Get the current user from the thread local storage
-        from django.db import connection
-        current_user = getattr(connection, '_current_user', None)
-        
+    def _validation_state(self, user):
+        """Fingerprint of everything clean() depends on for this instance"""
+        return (self.pk, self.status, self.entitlement_id, getattr(user, 'pk', None))
+
+    def _completion_facts(self, user):
+        """Fetch the stored facts a completion check needs in a single query"""
+        reports = (ServiceReport.objects
+                   .filter(work_order_id=self.pk)
+                   .order_by()
+                   .values('work_order'))
+        if not user:
+            user_is_manager = Value(True)
+        elif _context_for(user) is not None:
+            user_is_manager = Value(is_manager(user))
+        else:
+            user_is_manager = Exists(Group.objects.filter(name='Manager', user=user.pk))
+
+        facts = (Entitlement.objects
+                 .filter(pk=self.entitlement_id)
+                 .annotate(
+                     report_count=Coalesce(Subquery(
+                         reports.annotate(n=Count('pk')).values('n')
+                     ), 0),
+                     unapproved_count=Coalesce(Subquery(
+                         reports.exclude(approval_status=ServiceReport.STATUS_APPROVED)
+                         .annotate(n=Count('pk')).values('n')
+                     ), 0),
+                     user_is_manager=user_is_manager,
+                 )
+                 .values('total', 'used_count', 'report_count',
+                         'unapproved_count', 'user_is_manager')
+                 .first())
+        if facts is None:
+            raise ValidationError({
+                'entitlement': 'The selected entitlement no longer exists.'
+            })
+        return {
+            'report_count': facts['report_count'],
+            'unapproved_count': facts['unapproved_count'],
+            'remaining': facts['total'] - facts['used_count'],
+            'user_is_manager': facts['user_is_manager'],
+        }
+
+    def _check(self, facts=None):
+        """Raise ValidationError if this work order may not be saved as-is.
+
+        `facts` (see _completion_facts) is only needed when completing.
+        """
         # Ensure work order has entitlement before leaving draft status
-        if self.status != self.STATUS_DRAFT and not self.entitlement:
+        if self.status != self.STATUS_DRAFT and not self.entitlement_id:
             raise ValidationError({
                 'status': 'Work Order must have an entitlement before leaving Draft status.'
             })
-        
+
+        if self.status != self.STATUS_COMPLETED:
+            return
+
         # Check manager permission when status is being set to completed
-        if self.status == self.STATUS_COMPLETED:
-            if current_user and not is_manager(current_user):
-                raise ValidationError({
-                    'status': 'Only managers can mark work orders as completed.'
-                })
-            
-            if not self.service_reports.exists():
-                raise ValidationError({
-                    'status': 'Cannot complete work order without at least one service report.'
-                })
-            
-            if not self.has_approved_reports():
-                raise ValidationError({
-                    'status': 'Cannot complete work order until all service reports are approved.'
-                })
+        if not facts['user_is_manager']:
+            raise ValidationError({
+                'status': 'Only managers can mark work orders as completed.'
+            })
+
+        if not facts['report_count']:
+            raise ValidationError({
+                'status': 'Cannot complete work order without at least one service report.'
+            })
+
+        if facts['unapproved_count']:
+            raise ValidationError({
+                'status': 'Cannot complete work order until all service reports are approved.'
+            })
+
+        newly_used = self._usage_for(self.status, self.entitlement_id) != self._loaded_usage
+        if newly_used and facts['remaining'] <= 0:
+            raise ValidationError({
+                'status': 'Cannot complete work order. No remaining entitlements available.'
+            })
 
-            if self.entitlement and self.entitlement.remaining_visits <= 0:
-                raise ValidationError({
-                    'status': 'Cannot complete work order. No remaining entitlements available.'
-                })
+    def clean(self):
+        super().clean()
+
+        current_user = get_current_user()
+
+        # The admin's full_clean() and save() both land here; only check once
+        state = self._validation_state(current_user)
+        if self._validated_state == state:
+            return
+
+        facts = None
+        if self.status == self.STATUS_COMPLETED and self.entitlement_id:
+            facts = self._completion_facts(current_user)
+        self._check(facts)
+        self._validated_state = state
+
+    @classmethod
+    def validate_batch(cls, work_orders, user=None):
+        """Validate many work orders in a constant number of queries.
+
+        Fast path for bulk writers such as the admin's "Mark as completed"
+        action. Runs the same checks as clean(), counting visits drawn by
+        earlier work orders in the batch against the same entitlement.
+        Returns a list of (work_order, ValidationError) for the failures;
+        the others are marked validated so a following save() does not
+        check them again.
+        """
+        work_orders = list(work_orders)
+        completing = [wo for wo in work_orders
+                      if wo.status == cls.STATUS_COMPLETED and wo.entitlement_id]
+        completing_ids = {id(wo) for wo in completing}
 
-        return cleaned_data
+        report_counts = {}
+        remaining = {}
+        user_is_manager = True
+        if completing:
+            report_counts = {
+                row['work_order']: row
+                for row in (ServiceReport.objects
+                            .filter(work_order__in=[wo.pk for wo in completing if wo.pk])
+                            .order_by()
+                            .values('work_order')
+                            .annotate(
+                                total=Count('pk'),
+                                unapproved=Count('pk', filter=~Q(
+                                    approval_status=ServiceReport.STATUS_APPROVED
+                                )),
+                            ))
+            }
+            remaining = dict(Entitlement.objects
+                             .filter(pk__in={wo.entitlement_id for wo in completing})
+                             .values_list('pk', F('total') - F('used_count')))
+            if user:
+                user_is_manager = is_manager(user)
+
+        errors = []
+        for wo in work_orders:
+            facts = None
+            if id(wo) in completing_ids:
+                reports = report_counts.get(wo.pk, {})
+                facts = {
+                    'report_count': reports.get('total', 0),
+                    'unapproved_count': reports.get('unapproved', 0),
+                    'remaining': remaining.get(wo.entitlement_id),
+                    'user_is_manager': user_is_manager,
+                }
+            try:
+                if facts and facts['remaining'] is None:
+                    raise ValidationError({
+                        'entitlement': 'The selected entitlement no longer exists.'
+                    })
+                wo._check(facts)
+            except ValidationError as e:
+                errors.append((wo, e))
+                continue
+
+            if facts and wo._usage_for(wo.status, wo.entitlement_id) != wo._loaded_usage:
+                remaining[wo.entitlement_id] -= 1
+            wo._validated_state = wo._validation_state(user)
+        return errors
 
     def save(self, *args, **kwargs):
         if not self.customer_id:
             self.customer = self.instrument.customer
         
         # Force draft status if no entitlement
-        if not self.entitlement:
+        if not self.entitlement_id:
             self.status = self.STATUS_DRAFT
             
         self.clean()
-        super().save(*args, **kwargs)
+
+        with transaction.atomic():
+            previous_usage = None
+            if self.pk:
+                # Lock the row so concurrent saves see each other's transitions
+                previous = (WorkOrder.objects
+                            .select_for_update()
+                            .filter(pk=self.pk)
+                            .values_list('status', 'entitlement_id')
+                            .first())
+                if previous:
+                    previous_usage = self._usage_for(*previous)
+
+            super().save(*args, **kwargs)
+            self._sync_entitlement_usage(previous_usage)
+
+        self._loaded_usage = self._usage_for(self.status, self.entitlement_id)
+        self._validated_state = None
 
     def get_service_reports_display(self):
         reports = self.service_reports.all().order_by('-service_date')
@@ -112,6 +318,12 @@ class WorkOrder(models.Model):
         return reports
 
     def __str__(self):
-        return f"WO-{self.id} ({self.instrument})"
-
+        instrument = getattr(self, 'instrument_label', None) or self.instrument
+        return f"WO-{self.id} ({instrument})"
 
+@receiver(post_delete, sender=WorkOrder)
+def release_entitlement_usage(sender, instance, **kwargs):
+    """Give the visit back when a completed work order is deleted"""
+    usage = sender._usage_for(instance.status, instance.entitlement_id)
+    if usage:
+        Entitlement.release(usage)
@@ -0,0 +1,40 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from ..models import InstrumentType, EntitlementType
+from ..utils.cache_tags import SCOPE_LOOKUPS, invalidate_tags, model_tag, scope_tags
+
+# Models whose rows feed cached entries: option labels, dashboard counts,
+# the customer/agreement panels and the reference data kept per process
+TAGGED_MODELS = (*SCOPE_LOOKUPS, InstrumentType, EntitlementType, User)
+
+# Saves touching only these fields change nothing a cached entry shows;
+# every login saves User.last_login
+UNCACHED_FIELDS = {User: {'last_login'}}
+
+def remember_stored_tags(sender, instance, raw=False, using=None, **kwargs):
+    """Remember the stored row's scopes, so a reassignment expires both sides
+    and a delete still knows them once the row is gone
+    """
+    instance._cache_previous_tags = set() if raw else scope_tags(sender, instance.pk, using)
+
+def expire_saved_tags(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and set(update_fields) <= UNCACHED_FIELDS.get(sender, set()):
+        return
+    invalidate_tags({
+        model_tag(sender),
+        *scope_tags(sender, instance.pk, using),
+        *getattr(instance, '_cache_previous_tags', ()),
+    }, using)
+
+def expire_deleted_tags(sender, instance, using=None, **kwargs):
+    invalidate_tags({model_tag(sender), *getattr(instance, '_cache_previous_tags', ())}, using)
+
+for model in TAGGED_MODELS:
+    uid = f'cache_tags_{model._meta.label_lower}'
+    if model in SCOPE_LOOKUPS:
+        pre_save.connect(remember_stored_tags, sender=model, dispatch_uid=uid)
+        pre_delete.connect(remember_stored_tags, sender=model, dispatch_uid=uid)
+    post_save.connect(expire_saved_tags, sender=model, dispatch_uid=uid)
+    post_delete.connect(expire_deleted_tags, sender=model, dispatch_uid=uid)
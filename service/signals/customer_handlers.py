@@ -0,0 +1,69 @@
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+from ..models import Customer, Contact, Instrument, ServiceAgreement, WorkOrder
+
+# Models feeding Customer summary columns, with the lookup to their customer
+SUMMARY_SOURCES = {
+    Contact: 'customer_id',
+    Instrument: 'customer_id',
+    ServiceAgreement: 'customer_id',
+    WorkOrder: 'instrument__customer_id',  # last_service_at follows the instrument
+}
+
+# Columns whose change can move a summary; saves leaving them alone skip the refresh
+SUMMARY_FIELDS = {
+    Contact: ('customer_id',),
+    Instrument: ('customer_id',),
+    ServiceAgreement: ('customer_id', 'status'),
+    WorkOrder: ('instrument_id',),
+}
+
+def _summary_customer_id(sender, instance):
+    if sender is WorkOrder:
+        return (Instrument.objects
+                .filter(pk=instance.instrument_id)
+                .values_list('customer_id', flat=True)
+                .first())
+    return instance.customer_id
+
+def _summary_state(sender, instance):
+    """Current values of the summary columns; None if any is deferred"""
+    try:
+        return tuple(instance.__dict__[attname] for attname in SUMMARY_FIELDS[sender])
+    except KeyError:
+        return None
+
+def remember_loaded_state(sender, instance, **kwargs):
+    instance._summary_loaded_state = _summary_state(sender, instance)
+
+def remember_previous_customer(sender, instance, **kwargs):
+    """Remember the stored customer so a reassignment refreshes both sides"""
+    instance._summary_previous_customer_id = None
+    instance._summary_unchanged = False
+    if not instance._state.adding:
+        state = _summary_state(sender, instance)
+        if state is not None and state == getattr(instance, '_summary_loaded_state', None):
+            instance._summary_unchanged = True
+            return
+    if instance.pk:
+        instance._summary_previous_customer_id = (sender.objects
+                                                  .filter(pk=instance.pk)
+                                                  .values_list(SUMMARY_SOURCES[sender], flat=True)
+                                                  .first())
+
+def refresh_customer_summary(sender, instance, **kwargs):
+    Customer.refresh_summaries({
+        _summary_customer_id(sender, instance),
+        getattr(instance, '_summary_previous_customer_id', None),
+    })
+
+def refresh_saved_customer_summary(sender, instance, **kwargs):
+    if instance._summary_unchanged:
+        return
+    refresh_customer_summary(sender, instance)
+    instance._summary_loaded_state = _summary_state(sender, instance)
+
+for model in SUMMARY_SOURCES:
+    post_init.connect(remember_loaded_state, sender=model)
+    pre_save.connect(remember_previous_customer, sender=model)
+    post_save.connect(refresh_saved_customer_summary, sender=model)
+    post_delete.connect(refresh_customer_summary, sender=model)
@@ -0,0 +1,32 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from ..models import Customer, Instrument, ServiceReport, WorkOrder
+from ..utils.search import refresh_search_vectors
+
+# Model -> (fields that appear in search documents, lookups of the
+# WorkOrder / ServiceReport rows whose documents include them)
+SEARCH_SOURCES = {
+    WorkOrder: ({'description', 'customer', 'instrument', 'created_by'},
+                [(WorkOrder, 'pk'), (ServiceReport, 'work_order')]),
+    ServiceReport: ({'work_order', 'created_by'}, [(ServiceReport, 'pk')]),
+    Customer: ({'name'}, [(WorkOrder, 'customer'), (ServiceReport, 'work_order__customer')]),
+    Instrument: ({'serial_number'}, [(WorkOrder, 'instrument'), (ServiceReport, 'work_order__instrument')]),
+    User: ({'username', 'first_name', 'last_name'},
+           [(WorkOrder, 'created_by'), (ServiceReport, 'created_by')]),
+}
+
+@receiver(post_save, sender=WorkOrder)
+@receiver(post_save, sender=ServiceReport)
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Instrument)
+@receiver(post_save, sender=User)
+def refresh_dependent_search_vectors(sender, instance, created, update_fields=None, **kwargs):
+    """Rebuild the search documents that include the saved row"""
+    fields, dependents = SEARCH_SOURCES[sender]
+    if update_fields is not None and not fields & set(update_fields):
+        return
+    if created and sender not in (WorkOrder, ServiceReport):
+        return
+    for model, lookup in dependents:
+        refresh_search_vectors(model.objects.filter(**{lookup: instance.pk}))
@@ -0,0 +1,77 @@
+"""Minimal model rows for the focused tests; the page budgets seed with
+service.utils.synthetic instead.
+"""
+from datetime import date, timedelta
+from itertools import count
+from django.contrib.auth.models import Group, User
+from service.models import (
+    Customer,
+    Entitlement,
+    EntitlementType,
+    Instrument,
+    InstrumentType,
+    ServiceAgreement,
+    ServiceReport,
+    WorkOrder,
+)
+
+_sequence = count(1)
+
+def make_user(username=None, manager=False, **fields):
+    user = User.objects.create_user(username or f'user{next(_sequence)}', **fields)
+    if manager:
+        user.groups.add(Group.objects.get_or_create(name='Manager')[0])
+    return user
+
+def make_customer(name=None, **fields):
+    return Customer.objects.create(
+        name=name or f'Customer {next(_sequence)}', address='1 Test Street', **fields,
+    )
+
+def make_instrument(customer=None, serial_number=None, **fields):
+    instrument_type = fields.pop('instrument_type', None) or InstrumentType.objects.get_or_create(name='Analyzer')[0]
+    return Instrument.objects.create(
+        customer=customer or make_customer(),
+        instrument_type=instrument_type,
+        serial_number=serial_number or f'SN-{next(_sequence):06d}',
+        installation_date=date(2025, 1, 1),
+        **fields,
+    )
+
+def make_entitlement(instrument=None, total=2, **fields):
+    instrument = instrument or make_instrument()
+    today = date.today()
+    agreement = fields.pop('agreement', None) or ServiceAgreement.objects.create(
+        customer=instrument.customer,
+        start_date=today - timedelta(days=30),
+        end_date=today + timedelta(days=335),
+        status=ServiceAgreement.STATUS_ACTIVE,
+    )
+    entitlement_type = fields.pop('entitlement_type', None) or EntitlementType.objects.get_or_create(name='Preventive')[0]
+    return Entitlement.objects.create(
+        agreement=agreement, instrument=instrument, entitlement_type=entitlement_type,
+        total=total, **fields,
+    )
+
+def make_work_order(instrument=None, created_by=None, **fields):
+    entitlement = fields.get('entitlement')
+    instrument = instrument or (entitlement.instrument if entitlement else make_instrument())
+    if entitlement and 'status' not in fields:
+        fields['status'] = WorkOrder.STATUS_OPEN
+    return WorkOrder.objects.create(
+        customer=instrument.customer,
+        instrument=instrument,
+        created_by=created_by or make_user(),
+        **fields,
+    )
+
+def make_report(work_order, created_by=None, **fields):
+    fields.setdefault('approval_status', ServiceReport.STATUS_APPROVED)
+    return ServiceReport.objects.create(
+        work_order=work_order,
+        created_by=created_by or work_order.created_by,
+        service_date=date.today(),
+        findings='Checked',
+        actions_taken='Calibrated',
+        **fields,
+    )
@@ -0,0 +1,40 @@
+from datetime import date, timedelta
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from service.admin.dashboard import compute_admin_stats, get_admin_stats
+from service.models import ServiceAgreement, ServiceReport
+from service.tests.factories import make_entitlement, make_report, make_work_order
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class DashboardStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        today = date.today()
+        entitlement = make_entitlement(agreement=None)
+        ServiceAgreement.objects.filter(pk=entitlement.agreement_id).update(end_date=today + timedelta(days=10))
+        cls.open = make_work_order(entitlement=entitlement)
+        make_report(cls.open)
+        make_report(cls.open, approval_status=ServiceReport.STATUS_AWAITING)
+        cls.draft = make_work_order()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_counts(self):
+        with self.assertNumQueries(7):
+            stats = compute_admin_stats()
+
+        self.assertEqual(stats['work_orders'], {'open': 1, 'in_progress': 0, 'recent': 2, 'total': 2})
+        self.assertEqual(stats['service_reports'], {'pending': 1, 'recent': 2, 'approved': 1, 'rejected': 0})
+        self.assertEqual(stats['agreements'], {'active': 1, 'expiring_soon': 1, 'expired': 0})
+        self.assertEqual([wo.pk for wo in stats['recent_work_orders']], [self.draft.pk, self.open.pk])
+        self.assertEqual(len(stats['recent_reports']), 2)
+        self.assertEqual((stats['total_customers'], stats['total_instruments']), (2, 2))
+
+    def test_cached_until_a_counted_model_changes(self):
+        get_admin_stats(None)
+        with self.assertNumQueries(0):
+            get_admin_stats(None)
+
+        make_work_order()
+        self.assertEqual(get_admin_stats(None)['work_orders']['total'], 3)
@@ -0,0 +1,56 @@
+import csv
+import gzip
+import io
+import json
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from service.models import WorkOrder
+from service.tests.factories import make_entitlement, make_instrument, make_work_order
+
+class WorkOrderExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('export-admin', 'export@example.com', 'password')
+        cls.open = make_work_order(entitlement=make_entitlement(make_instrument(serial_number='EXP-1')),
+                                   description='Open, with "quotes"')
+        cls.draft = make_work_order(make_instrument(serial_number='EXP-2'), description='Draft')
+        cls.url = reverse('admin:service_workorder_export')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def export(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def test_csv_follows_the_changelist_filters(self):
+        response, body = self.export(status__exact=WorkOrder.STATUS_OPEN)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertIn('attachment; filename="workorder-', response['Content-Disposition'])
+
+        rows = list(csv.DictReader(io.StringIO(body.decode())))
+        self.assertEqual([(row['WO #'], row['Serial Number'], row['Description']) for row in rows],
+                         [(str(self.open.pk), 'EXP-1', 'Open, with "quotes"')])
+
+    def test_jsonl_has_one_object_per_row(self):
+        _, body = self.export(_format='jsonl')
+        records = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual({record['id'] for record in records}, {self.open.pk, self.draft.pk})
+        self.assertEqual(records[0]['instrument__serial_number'][:4], 'EXP-')
+
+    def test_gzip_decompresses_to_the_plain_export(self):
+        response, body = self.export(_gzip='1')
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertTrue(response['Content-Disposition'].endswith('.csv.gz"'))
+        self.assertEqual(len(gzip.decompress(body).decode().splitlines()), 3)
+
+    def test_action_exports_only_the_selected_rows(self):
+        response = self.client.post(reverse('admin:service_workorder_changelist'), {
+            'action': 'export_as_csv',
+            '_selected_action': [self.draft.pk],
+        })
+        rows = list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([row[0] for row in rows[1:]], [str(self.draft.pk)])
@@ -0,0 +1,70 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+from service.tests.factories import make_customer, make_instrument, make_report, make_work_order
+
+class OptionListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('options-admin', 'options@example.com', 'password')
+        cls.customer = make_customer()
+        cls.instruments = [make_instrument(cls.customer, serial_number=f'OPT-{n}') for n in (3, 1, 2)]
+        make_instrument(serial_number='OPT-0')
+        cls.url = reverse('admin_option_list', args=['instruments'])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def page(self, **params):
+        response = self.client.get(self.url, {'customer': self.customer.pk, **params})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_cursor_pages_through_the_customer_instruments_in_order(self):
+        first = self.page(limit=2).json()
+        second = self.page(limit=2, cursor=first['next']).json()
+
+        serials = [option['serial_number'] for option in first['results'] + second['results']]
+        self.assertEqual(serials, ['OPT-1', 'OPT-2', 'OPT-3'])
+        self.assertIsNone(second['next'])
+
+    def test_matching_etag_gets_a_304_until_a_label_changes(self):
+        etag = self.page()['ETag']
+        response = self.client.get(self.url, {'customer': self.customer.pk}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        instrument = self.instruments[0]
+        instrument.serial_number = 'OPT-9'
+        with self.captureOnCommitCallbacks(execute=True):
+            instrument.save()
+        response = self.client.get(self.url, {'customer': self.customer.pk}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('OPT-9', [option['serial_number'] for option in response.json()['results']])
+
+    def test_unknown_source_is_a_404(self):
+        response = self.client.get(reverse('admin_option_list', args=['nothing']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_batch_lookup_labels_known_ids_only(self):
+        instrument = self.instruments[0]
+        response = self.client.get(reverse('admin_get_model_options'), {
+            'instrument': f'{instrument.pk},999999',
+            'customer': str(self.customer.pk),
+        })
+        self.assertEqual(response.json(), {
+            'instrument': {str(instrument.pk): {'value': str(instrument.pk), 'label': str(instrument)}},
+            'customer': {str(self.customer.pk): {'value': str(self.customer.pk), 'label': self.customer.name}},
+        })
+
+    def test_report_labels_follow_their_instrument(self):
+        instrument = self.instruments[0]
+        report = make_report(make_work_order(instrument))
+        url = reverse('admin_get_model_options')
+        label = self.client.get(url, {'servicereport': report.pk}).json()['servicereport'][str(report.pk)]['label']
+        self.assertIn(instrument.serial_number, label)
+
+        instrument.serial_number = 'OPT-8'
+        with self.captureOnCommitCallbacks(execute=True):
+            instrument.save()
+        label = self.client.get(url, {'servicereport': report.pk}).json()['servicereport'][str(report.pk)]['label']
+        self.assertIn('OPT-8', label)
@@ -0,0 +1,138 @@
+"""Query-count and latency budgets for the admin pages.
+
+Each page is rendered against a small synthetic dataset, then again after
+a much larger one has been added: the query count must stay within its
+budget and must not grow with the data, which is what an N+1 in
+service/admin/*.py looks like.
+
+Render times depend on the machine, so comparing them with
+perf_baseline.json is opt-in: run with PERF_TIMINGS=1 on a quiet machine,
+or with PERF_BASELINE_UPDATE=1 to rewrite the baseline after an
+intentional change.
+"""
+import json
+import os
+import statistics
+import time
+import unittest
+from datetime import date
+from pathlib import Path
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from service.db.routers import PIN_COOKIE
+from service.models import Customer, Instrument, ServiceAgreement, ServiceReport, WorkOrder
+from service.utils.synthetic import SyntheticDataGenerator
+
+ANCHOR = date(2026, 1, 1)
+BASELINE_PATH = Path(__file__).with_name('perf_baseline.json')
+
+# Maximum queries per page, session and user lookups included
+QUERY_BUDGETS = {
+    'index': 9,
+    'customer_changelist': 5,
+    'serviceagreement_changelist': 7,
+    'workorder_changelist': 7,
+    'servicereport_changelist': 7,
+    'instrument_changelist': 10,
+    'customer_change': 15,
+    'serviceagreement_change': 18,
+    'workorder_change': 11,
+    'workorder_add': 9,
+    'servicereport_change': 8,
+    'instrument_change': 9,
+}
+
+# A page may take this many times its baseline, plus the slack, before failing
+TIMING_TOLERANCE = 3.0
+TIMING_SLACK_MS = 50
+TIMING_RUNS = 3
+
+def seed(seed, customers):
+    SyntheticDataGenerator(seed=seed, anchor=ANCHOR, max_instruments=40).run(customers)
+
+def largest(queryset, relation):
+    """The object with the most related rows, so its page grows with the data"""
+    return queryset.annotate(size=Count(relation)).order_by('-size', 'pk').first()
+
+def admin_pages():
+    customer = largest(Customer.objects, 'instruments')
+    agreement = largest(ServiceAgreement.objects, 'entitlements__workorders')
+    work_order = largest(WorkOrder.objects.filter(status=WorkOrder.STATUS_COMPLETED), 'service_reports')
+    report = ServiceReport.objects.filter(approval_status=ServiceReport.STATUS_APPROVED).order_by('pk').first()
+    instrument = largest(Instrument.objects, 'entitlements')
+
+    pages = {'index': reverse('admin:index')}
+    for model in ('customer', 'serviceagreement', 'workorder', 'servicereport', 'instrument'):
+        pages[f'{model}_changelist'] = reverse(f'admin:service_{model}_changelist')
+    for obj in (customer, agreement, work_order, report, instrument):
+        name = obj._meta.model_name
+        pages[f'{name}_change'] = reverse(f'admin:service_{name}_change', args=[obj.pk])
+    pages['workorder_add'] = reverse('admin:service_workorder_add')
+    return pages
+
+# Budgets cover the pages' own queries, not those of a database cache backend
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AdminPageBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('perf-admin', 'perf@example.com', 'password')
+        seed(1, 5)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        # Keep every read on the primary so a configured replica cannot hide queries
+        self.client.cookies[PIN_COOKIE] = '1'
+
+    def render(self, url):
+        """Render `url` with cold caches; return (query count, elapsed ms)"""
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = self.client.get(url)
+            elapsed = (time.perf_counter() - started) * 1000
+        self.assertEqual(response.status_code, 200, url)
+        return len(queries), elapsed
+
+    def test_query_counts_stay_within_budget_as_data_grows(self):
+        small = {name: self.render(url)[0] for name, url in admin_pages().items()}
+        seed(2, 40)
+        large = {name: self.render(url)[0] for name, url in admin_pages().items()}
+
+        self.assertEqual(set(large), set(QUERY_BUDGETS))
+        for name, budget in QUERY_BUDGETS.items():
+            with self.subTest(page=name):
+                self.assertLessEqual(large[name], budget)
+                self.assertLessEqual(
+                    large[name], small[name],
+                    f'{name} went from {small[name]} to {large[name]} queries with more rows',
+                )
+
+    @unittest.skipUnless(
+        os.environ.get('PERF_TIMINGS') or os.environ.get('PERF_BASELINE_UPDATE'),
+        'set PERF_TIMINGS=1 to compare render times with the baseline',
+    )
+    def test_render_times_within_baseline(self):
+        timings = {}
+        for name, url in admin_pages().items():
+            timings[name] = round(statistics.median(
+                self.render(url)[1] for _ in range(TIMING_RUNS)
+            ), 1)
+
+        if os.environ.get('PERF_BASELINE_UPDATE'):
+            BASELINE_PATH.write_text(json.dumps(timings, indent=2, sort_keys=True) + '\n')
+            return
+
+        baseline = json.loads(BASELINE_PATH.read_text())
+        for name, elapsed in timings.items():
+            with self.subTest(page=name):
+                self.assertIn(name, baseline, 'Page missing from the baseline; set PERF_BASELINE_UPDATE=1')
+                limit = baseline[name] * TIMING_TOLERANCE + TIMING_SLACK_MS
+                self.assertLessEqual(
+                    elapsed, limit,
+                    f'{name} took {elapsed}ms against a {baseline[name]}ms baseline',
+                )
@@ -0,0 +1,90 @@
+import warnings
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from service.db.routers import (
+    PIN_COOKIE,
+    REPLICA_ALIAS,
+    ReplicaRouter,
+    pinned_to_primary,
+    read_alias,
+    replica_reads,
+)
+from service.middleware.replica_pinning import PrimaryPinningMiddleware
+from service.models import WorkOrder
+from service.utils.cache_tags import get_or_set_tagged
+
+@contextmanager
+def replica_configured():
+    """Declare a replica alias; nothing here connects to it"""
+    databases = {**settings.DATABASES, REPLICA_ALIAS: settings.DATABASES['default']}
+    with warnings.catch_warnings():
+        warnings.filterwarnings('ignore', 'Overriding setting DATABASES')
+        with override_settings(DATABASES=databases):
+            yield
+
+class _CacheEntry:
+    class _meta:
+        app_label = 'django_cache'
+
+class ReplicaRouterTests(SimpleTestCase):
+    def test_reads_reach_the_replica_only_where_code_opts_in(self):
+        router = ReplicaRouter()
+        with replica_configured():
+            self.assertEqual(router.db_for_read(WorkOrder), 'default')
+            with replica_reads():
+                self.assertEqual(router.db_for_read(WorkOrder), REPLICA_ALIAS)
+                self.assertEqual(router.db_for_read(_CacheEntry), 'default')
+                self.assertEqual(router.db_for_write(WorkOrder), 'default')
+                with pinned_to_primary():
+                    self.assertEqual(router.db_for_read(WorkOrder), 'default')
+
+    def test_read_alias_falls_back_to_the_primary_without_a_replica(self):
+        self.assertEqual(read_alias(), 'default')
+        with replica_configured():
+            self.assertEqual(read_alias(), REPLICA_ALIAS)
+
+class PrimaryPinningMiddlewareTests(SimpleTestCase):
+    def run_request(self, request, status=200):
+        """Return (read alias seen by the view, response)"""
+        seen = []
+
+        def view(request):
+            seen.append(read_alias())
+            return HttpResponse(status=status)
+
+        with replica_configured():
+            response = PrimaryPinningMiddleware(view)(request)
+        return seen[0], response
+
+    def test_reads_use_the_replica_until_the_browser_writes(self):
+        alias, response = self.run_request(RequestFactory().get('/'))
+        self.assertEqual(alias, REPLICA_ALIAS)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+        alias, response = self.run_request(RequestFactory().post('/'))
+        self.assertEqual(alias, 'default')
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], settings.REPLICA_PIN_SECONDS)
+
+        request = RequestFactory().get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(self.run_request(request)[0], 'default')
+
+    def test_failed_writes_do_not_pin(self):
+        alias, response = self.run_request(RequestFactory().post('/'), status=400)
+        self.assertEqual(alias, 'default')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_unused_without_a_replica(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            PrimaryPinningMiddleware(lambda request: HttpResponse())
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ReplicaCacheTests(SimpleTestCase):
+    def test_pinned_requests_never_get_entries_built_from_the_replica(self):
+        with replica_configured():
+            self.assertEqual(get_or_set_tagged('panel', ['customer:1'], read_alias, 300), REPLICA_ALIAS)
+            with pinned_to_primary():
+                self.assertEqual(get_or_set_tagged('panel', ['customer:1'], read_alias, 300), 'default')
@@ -0,0 +1,48 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from service.tests.factories import make_entitlement, make_instrument, make_report, make_work_order
+
+class AdminSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('search-admin', 'search@example.com', 'password')
+        cls.instrument = make_instrument(serial_number='ABC12345')
+        cls.entitlement = make_entitlement(cls.instrument)
+        cls.work_order = make_work_order(entitlement=cls.entitlement, description='Replace pump seal')
+        cls.report = make_report(cls.work_order)
+        cls.other = make_work_order(make_instrument(serial_number='XYZ99999'), description='Annual check')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def search(self, model, term):
+        response = self.client.get(reverse(f'admin:service_{model}_changelist'), {'q': term})
+        self.assertEqual(response.status_code, 200)
+        return {obj.pk for obj in response.context['cl'].result_list}
+
+    def test_serial_number_substring_matches(self):
+        self.assertEqual(self.search('workorder', '12345'), {self.work_order.pk})
+        self.assertEqual(self.search('servicereport', 'C1234'), {self.report.pk})
+
+    def test_every_word_must_match(self):
+        self.assertEqual(self.search('workorder', 'ABC12345 pump'), {self.work_order.pk})
+        self.assertEqual(self.search('workorder', 'ABC12345 annual'), set())
+
+    def test_description_words_match_by_prefix(self):
+        self.assertEqual(self.search('workorder', 'pum sea'), {self.work_order.pk})
+
+    def test_description_substrings_match_only_off_postgresql(self):
+        # The search_vector matches word prefixes; other databases use icontains
+        expected = set() if connection.vendor == 'postgresql' else {self.work_order.pk}
+        self.assertEqual(self.search('workorder', 'ump'), expected)
+
+    def test_id_tokens_resolve_to_primary_keys(self):
+        self.assertEqual(self.search('workorder', f'WO-{self.other.pk}'), {self.other.pk})
+        self.assertEqual(self.search('servicereport', f'sr{self.report.pk}'), {self.report.pk})
+        self.assertEqual(self.search('servicereport', f'WO-{self.work_order.pk}'), {self.report.pk})
+        self.assertEqual(
+            {self.entitlement.agreement_id},
+            self.search('serviceagreement', f'SA-{self.entitlement.agreement_id}'),
+        )
@@ -0,0 +1,38 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from service.middleware.server_timing import ServerTimingMiddleware
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+                   SERVER_TIMING=True)
+class ServerTimingTests(SimpleTestCase):
+    def view(self, request):
+        cache.set('present', 1)
+        cache.get('present')
+        cache.get('absent')
+        cache.get_many(['present', 'absent'])
+        return HttpResponse()
+
+    def test_staff_get_a_header_counting_cache_lookups(self):
+        request = RequestFactory().get('/')
+        request.user = User(is_staff=True)
+        with self.assertLogs('service.timing'):
+            response = ServerTimingMiddleware(self.view)(request)
+        self.assertIn('cache;desc="2 hits, 2 misses"', response['Server-Timing'])
+
+    def test_only_the_cache_instance_is_wrapped(self):
+        request = RequestFactory().get('/')
+        request.user = User()
+        with self.assertLogs('service.timing'):
+            response = ServerTimingMiddleware(self.view)(request)
+        self.assertNotIn('Server-Timing', response)
+        self.assertTrue(hasattr(caches['default'].get, '__wrapped__'))
+        self.assertFalse(hasattr(LocMemCache.get, '__wrapped__'))
+
+    @override_settings(SERVER_TIMING=False, PROMETHEUS_METRICS=False)
+    def test_unused_when_switched_off(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ServerTimingMiddleware(self.view)
@@ -0,0 +1,38 @@
+from django.contrib.auth.models import Group, User
+from django.test import TestCase
+from django.urls import reverse
+from service.models import WorkOrder
+from service.tests.factories import make_entitlement, make_report, make_work_order
+
+class MarkCompletedActionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser('actions-admin', 'actions@example.com', 'password')
+        cls.user.groups.add(Group.objects.get_or_create(name='Manager')[0])
+        entitlement = make_entitlement(total=1)
+        cls.first = make_work_order(entitlement=entitlement)
+        cls.second = make_work_order(entitlement=entitlement)
+        for work_order in (cls.first, cls.second):
+            make_report(work_order)
+        cls.draft = make_work_order()
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_completes_what_validates_and_reports_the_rest(self):
+        response = self.client.post(reverse('admin:service_workorder_changelist'), {
+            'action': 'mark_completed',
+            '_selected_action': [self.first.pk, self.second.pk, self.draft.pk],
+        }, follow=True)
+
+        statuses = dict(WorkOrder.objects.values_list('pk', 'status'))
+        self.assertEqual(statuses[self.first.pk], WorkOrder.STATUS_COMPLETED)
+        self.assertEqual(statuses[self.second.pk], WorkOrder.STATUS_OPEN)
+        self.assertEqual(statuses[self.draft.pk], WorkOrder.STATUS_DRAFT)
+
+        messages = [str(message) for message in response.context['messages']]
+        self.assertIn('Marked 1 work orders as completed.', messages)
+        self.assertTrue(any(m.startswith(f'WO-{self.second.pk}') and 'No remaining entitlements' in m
+                            for m in messages))
+        self.assertTrue(any(m.startswith(f'WO-{self.draft.pk}') and 'must have an entitlement' in m
+                            for m in messages))
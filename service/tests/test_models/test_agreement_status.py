@@ -0,0 +1,81 @@
+import io
+from datetime import date, timedelta
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from service.models import AgreementStatusEvent, ServiceAgreement
+from service.tests.factories import make_customer
+from service.utils.cache_tags import model_tag, tag_stamp
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AgreementStatusTransitionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.customer = make_customer()
+        today = date.today()
+        past, future = today - timedelta(days=30), today + timedelta(days=30)
+        # bulk_create skips the pre_save signal, leaving the stored statuses stale
+        self.agreements = ServiceAgreement.objects.bulk_create([
+            self.agreement(ServiceAgreement.STATUS_ACTIVE, past - timedelta(days=30), past),
+            self.agreement(ServiceAgreement.STATUS_CANCELLED, past - timedelta(days=30), past),
+            self.agreement(ServiceAgreement.STATUS_EXPIRED, past, future),
+            self.agreement(ServiceAgreement.STATUS_ACTIVE, past, future),
+            self.agreement(ServiceAgreement.STATUS_EXPIRED, future, future + timedelta(days=30)),
+            self.agreement(ServiceAgreement.STATUS_DRAFT, past - timedelta(days=30), past),
+        ])
+
+    def agreement(self, status, start_date, end_date):
+        return ServiceAgreement(customer=self.customer, status=status,
+                                start_date=start_date, end_date=end_date)
+
+    def test_matches_update_status(self):
+        expected = {}
+        for agreement in self.agreements:
+            agreement.update_status()
+            expected[agreement.pk] = agreement.status
+
+        ServiceAgreement.apply_status_transitions()
+        self.assertEqual(dict(ServiceAgreement.objects.values_list('pk', 'status')), expected)
+
+    def test_dry_run_reports_the_counts_then_applied(self):
+        out = io.StringIO()
+        call_command('update_agreement_statuses', dry_run=True, stdout=out)
+        self.assertIn('cancelled -> expired: 1', out.getvalue())
+        self.assertIn('3 agreements would be updated', out.getvalue())
+        self.assertFalse(AgreementStatusEvent.objects.exists())
+
+        counts = ServiceAgreement.apply_status_transitions()
+        self.assertEqual(counts, {ServiceAgreement.STATUS_EXPIRED: 2, ServiceAgreement.STATUS_ACTIVE: 1})
+        self.assertEqual(ServiceAgreement.apply_status_transitions(),
+                         {ServiceAgreement.STATUS_EXPIRED: 0, ServiceAgreement.STATUS_ACTIVE: 0})
+
+    def test_records_an_event_per_changed_agreement(self):
+        ServiceAgreement.apply_status_transitions()
+        events = AgreementStatusEvent.objects.values_list('agreement', 'from_status', 'to_status')
+        self.assertEqual(set(events), {
+            (self.agreements[0].pk, ServiceAgreement.STATUS_ACTIVE, ServiceAgreement.STATUS_EXPIRED),
+            (self.agreements[1].pk, ServiceAgreement.STATUS_CANCELLED, ServiceAgreement.STATUS_EXPIRED),
+            (self.agreements[2].pk, ServiceAgreement.STATUS_EXPIRED, ServiceAgreement.STATUS_ACTIVE),
+        })
+
+    def test_refreshes_the_customer_summary(self):
+        ServiceAgreement.apply_status_transitions()
+        self.customer.refresh_from_db()
+        self.assertTrue(self.customer.has_active_agreement)
+
+    def test_cached_agreement_data_expires_on_commit(self):
+        stamp = tag_stamp([model_tag(ServiceAgreement)])
+        with self.captureOnCommitCallbacks() as callbacks:
+            ServiceAgreement.apply_status_transitions()
+        self.assertEqual(len(callbacks), 1)
+        before_commit = tag_stamp([model_tag(ServiceAgreement)])
+        self.assertNotEqual(before_commit, stamp)
+        callbacks[0]()
+        self.assertNotEqual(tag_stamp([model_tag(ServiceAgreement)]), before_commit)
+
+    def test_nothing_to_change_expires_nothing(self):
+        ServiceAgreement.apply_status_transitions()
+        stamp = tag_stamp([model_tag(ServiceAgreement)])
+        with self.captureOnCommitCallbacks(execute=True):
+            ServiceAgreement.apply_status_transitions()
+        self.assertEqual(tag_stamp([model_tag(ServiceAgreement)]), stamp)
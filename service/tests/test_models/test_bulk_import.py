@@ -0,0 +1,71 @@
+import io
+from django.test import TestCase, TransactionTestCase, override_settings
+from service.models import Customer, Entitlement
+from service.tests.factories import make_entitlement
+from service.utils.bulk_import import bulk_import
+from service.utils.cache_tags import model_tag, tag_stamp
+
+def csv_stream(*lines):
+    return io.StringIO('\n'.join(lines) + '\n')
+
+class BulkImportTests(TestCase):
+    def test_creates_then_updates_by_natural_key(self):
+        stats = bulk_import('customers', csv_stream('name,address', 'Acme,1 Road', 'Globex,2 Road'))
+        self.assertEqual((stats.created, stats.updated, stats.failed), (2, 0, 0))
+
+        stats = bulk_import('customers', csv_stream('name,address', 'Acme,9 Road', 'Globex,2 Road'))
+        self.assertEqual((stats.created, stats.updated, stats.unchanged), (0, 1, 1))
+        self.assertEqual(Customer.objects.get(name='Acme').address, '9 Road')
+
+    def test_invalid_rows_are_reported_and_the_rest_imported(self):
+        records = io.StringIO('{"name": "Acme", "address": "x"}\nnot json\n{"address": "x"}\n')
+        stats = bulk_import('customers', records, fmt='jsonl')
+        self.assertEqual(stats.created, 1)
+        self.assertEqual([line for line, _ in stats.errors], [2, 3])
+
+    def test_json_values_that_are_not_objects_are_invalid_records(self):
+        records = io.StringIO('[1, 2]\n"Acme"\n{"name": "Acme", "address": "x"}\n')
+        stats = bulk_import('customers', records, fmt='jsonl')
+        self.assertEqual(stats.created, 1)
+        self.assertEqual(stats.errors, [(1, 'Invalid JSON record'), (2, 'Invalid JSON record')])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_dry_run_writes_nothing(self):
+        stamp = tag_stamp([model_tag(Customer)])
+        stats = bulk_import('customers', csv_stream('name,address', 'Acme,1 Road'), dry_run=True)
+        self.assertEqual(stats.created, 1)
+        self.assertFalse(Customer.objects.exists())
+        self.assertEqual(tag_stamp([model_tag(Customer)]), stamp)
+
+    def test_chunk_rejected_by_the_database_is_rolled_back_alone(self):
+        overdrawn = make_entitlement(total=3)
+        Entitlement.objects.filter(pk=overdrawn.pk).update(used_count=3)
+        other = make_entitlement(total=3)
+        for entitlement in (overdrawn, other):
+            entitlement.agreement.po_number = f'PO-{entitlement.pk}'
+            entitlement.agreement.save()
+
+        rows = [
+            f'{e.instrument.serial_number},PO-{e.pk},{e.entitlement_type.name},{total}'
+            for e, total in ((overdrawn, 1), (other, 5))
+        ]
+        stats = bulk_import(
+            'entitlements',
+            csv_stream('serial_number,po_number,entitlement_type,total', *rows),
+            chunk_size=1,
+        )
+        self.assertEqual((stats.updated, stats.failed), (1, 1))
+        self.assertIn('rejected by the database', stats.errors[0][1])
+        overdrawn.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((overdrawn.total, other.total), (3, 5))
+
+class BulkImportTransactionTests(TransactionTestCase):
+    def test_chunks_already_written_survive_a_later_failure(self):
+        def lines():
+            yield '{"name": "Acme", "address": "x"}\n'
+            raise OSError('connection reset')
+
+        with self.assertRaises(OSError):
+            bulk_import('customers', lines(), fmt='jsonl', chunk_size=1)
+        self.assertTrue(Customer.objects.filter(name='Acme').exists())
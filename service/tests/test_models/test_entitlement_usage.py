@@ -0,0 +1,68 @@
+from django.core.exceptions import ValidationError
+from django.test import TestCase
+from service.models import Entitlement, WorkOrder
+from service.tests.factories import make_entitlement, make_report, make_work_order
+
+def complete(work_order):
+    make_report(work_order)
+    work_order.status = WorkOrder.STATUS_COMPLETED
+    work_order.save()
+
+class EntitlementUsageTests(TestCase):
+    def setUp(self):
+        self.entitlement = make_entitlement(total=1)
+
+    def used(self, entitlement=None):
+        entitlement = entitlement or self.entitlement
+        entitlement.refresh_from_db(fields=['used_count'])
+        return entitlement.used_count
+
+    def test_completing_draws_a_visit_and_reopening_returns_it(self):
+        work_order = make_work_order(entitlement=self.entitlement)
+        self.assertEqual(self.used(), 0)
+
+        complete(work_order)
+        self.assertEqual(self.used(), 1)
+
+        work_order.status = WorkOrder.STATUS_IN_PROGRESS
+        work_order.save()
+        self.assertEqual(self.used(), 0)
+
+    def test_saving_a_completed_work_order_again_draws_nothing(self):
+        work_order = make_work_order(entitlement=self.entitlement)
+        complete(work_order)
+        work_order = WorkOrder.objects.get(pk=work_order.pk)
+        work_order.description = 'Follow-up notes'
+        work_order.save()
+        self.assertEqual(self.used(), 1)
+
+    def test_reassigning_moves_the_visit(self):
+        other = make_entitlement(self.entitlement.instrument, agreement=self.entitlement.agreement)
+        work_order = make_work_order(entitlement=self.entitlement)
+        complete(work_order)
+
+        work_order.entitlement = other
+        work_order.save()
+        self.assertEqual((self.used(), self.used(other)), (0, 1))
+
+    def test_deleting_a_completed_work_order_returns_the_visit(self):
+        work_order = make_work_order(entitlement=self.entitlement)
+        complete(work_order)
+        work_order.delete()
+        self.assertEqual(self.used(), 0)
+
+    def test_completion_is_rejected_once_no_visits_remain(self):
+        complete(make_work_order(entitlement=self.entitlement))
+        work_order = make_work_order(entitlement=self.entitlement)
+
+        with self.assertRaisesMessage(ValidationError, 'No remaining entitlements available'):
+            complete(work_order)
+        self.assertEqual(self.used(), 1)
+        self.assertEqual(WorkOrder.objects.get(pk=work_order.pk).status, WorkOrder.STATUS_OPEN)
+
+    def test_consume_and_release_stay_within_bounds(self):
+        self.assertTrue(Entitlement.consume(self.entitlement.pk))
+        self.assertFalse(Entitlement.consume(self.entitlement.pk))
+        self.assertTrue(Entitlement.release(self.entitlement.pk))
+        self.assertFalse(Entitlement.release(self.entitlement.pk))
+        self.assertEqual(self.used(), 0)
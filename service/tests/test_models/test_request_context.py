@@ -0,0 +1,21 @@
+from django.test import TestCase
+from service.middleware.current_user import get_current_user
+from service.models.workorder import is_manager
+from service.tests.factories import make_user
+from service.tests.test_models.test_work_order_validation import in_request
+
+class RequestContextTests(TestCase):
+    def test_current_user_is_set_only_during_the_request(self):
+        user = make_user()
+        self.assertEqual(in_request(user, get_current_user), user)
+        self.assertIsNone(get_current_user())
+
+    def test_group_membership_is_read_once_per_request(self):
+        manager = make_user(manager=True)
+        with self.assertNumQueries(1):
+            checks = in_request(manager, lambda: [is_manager(manager) for _ in range(3)])
+        self.assertEqual(checks, [True, True, True])
+
+    def test_other_users_are_not_answered_from_the_context(self):
+        manager, other = make_user(manager=True), make_user()
+        self.assertFalse(in_request(manager, lambda: is_manager(other)))
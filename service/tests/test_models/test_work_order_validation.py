@@ -0,0 +1,70 @@
+from django.core.exceptions import ValidationError
+from django.test import RequestFactory, TestCase
+from service.middleware.current_user import CurrentUserMiddleware
+from service.models import ServiceReport, WorkOrder
+from service.tests.factories import make_entitlement, make_report, make_user, make_work_order
+
+def in_request(user, func):
+    """Run func() the way a view would, inside `user`'s request context"""
+    request = RequestFactory().get('/')
+    request.user = user
+    return CurrentUserMiddleware(lambda request: func())(request)
+
+class WorkOrderValidationTests(TestCase):
+    def setUp(self):
+        self.entitlement = make_entitlement(total=1)
+        self.work_order = make_work_order(entitlement=self.entitlement)
+        make_report(self.work_order)
+        self.work_order.status = WorkOrder.STATUS_COMPLETED
+
+    def test_leaving_draft_requires_an_entitlement(self):
+        work_order = make_work_order()
+        work_order.status = WorkOrder.STATUS_OPEN
+        with self.assertRaisesMessage(ValidationError, 'must have an entitlement'):
+            work_order.clean()
+
+    def test_completion_requires_approved_reports(self):
+        work_order = make_work_order(entitlement=self.entitlement)
+        work_order.status = WorkOrder.STATUS_COMPLETED
+        with self.assertRaisesMessage(ValidationError, 'without at least one service report'):
+            work_order.clean()
+
+        make_report(work_order, approval_status=ServiceReport.STATUS_AWAITING)
+        with self.assertRaisesMessage(ValidationError, 'until all service reports are approved'):
+            work_order.clean()
+
+    def test_completion_against_a_missing_entitlement_is_invalid(self):
+        self.work_order.entitlement_id = 999999
+        with self.assertRaisesMessage(ValidationError, 'no longer exists'):
+            self.work_order.clean()
+
+    def test_completion_is_checked_with_one_query_and_only_once(self):
+        with self.assertNumQueries(1):
+            self.work_order.clean()
+        with self.assertNumQueries(0):
+            self.work_order.clean()
+
+    def test_only_managers_complete_within_a_request(self):
+        with self.assertRaisesMessage(ValidationError, 'Only managers'):
+            in_request(make_user(), self.work_order.clean)
+        in_request(make_user(manager=True), self.work_order.clean)
+
+    def test_batch_counts_visits_drawn_earlier_in_the_batch(self):
+        second = make_work_order(entitlement=self.entitlement)
+        make_report(second)
+        second.status = WorkOrder.STATUS_COMPLETED
+
+        with self.assertNumQueries(2):
+            errors = WorkOrder.validate_batch([self.work_order, second])
+        self.assertEqual([wo for wo, _ in errors], [second])
+        self.assertIn('No remaining entitlements', str(errors[0][1]))
+
+    def test_batch_rejects_completion_by_non_managers(self):
+        draft = make_work_order()
+        errors = WorkOrder.validate_batch([self.work_order, draft], user=make_user())
+        self.assertEqual([wo for wo, _ in errors], [self.work_order])
+
+    def test_batch_rejects_a_missing_entitlement(self):
+        self.work_order.entitlement_id = 999999
+        errors = WorkOrder.validate_batch([self.work_order])
+        self.assertIn('no longer exists', str(errors[0][1]))
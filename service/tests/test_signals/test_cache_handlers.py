@@ -0,0 +1,82 @@
+import io
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from service.models import Customer
+from service.tests.factories import make_customer, make_instrument, make_user, make_work_order
+from service.utils.cache_tags import customer_tag, invalidate_model, model_tag, tag_stamp
+from service.utils.reference_data import user_choices
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TagInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.work_order = make_work_order()
+        self.customer = self.work_order.customer
+        self.other = make_customer()
+
+    def stamps(self):
+        return tag_stamp([customer_tag(self.customer.pk)]), tag_stamp([customer_tag(self.other.pk)])
+
+    def test_saving_a_row_expires_its_customer_only(self):
+        mine, theirs = self.stamps()
+        self.work_order.description = 'Updated'
+        self.work_order.save()
+        self.assertNotEqual(self.stamps()[0], mine)
+        self.assertEqual(self.stamps()[1], theirs)
+
+    def test_tags_are_bumped_again_when_the_write_commits(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.work_order.save()
+        before_commit = self.stamps()[0]
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(self.stamps()[0], before_commit)
+
+    def test_moving_a_row_expires_both_customers(self):
+        instrument = make_instrument(self.customer)
+        stamps = self.stamps()
+        instrument.customer = self.other
+        instrument.save()
+        self.assertTrue(all(before != after for before, after in zip(stamps, self.stamps())))
+
+    def test_deleting_a_row_expires_its_customer(self):
+        instrument = make_instrument(self.customer)
+        mine = self.stamps()[0]
+        instrument.delete()
+        self.assertNotEqual(self.stamps()[0], mine)
+
+    def test_bulk_invalidation_expires_every_customer(self):
+        stamps = self.stamps()
+        invalidate_model(Customer)
+        self.assertTrue(all(before != after for before, after in zip(stamps, self.stamps())))
+
+    def test_clearcache_expires_a_single_tag(self):
+        stamps = self.stamps()
+        call_command('clearcache', tag=[customer_tag(self.other.pk)], stdout=io.StringIO())
+        self.assertEqual(self.stamps()[0], stamps[0])
+        self.assertNotEqual(self.stamps()[1], stamps[1])
+
+    def test_login_saves_keep_user_entries(self):
+        user = make_user()
+        stamp = tag_stamp([model_tag(type(user))])
+        user.save(update_fields=['last_login'])
+        self.assertEqual(tag_stamp([model_tag(type(user))]), stamp)
+        user.first_name = 'Renamed'
+        user.save()
+        self.assertNotEqual(tag_stamp([model_tag(type(user))]), stamp)
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ReferenceDataTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user(first_name='Ada', last_name='Lovelace')
+
+    def test_reference_lists_are_served_from_memory_until_a_save(self):
+        self.assertIn((self.user.pk, 'Ada Lovelace'), user_choices())
+        with self.assertNumQueries(0):
+            user_choices()
+
+        self.user.last_name = 'Byron'
+        self.user.save()
+        self.assertIn((self.user.pk, 'Ada Byron'), user_choices())
@@ -0,0 +1,69 @@
+from datetime import date, timedelta
+from django.test import TestCase, override_settings
+from service.models import Contact, ServiceAgreement, WorkOrder
+from service.tests.factories import make_customer, make_instrument, make_work_order
+
+class CustomerSummaryTests(TestCase):
+    def setUp(self):
+        self.customer = make_customer()
+        self.other = make_customer()
+
+    def summary(self, customer):
+        customer.refresh_from_db()
+        return (customer.instrument_count, customer.contact_count,
+                customer.has_active_agreement, customer.last_service_at)
+
+    def test_counts_follow_creates_and_deletes(self):
+        instrument = make_instrument(self.customer)
+        contact = Contact.objects.create(customer=self.customer, name='Ada', email='ada@example.com')
+        self.assertEqual(self.summary(self.customer)[:2], (1, 1))
+
+        contact.delete()
+        instrument.delete()
+        self.assertEqual(self.summary(self.customer)[:2], (0, 0))
+
+    def test_active_agreement_follows_its_status(self):
+        today = date.today()
+        agreement = ServiceAgreement.objects.create(
+            customer=self.customer, start_date=today - timedelta(days=1), end_date=today + timedelta(days=1),
+            status=ServiceAgreement.STATUS_ACTIVE,
+        )
+        self.assertTrue(self.summary(self.customer)[2])
+
+        agreement.end_date = today - timedelta(days=1)
+        agreement.save()
+        self.assertFalse(self.summary(self.customer)[2])
+
+    def test_last_service_follows_the_work_order_instrument(self):
+        work_order = make_work_order(make_instrument(self.customer))
+        self.assertEqual(self.summary(self.customer)[3], work_order.created_at)
+
+        work_order.instrument = make_instrument(self.other)
+        work_order.customer = self.other
+        work_order.save()
+        self.assertIsNone(self.summary(self.customer)[3])
+        self.assertEqual(self.summary(self.other)[3], work_order.created_at)
+
+        work_order.delete()
+        self.assertIsNone(self.summary(self.other)[3])
+
+    def test_moving_an_instrument_refreshes_both_customers(self):
+        instrument = make_instrument(self.customer)
+        instrument.customer = self.other
+        instrument.save()
+        self.assertEqual((self.summary(self.customer)[0], self.summary(self.other)[0]), (0, 1))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_saves_leaving_the_summary_columns_alone_skip_the_refresh(self):
+        contact = Contact.objects.create(customer=self.customer, name='Ada', email='ada@example.com')
+        contact = Contact.objects.get(pk=contact.pk)
+        contact.phone = '555-0100'
+        # The UPDATE, and the cache tag handlers reading the stored customer
+        # before and after it; no summary lookup or refresh
+        with self.assertNumQueries(3):
+            contact.save()
+
+        contact.customer = self.other
+        with self.assertNumQueries(5):
+            contact.save()
+        self.assertEqual((self.summary(self.customer)[1], self.summary(self.other)[1]), (0, 1))
@@ -1,5 +1,6 @@
 from django.urls import path
-from .admin.views import instrument_type_options, get_model_option
+from .admin.views import instrument_type_options, get_model_option, get_model_options
+from .views.filter_views import option_list_view, filter_instruments, filter_entitlements
 
 urlpatterns = [
     path('admin/service/instrumenttype/ajax/options/', 
@@ -8,4 +9,16 @@ urlpatterns = [
     path('admin/service/<str:model_name>/<int:object_id>/get_option/',
          get_model_option,
          name='admin_get_model_option'),
+    path('admin/service/get_options/',
+         get_model_options,
+         name='admin_get_model_options'),
+    path('admin/service/options/<str:source>/',
+         option_list_view,
+         name='admin_option_list'),
+    path('admin/service/ajax/filter-instruments/',
+         filter_instruments,
+         name='admin_filter_instruments'),
+    path('admin/service/ajax/filter-entitlements/',
+         filter_entitlements,
+         name='admin_filter_entitlements'),
 ]
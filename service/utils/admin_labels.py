@@ -0,0 +1,69 @@
+from django.contrib import admin
+from django.forms import ModelChoiceField
+from django.forms.models import BaseInlineFormSet
+from .reference_data import REFERENCE_CHOICES, ReferenceChoiceField
+
+def with_labels(queryset):
+    """Apply the model's display-label annotations when it provides them"""
+    if hasattr(queryset, 'with_labels'):
+        return queryset.with_labels()
+    return queryset
+
+class LabelledChoicesMixin:
+    """ModelAdmin mixin rendering foreign key choices without per-option queries.
+
+    Selects of reference tables (users, instrument and entitlement types)
+    are listed from the in-process copies in service.utils.reference_data.
+    """
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if (db_field.remote_field.model in REFERENCE_CHOICES
+                and 'queryset' not in kwargs
+                and not db_field.remote_field.limit_choices_to
+                and db_field.name not in self.get_autocomplete_fields(request)
+                and db_field.name not in self.raw_id_fields):
+            kwargs.setdefault('form_class', ReferenceChoiceField)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_field_queryset(self, db, db_field, request):
+        queryset = super().get_field_queryset(db, db_field, request)
+        if queryset is None:
+            queryset = db_field.remote_field.model._default_manager.using(db)
+        return with_labels(queryset)
+
+class LabelledRelatedFieldListFilter(admin.RelatedFieldListFilter):
+    """RelatedFieldListFilter whose option labels come from the same SELECT"""
+
+    def field_choices(self, field, request, model_admin):
+        queryset = field.related_model._default_manager.complex_filter(
+            field.get_limit_choices_to()
+        )
+        ordering = self.field_admin_ordering(field, request, model_admin)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        target = field.target_field.attname
+        return [(getattr(obj, target), str(obj)) for obj in with_labels(queryset)]
+
+class SharedChoicesInlineFormSet(BaseInlineFormSet):
+    """Inline formset evaluating each foreign key's choices once, not once per row.
+
+    Every form deep-copies its fields, which hands each row a fresh
+    ModelChoiceIterator; the rows of one formset share a parent, so their
+    choices are identical and can be listed once and reused.
+    """
+
+    def _share_choices(self, form):
+        shared = self.__dict__.setdefault('_shared_choices', {})
+        for name, field in form.fields.items():
+            if isinstance(field, ModelChoiceField) and not field.widget.is_hidden:
+                if name not in shared:
+                    shared[name] = list(field.choices)
+                field.choices = shared[name]
+        return form
+
+    def _construct_form(self, i, **kwargs):
+        return self._share_choices(super()._construct_form(i, **kwargs))
+
+    @property
+    def empty_form(self):
+        return self._share_choices(super().empty_form)
@@ -0,0 +1,421 @@
+"""Streaming bulk import of customers, instruments, agreements and entitlements.
+
+Records are read lazily from CSV or JSONL and processed in fixed-size
+chunks, so memory stays flat however large the file is. Foreign keys are
+resolved by natural key through lookup maps built once per chunk (or once
+per run for the small reference tables), rows are validated without
+per-row queries, and each chunk is written with bulk_create/bulk_update
+in its own transaction. A chunk that fails to write is rolled back and
+reported without aborting the rest of the import; a dry run rolls back
+everything at the end.
+
+Natural keys:
+    customers     name
+    instruments   serial_number (customer by name, instrument_type by name)
+    agreements    customer name + po_number
+    entitlements  serial_number + po_number + entitlement_type name
+"""
+import csv
+import json
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+from itertools import islice
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from .cache_tags import invalidate_model
+from ..models import (
+    Customer,
+    Instrument,
+    InstrumentType,
+    ServiceAgreement,
+    EntitlementType,
+    Entitlement,
+)
+
+MAX_REPORTED_ERRORS = 100
+BULK_UPDATE_BATCH_SIZE = 500
+
+def read_records(stream, fmt):
+    """Yield (line_number, record) from a text stream without loading it whole"""
+    if fmt == 'csv':
+        for line_number, row in enumerate(csv.DictReader(stream), start=2):
+            yield line_number, row
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            record = None
+        # Valid JSON that is not an object ([1, 2], "x") is as unusable as bad JSON
+        yield line_number, record if isinstance(record, dict) else None
+
+def detect_format(filename):
+    return 'jsonl' if filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+def _text(row, field, required=True):
+    """Return a stripped string column; KeyError if a required one is missing"""
+    if required and field not in row:
+        raise KeyError(field)
+    value = row.get(field)
+    return '' if value is None else str(value).strip()
+
+class ImportStats:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.failed = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    @property
+    def processed(self):
+        return self.created + self.updated + self.unchanged + self.failed
+
+    @property
+    def rows_per_second(self):
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+    def add_error(self, line_number, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_number, message))
+
+    def summary(self):
+        return (f'{self.created} created, {self.updated} updated, '
+                f'{self.unchanged} unchanged, {self.failed} failed '
+                f'in {self.elapsed:.2f}s ({self.rows_per_second:.0f} rows/s)')
+
+def _error_message(error):
+    if isinstance(error, ValidationError):
+        if hasattr(error, 'error_dict'):
+            return '; '.join(f'{field}: {" ".join(msgs)}'
+                             for field, msgs in error.message_dict.items())
+        return ' '.join(error.messages)
+    if isinstance(error, KeyError):
+        return f'Missing column {error}'
+    return str(error)
+
+class BaseImporter:
+    model = None
+    # Columns (attnames) forming the natural key of an existing row
+    key_fields = ()
+    update_fields = ()
+    # Foreign keys resolved by the importer itself; skipped by full_clean()
+    resolved_fields = ()
+
+    def __init__(self, chunk_size=1000):
+        self.chunk_size = chunk_size
+        self.existing = {}
+
+    def prepare(self, rows):
+        """Load the lookup maps needed to resolve this chunk's foreign keys"""
+
+    def build(self, row):
+        """Return (natural_key, unsaved instance) for a record"""
+        raise NotImplementedError
+
+    def finalize(self, obj):
+        """Adjust a validated instance before it is written"""
+
+    def lookup_filter(self, keys):
+        """Return a Q() narrowing the table to rows that may match `keys`"""
+        raise NotImplementedError
+
+    def existing_rows(self, keys):
+        """Return {natural_key: stored values} for keys already in the database"""
+        keys = set(keys)
+        if not keys:
+            return {}
+        rows = (self.model.objects
+                .filter(self.lookup_filter(keys))
+                .values('pk', *self.key_fields, *self.update_attnames))
+        existing = {}
+        for row in rows:
+            key = tuple(row[field] for field in self.key_fields)
+            if len(key) == 1:
+                key = key[0]
+            if key in keys:
+                existing[key] = row
+        return existing
+
+    def write_updates(self, objs):
+        """Update rows sharing the same new values with one UPDATE per group.
+
+        Imports tend to repeat values (same customer, same date), and a
+        plain UPDATE ... WHERE pk IN (...) is far cheaper than the CASE
+        expressions bulk_update() builds; leftovers still go through it.
+        """
+        groups = defaultdict(list)
+        for obj in objs:
+            groups[tuple(getattr(obj, attname) for attname in self.update_attnames)].append(obj)
+
+        leftovers = []
+        for values, group in groups.items():
+            if len(group) == 1:
+                leftovers.extend(group)
+                continue
+            self.model.objects.filter(pk__in=[obj.pk for obj in group]).update(
+                **dict(zip(self.update_attnames, values))
+            )
+        if leftovers:
+            self.model.objects.bulk_update(
+                leftovers, self.update_fields, batch_size=BULK_UPDATE_BATCH_SIZE
+            )
+
+    @property
+    def update_attnames(self):
+        return [self.model._meta.get_field(field).attname for field in self.update_fields]
+
+    def after_write(self, objs):
+        """Refresh data derived from the rows just written"""
+
+    def run(self, records, dry_run=False):
+        stats = ImportStats()
+        started = time.monotonic()
+        records = iter(records)
+
+        # Each chunk commits on its own, so a long import holds no locks
+        # between chunks and work already written survives a later failure.
+        # A dry run keeps every chunk in one transaction and rolls it back,
+        # so later chunks still see the rows of earlier ones.
+        with transaction.atomic() if dry_run else nullcontext():
+            while True:
+                chunk = list(islice(records, self.chunk_size))
+                if not chunk:
+                    break
+                self.import_chunk(chunk, stats)
+            if dry_run:
+                transaction.set_rollback(True)
+
+        stats.elapsed = time.monotonic() - started
+        return stats
+
+    def import_chunk(self, chunk, stats):
+        self.prepare([row for _, row in chunk if row is not None])
+
+        built = {}
+        for line_number, row in chunk:
+            try:
+                if row is None:
+                    raise ValidationError('Invalid JSON record')
+                key, obj = self.build(row)
+                if key in built:
+                    raise ValidationError(f'Duplicate of line {built[key][0]} in the same batch')
+                obj.full_clean(
+                    exclude=self.resolved_fields,
+                    validate_unique=False,
+                    validate_constraints=False,
+                )
+                self.finalize(obj)
+            except (ValidationError, KeyError, ValueError, TypeError) as e:
+                stats.add_error(line_number, _error_message(e))
+                continue
+            built[key] = (line_number, obj)
+
+        existing = self.existing_rows(built.keys())
+        to_create, to_update, unchanged = [], [], 0
+        for key, (line_number, obj) in built.items():
+            stored = existing.get(key)
+            if stored is None:
+                to_create.append(obj)
+            elif any(getattr(obj, attname) != stored[attname] for attname in self.update_attnames):
+                obj.pk = stored['pk']
+                obj._state.adding = False
+                to_update.append(obj)
+            else:
+                unchanged += 1
+        self.existing = existing
+
+        try:
+            with transaction.atomic():
+                self.model.objects.bulk_create(to_create)
+                self.write_updates(to_update)
+                self.after_write(to_create + to_update)
+        except IntegrityError as e:
+            for line_number, _ in built.values():
+                stats.add_error(line_number, f'Batch rejected by the database: {e}')
+            return
+
+        stats.created += len(to_create)
+        stats.updated += len(to_update)
+        stats.unchanged += unchanged
+
+class CustomerImporter(BaseImporter):
+    model = Customer
+    key_fields = ('name',)
+    update_fields = ('address', 'website')
+
+    def build(self, row):
+        obj = Customer(
+            name=_text(row, 'name'),
+            address=row.get('address') or '',
+            website=row.get('website') or '',
+        )
+        return obj.name, obj
+
+    def lookup_filter(self, keys):
+        return Q(name__in=keys)
+
+class InstrumentImporter(BaseImporter):
+    model = Instrument
+    key_fields = ('serial_number',)
+    update_fields = ('customer', 'instrument_type', 'installation_date')
+    resolved_fields = ('customer', 'instrument_type')
+
+    def __init__(self, chunk_size=1000):
+        super().__init__(chunk_size)
+        self.instrument_types = dict(InstrumentType.objects.values_list('name', 'pk'))
+        self.customers = {}
+
+    def prepare(self, rows):
+        names = {_text(row, 'customer', required=False) for row in rows}
+        self.customers = dict(Customer.objects
+                              .filter(name__in=names)
+                              .values_list('name', 'pk'))
+
+    def build(self, row):
+        customer = _text(row, 'customer')
+        instrument_type = _text(row, 'instrument_type')
+        if customer not in self.customers:
+            raise ValidationError(f'Unknown customer "{customer}"')
+        if instrument_type not in self.instrument_types:
+            raise ValidationError(f'Unknown instrument type "{instrument_type}"')
+
+        obj = Instrument(
+            serial_number=_text(row, 'serial_number'),
+            customer_id=self.customers[customer],
+            instrument_type_id=self.instrument_types[instrument_type],
+            installation_date=row['installation_date'],
+        )
+        return obj.serial_number, obj
+
+    def lookup_filter(self, keys):
+        return Q(serial_number__in=keys)
+
+    def after_write(self, objs):
+        # Instruments moving to another customer change both summaries
+        Customer.refresh_summaries(
+            {obj.customer_id for obj in objs}
+            | {row['customer_id'] for row in self.existing.values()}
+        )
+
+class AgreementImporter(BaseImporter):
+    model = ServiceAgreement
+    key_fields = ('customer_id', 'po_number')
+    update_fields = ('start_date', 'end_date', 'status', 'notes')
+    resolved_fields = ('customer',)
+
+    def __init__(self, chunk_size=1000):
+        super().__init__(chunk_size)
+        self.customers = {}
+
+    def prepare(self, rows):
+        names = {_text(row, 'customer', required=False) for row in rows}
+        self.customers = dict(Customer.objects
+                              .filter(name__in=names)
+                              .values_list('name', 'pk'))
+
+    def build(self, row):
+        customer = _text(row, 'customer')
+        if customer not in self.customers:
+            raise ValidationError(f'Unknown customer "{customer}"')
+        po_number = _text(row, 'po_number')
+        if not po_number:
+            raise ValidationError({'po_number': 'A PO number is required to import agreements.'})
+
+        obj = ServiceAgreement(
+            customer_id=self.customers[customer],
+            po_number=po_number,
+            start_date=row['start_date'],
+            end_date=row['end_date'],
+            status=row.get('status') or ServiceAgreement.STATUS_ACTIVE,
+            notes=row.get('notes') or '',
+        )
+        return (obj.customer_id, obj.po_number), obj
+
+    def finalize(self, obj):
+        # bulk_create skips the pre_save signal that normally does this
+        obj.update_status()
+
+    def lookup_filter(self, keys):
+        return Q(customer_id__in={c for c, _ in keys}, po_number__in={po for _, po in keys})
+
+    def after_write(self, objs):
+        Customer.refresh_summaries(obj.customer_id for obj in objs)
+
+class EntitlementImporter(BaseImporter):
+    model = Entitlement
+    key_fields = ('agreement_id', 'instrument_id', 'entitlement_type_id')
+    update_fields = ('total', 'is_active')
+    resolved_fields = ('agreement', 'instrument', 'entitlement_type')
+
+    def __init__(self, chunk_size=1000):
+        super().__init__(chunk_size)
+        self.entitlement_types = dict(EntitlementType.objects.values_list('name', 'pk'))
+        self.instruments = {}
+        self.agreements = {}
+
+    def prepare(self, rows):
+        serials = {_text(row, 'serial_number', required=False) for row in rows}
+        self.instruments = {
+            serial: (pk, customer_id)
+            for serial, pk, customer_id in (Instrument.objects
+                                            .filter(serial_number__in=serials)
+                                            .values_list('serial_number', 'pk', 'customer_id'))
+        }
+        po_numbers = {_text(row, 'po_number', required=False) for row in rows}
+        self.agreements = {
+            (customer_id, po): pk
+            for customer_id, po, pk in (ServiceAgreement.objects
+                                        .filter(customer_id__in={c for _, c in self.instruments.values()},
+                                                po_number__in=po_numbers)
+                                        .values_list('customer_id', 'po_number', 'pk'))
+        }
+
+    def build(self, row):
+        serial_number = _text(row, 'serial_number')
+        po_number = _text(row, 'po_number')
+        entitlement_type = _text(row, 'entitlement_type')
+        if serial_number not in self.instruments:
+            raise ValidationError(f'Unknown instrument "{serial_number}"')
+        if entitlement_type not in self.entitlement_types:
+            raise ValidationError(f'Unknown entitlement type "{entitlement_type}"')
+        instrument_id, customer_id = self.instruments[serial_number]
+        if (customer_id, po_number) not in self.agreements:
+            raise ValidationError(f'No agreement with PO "{po_number}" for the instrument\'s customer')
+
+        is_active = row.get('is_active')
+        obj = Entitlement(
+            agreement_id=self.agreements[(customer_id, po_number)],
+            instrument_id=instrument_id,
+            entitlement_type_id=self.entitlement_types[entitlement_type],
+            total=row['total'],
+            is_active=True if is_active in (None, '') else is_active,
+        )
+        return (obj.agreement_id, obj.instrument_id, obj.entitlement_type_id), obj
+
+    def lookup_filter(self, keys):
+        return Q(agreement_id__in={a for a, _, _ in keys}, instrument_id__in={i for _, i, _ in keys})
+
+IMPORTERS = {
+    'customers': CustomerImporter,
+    'instruments': InstrumentImporter,
+    'agreements': AgreementImporter,
+    'entitlements': EntitlementImporter,
+}
+
+def bulk_import(kind, stream, fmt='csv', chunk_size=1000, dry_run=False):
+    """Import `kind` records from a text stream and return ImportStats"""
+    importer = IMPORTERS[kind](chunk_size=chunk_size)
+    stats = importer.run(read_records(stream, fmt), dry_run=dry_run)
+    if not dry_run and (stats.created or stats.updated):
+        # Bulk writes skip post_save, so expire the derived caches here
+        invalidate_model(importer.model)
+    return stats
@@ -0,0 +1,202 @@
+"""Tag-based invalidation for the shared cache.
+
+A tagged entry is stored under its key plus a stamp of the current
+versions of its tags: 'customer:12', 'agreement:3' or
+'model:service.workorder'. Bumping a tag's version makes every entry
+stamped with it unreachable, and the stale entries age out on their own.
+Model signals bump the tags of each saved or deleted row
+(service/signals/cache_handlers.py); `clearcache --tag/--model` bumps
+them by hand.
+
+Every scoped tag also depends on its kind, so bumping 'customer' expires
+the entries of all customers at once. invalidate_model() does that for
+bulk writes, which send no signals and don't say which rows they touched.
+
+Versions are timestamps: a version missing from the cache starts at the
+current time, and a bump stores the current time again, so a version
+evicted from the cache can't revive entries stamped before the eviction.
+Versions are read at most once per request, and a write bumps its tags
+again when its transaction commits.
+"""
+import functools
+import hashlib
+import time
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from ..db.routers import read_alias
+from ..middleware.current_user import request_cache
+from ..models import (
+    AgreementStatusEvent,
+    Contact,
+    Customer,
+    Entitlement,
+    EntitlementType,
+    Instrument,
+    InstrumentType,
+    ServiceAgreement,
+    ServiceReport,
+    WorkOrder,
+)
+
+# Scoped tags of each model's rows: tag kind -> lookup from the row to the scope's pk
+SCOPE_LOOKUPS = {
+    Customer: {'customer': 'pk'},
+    Contact: {'customer': 'customer_id'},
+    Instrument: {'customer': 'customer_id'},
+    ServiceAgreement: {'customer': 'customer_id', 'agreement': 'pk'},
+    AgreementStatusEvent: {'customer': 'agreement__customer_id', 'agreement': 'agreement_id'},
+    Entitlement: {'customer': 'agreement__customer_id', 'agreement': 'agreement_id'},
+    WorkOrder: {'customer': 'customer_id', 'agreement': 'entitlement__agreement_id'},
+    ServiceReport: {
+        'customer': 'work_order__customer_id',
+        'agreement': 'work_order__entitlement__agreement_id',
+    },
+}
+
+_MISSING = object()
+
+def model_tag(model):
+    return f'model:{model._meta.label_lower}'
+
+def customer_tag(pk):
+    return f'customer:{pk}'
+
+def agreement_tag(pk):
+    return f'agreement:{pk}'
+
+# Admin panels show labels from these too, whichever customer they belong to
+PANEL_TAGS = [model_tag(model) for model in (InstrumentType, EntitlementType, User)]
+# Tags expire panels on change; the timeout only bounds date-dependent content
+PANEL_CACHE_TIMEOUT = 300
+
+def scope_tags(model, pk, using=None):
+    """Scoped tags of the stored row `pk`, read with one query"""
+    lookups = SCOPE_LOOKUPS.get(model)
+    if not lookups or pk is None:
+        return set()
+    row = (model._base_manager.using(using)
+           .filter(pk=pk)
+           .values_list(*lookups.values())
+           .first()) or ()
+    return {f'{kind}:{value}' for kind, value in zip(lookups, row) if value is not None}
+
+def _version_key(tag):
+    return f'tags:version:{tag}'
+
+def _with_kinds(tags):
+    expanded = []
+    for tag in tags:
+        for name in (tag.split(':', 1)[0], tag):
+            if name not in expanded:
+                expanded.append(name)
+    return [_version_key(tag) for tag in expanded]
+
+def _stamp(keys, versions):
+    joined = '.'.join(str(versions.get(key, 0)) for key in keys)
+    return hashlib.md5(joined.encode()).hexdigest()[:16]
+
+def _known_versions():
+    # Versions read during the current request; a throwaway dict outside one
+    return request_cache().setdefault('tag_versions', {})
+
+def load_tag_versions(tags):
+    """Read the versions of `tags` not yet known in this request, in one cache call"""
+    keys = _with_kinds(tags)
+    known = _known_versions()
+    missing = [key for key in keys if key not in known]
+    if missing:
+        versions = cache.get_many(missing)
+        new = [key for key in missing if key not in versions]
+        for key in new:
+            # add(): concurrent first readers settle on one version
+            cache.add(key, time.time_ns(), None)
+        if new:
+            versions.update(cache.get_many(new))
+        known.update(versions)
+    return keys, known
+
+async def aload_tag_versions(tags):
+    keys = _with_kinds(tags)
+    known = _known_versions()
+    missing = [key for key in keys if key not in known]
+    if missing:
+        versions = await cache.aget_many(missing)
+        new = [key for key in missing if key not in versions]
+        for key in new:
+            await cache.aadd(key, time.time_ns(), None)
+        if new:
+            versions.update(await cache.aget_many(new))
+        known.update(versions)
+    return keys, known
+
+def tag_stamp(tags):
+    """Stamp covering the current versions of `tags`"""
+    return _stamp(*load_tag_versions(tags))
+
+async def atag_stamp(tags):
+    return _stamp(*await aload_tag_versions(tags))
+
+def _bump(keys):
+    known = _known_versions()
+    for key in keys:
+        known.pop(key, None)
+    # A fresh value rather than incr(): the db and file backends implement
+    # incr as a get and a set, so concurrent bumps could collapse into one
+    version = time.time_ns()
+    cache.set_many(dict.fromkeys(keys, version), None)
+
+def invalidate_tags(tags, using=None):
+    """Expire every entry stamped with any of `tags`.
+
+    Inside a transaction on `using` the tags are bumped now, so the writer
+    itself stops reading what it replaces, and again on commit: a worker
+    that read a version in between may have stored rows from before the
+    commit under it.
+    """
+    keys = [_version_key(tag) for tag in tags]
+    if transaction.get_connection(using).in_atomic_block:
+        _bump(keys)
+    transaction.on_commit(lambda: _bump(keys), using=using)
+
+def invalidate_model(model, using=None):
+    """Expire entries built from `model` after a write that sent no signals"""
+    invalidate_tags([model_tag(model), *SCOPE_LOOKUPS.get(model, ())], using)
+
+def get_or_set_tagged(key, tags, default, timeout):
+    """Return the entry for `key` under `tags`, storing default() on a miss.
+
+    default() may read the replica (see service.db.routers). Entries built
+    from the replica are stored apart from the primary's and kept only for
+    REPLICA_CACHE_SECONDS: they can predate a write whose tags were already
+    bumped, and must neither reach a request pinned to the primary nor
+    outlive the pin of the user who wrote.
+    """
+    alias = read_alias()
+    if alias != DEFAULT_DB_ALIAS:
+        timeout = min(timeout, settings.REPLICA_CACHE_SECONDS)
+    key = f'{key}:{alias}:{tag_stamp(tags)}'
+    value = cache.get(key, _MISSING)
+    if value is _MISSING:
+        value = default()
+        cache.set(key, value, timeout)
+    return value
+
+def cached_panel(name, tags):
+    """Cache the HTML of a ModelAdmin readonly panel per object, under
+    tags(obj) plus PANEL_TAGS
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, obj):
+            if obj is None or obj.pk is None:
+                return method(self, obj)
+            return get_or_set_tagged(
+                f'admin:{name}:{obj.pk}',
+                [*tags(obj), *PANEL_TAGS],
+                lambda: method(self, obj),
+                PANEL_CACHE_TIMEOUT,
+            )
+        return wrapper
+    return decorator
@@ -0,0 +1,93 @@
+"""Deep readiness checks behind /health/ready.
+
+Load balancers probe every few seconds per instance, so the combined
+result is memoized in process for HEALTH_CHECK_CACHE_SECONDS and
+concurrent probes share one run. The memo lives in process memory on
+purpose: the shared cache is one of the things being checked.
+"""
+import logging
+import threading
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+
+logger = logging.getLogger('service.health')
+
+CACHE_PROBE_KEY = 'health:probe'
+
+def check_database():
+    """Round-trip a trivial query and compare the latency with the limit"""
+    started = time.perf_counter()
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+    latency_ms = round((time.perf_counter() - started) * 1000, 1)
+    limit = settings.HEALTH_DB_MAX_LATENCY_MS
+    return latency_ms <= limit, {'latency_ms': latency_ms, 'limit_ms': limit}
+
+# Applied migrations stay applied, so the migration graph is only loaded
+# again while some are still pending
+_migrations_applied = False
+
+def check_migrations():
+    global _migrations_applied
+    if _migrations_applied:
+        return True, {'pending': 0}
+    executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    _migrations_applied = not plan
+    return not plan, {'pending': len(plan)}
+
+def check_cache():
+    """Write and read back a short-lived key"""
+    cache = caches[DEFAULT_CACHE_ALIAS]
+    token = str(time.monotonic())
+    cache.set(CACHE_PROBE_KEY, token, 30)
+    return cache.get(CACHE_PROBE_KEY) == token, {'backend': cache.__class__.__name__}
+
+READINESS_CHECKS = {
+    'database': check_database,
+    'migrations': check_migrations,
+    'cache': check_cache,
+}
+
+def run_checks():
+    """Return (ready, {name: result}) with every check run once"""
+    results = {}
+    for name, check in READINESS_CHECKS.items():
+        try:
+            ok, detail = check()
+        except Exception as exc:
+            # Probes are unauthenticated; the details go to the log only
+            logger.warning('Readiness check %s failed', name, exc_info=True)
+            ok, detail = False, {'error': exc.__class__.__name__}
+        results[name] = {'ok': ok, **detail}
+    return all(result['ok'] for result in results.values()), results
+
+_lock = threading.Lock()
+_last = None  # (checked_at, ready, results)
+
+def _memoized(now):
+    last = _last
+    if last is not None and now - last[0] < settings.HEALTH_CHECK_CACHE_SECONDS:
+        checked_at, ready, results = last
+        return ready, results, round(now - checked_at, 1)
+    return None
+
+def readiness():
+    """Return (ready, results, age in seconds) from the memo or a fresh run"""
+    global _last
+    with _lock:
+        now = time.monotonic()
+        result = _memoized(now)
+        if result is None:
+            _last = (now, *run_checks())
+            result = _memoized(now)
+    return result
+
+async def areadiness():
+    """readiness() that answers from the memo without leaving the event loop"""
+    return _memoized(time.monotonic()) or await sync_to_async(readiness)()
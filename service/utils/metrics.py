@@ -0,0 +1,182 @@
+"""Prometheus metrics served at /metrics.
+
+With several gunicorn workers each process keeps its own counters, so
+when PROMETHEUS_MULTIPROC_DIR is set (the Docker image sets it) every
+process writes its samples there and the /metrics view aggregates all of
+them with MultiProcessCollector. gunicorn.conf.py clears the directory
+on start and drops the files of dead workers. Without the variable, as
+under runserver, the default in-process registry is served.
+
+Work order and approval counts are not kept in memory at all: the
+collector below reads them from the database at scrape time, so every
+worker reports the same numbers.
+"""
+import os
+import time
+from contextlib import contextmanager
+from django.db.models import Count, Q
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+    generate_latest, multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+from ..db.routers import replica_reads
+from ..models import ServiceReport, WorkOrder
+
+if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    # Commands such as update_agreement_statuses may run before gunicorn creates it
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+# Admin pages run from a few ms to several seconds
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 5, 10, 20, 50, 100, 250, 500)
+
+REQUEST_LATENCY = Histogram(
+    'service_http_request_duration_seconds',
+    'Request latency by resolved URL name',
+    ['view', 'method'],
+    buckets=LATENCY_BUCKETS,
+)
+RESPONSES = Counter(
+    'service_http_responses',
+    'Responses by resolved URL name and status code',
+    ['view', 'method', 'status'],
+)
+REQUEST_QUERIES = Histogram(
+    'service_http_request_db_queries',
+    'Database queries executed per request',
+    ['view'],
+    buckets=QUERY_COUNT_BUCKETS,
+)
+DB_TIME = Counter(
+    'service_db_query_duration_seconds',
+    'Time spent in database queries',
+    ['view'],
+)
+CACHE_LOOKUPS = Counter(
+    'service_cache_lookups',
+    'Cache keys looked up, by result; hit ratio is hit / (hit + miss)',
+    ['result'],
+)
+DB_CHECKOUT = Histogram(
+    'service_db_connection_checkout_seconds',
+    'Time to obtain a database connection: pool checkout, or a new connection without DB_POOL',
+    ['alias'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1),
+)
+DB_POOL_SIZE = Gauge(
+    'service_db_pool_size', 'Connections held by the pools', ['alias'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_AVAILABLE = Gauge(
+    'service_db_pool_available', 'Idle connections in the pools', ['alias'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_WAITING = Gauge(
+    'service_db_pool_requests_waiting', 'Checkouts queued for a connection', ['alias'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_WAIT = Counter(
+    'service_db_pool_wait_seconds', 'Time checkouts spent queued for a connection', ['alias'],
+)
+DB_POOL_TIMEOUTS = Counter(
+    'service_db_pool_checkout_errors', 'Checkouts that timed out or failed', ['alias'],
+)
+DB_CONNECTIONS_OPENED = Counter(
+    'service_db_pool_connections_opened', 'Server connections the pools opened', ['alias'],
+)
+AGREEMENT_JOB_DURATION = Histogram(
+    'service_agreement_status_job_duration_seconds',
+    'Duration of update_agreement_statuses runs',
+    buckets=(0.1, 0.5, 1, 5, 15, 30, 60, 120, 300),
+)
+AGREEMENT_JOB_LAST_SUCCESS = Gauge(
+    'service_agreement_status_job_last_success_timestamp_seconds',
+    'Unix time the last update_agreement_statuses run finished',
+    multiprocess_mode='mostrecent',
+)
+AGREEMENT_JOB_UPDATED = Counter(
+    'service_agreement_status_job_updated_agreements',
+    'Agreements whose status the job changed',
+)
+
+UNRESOLVED_VIEW = '<unresolved>'
+
+def observe_request(request, response, timings):
+    """Record one request measured by ServerTimingMiddleware"""
+    match = getattr(request, 'resolver_match', None)
+    view = (match.view_name if match else None) or UNRESOLVED_VIEW
+    REQUEST_LATENCY.labels(view, request.method).observe(timings.total)
+    RESPONSES.labels(view, request.method, response.status_code).inc()
+    REQUEST_QUERIES.labels(view).observe(timings.db_queries)
+    if timings.db_time:
+        DB_TIME.labels(view).inc(timings.db_time)
+    if timings.cache_hits:
+        CACHE_LOOKUPS.labels('hit').inc(timings.cache_hits)
+    if timings.cache_misses:
+        CACHE_LOOKUPS.labels('miss').inc(timings.cache_misses)
+
+def observe_connection(wrapper, seconds):
+    """Record one connection checkout and the pool's state after it"""
+    alias = wrapper.alias
+    DB_CHECKOUT.labels(alias).observe(seconds)
+    pool = wrapper.pool
+    if pool is None:
+        return
+    # pop_stats() resets the pool's counters, so each checkout adds the delta
+    stats = pool.pop_stats()
+    DB_POOL_SIZE.labels(alias).set(stats.get('pool_size', 0))
+    DB_POOL_AVAILABLE.labels(alias).set(stats.get('pool_available', 0))
+    DB_POOL_WAITING.labels(alias).set(stats.get('requests_waiting', 0))
+    DB_POOL_WAIT.labels(alias).inc(stats.get('requests_wait_ms', 0) / 1000)
+    DB_POOL_TIMEOUTS.labels(alias).inc(stats.get('requests_errors', 0))
+    DB_CONNECTIONS_OPENED.labels(alias).inc(stats.get('connections_num', 0))
+
+@contextmanager
+def agreement_status_job():
+    """Time one job run; yields a callable taking the number of agreements updated"""
+    updated = []
+    with AGREEMENT_JOB_DURATION.time():
+        yield updated.append
+    AGREEMENT_JOB_UPDATED.inc(sum(updated))
+    AGREEMENT_JOB_LAST_SUCCESS.set(time.time())
+
+class BacklogCollector:
+    """Work order and approval backlog, counted when Prometheus scrapes"""
+
+    def collect(self):
+        # Counted before the first yield, so the routing context does not
+        # stay set while the generator is suspended
+        with replica_reads():
+            work_orders = WorkOrder.objects.aggregate(
+                open=Count('pk', filter=Q(status=WorkOrder.STATUS_OPEN)),
+                in_progress=Count('pk', filter=Q(status=WorkOrder.STATUS_IN_PROGRESS)),
+            )
+            pending_approvals = ServiceReport.objects.filter(
+                approval_status=ServiceReport.STATUS_AWAITING
+            ).count()
+
+        open_orders = GaugeMetricFamily(
+            'service_open_work_orders', 'Work orders not yet completed', labels=['status'],
+        )
+        for status, count in work_orders.items():
+            open_orders.add_metric([status], count)
+        yield open_orders
+
+        yield GaugeMetricFamily(
+            'service_pending_approvals',
+            'Service reports awaiting approval',
+            value=pending_approvals,
+        )
+
+BACKLOG_REGISTRY = CollectorRegistry()
+BACKLOG_REGISTRY.register(BacklogCollector())
+
+def render_metrics():
+    """Return (body, content type) for a scrape"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry) + generate_latest(BACKLOG_REGISTRY), CONTENT_TYPE_LATEST
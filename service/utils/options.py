@@ -0,0 +1,249 @@
+"""Cached option lists feeding the admin's cascading selects and popups.
+
+Every option source declares the models its labels depend on. The model
+tags of those models (service.utils.cache_tags), bumped by post_save /
+post_delete, are part of every cache key, so a save invalidates exactly
+the lists it could have changed. Responses carry an
+ETag derived from the payload; a matching If-None-Match gets a 304, and a
+warm cache answers without touching the database.
+
+Lookups are async (async cache API and ORM) so the JSON views serving
+them share a worker under ASGI instead of holding a thread each.
+"""
+import base64
+import hashlib
+import json
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from .cache_tags import atag_stamp, model_tag
+from .reference_data import LocalCache
+from ..models import (
+    Customer,
+    Contact,
+    Instrument,
+    InstrumentType,
+    ServiceAgreement,
+    EntitlementType,
+    Entitlement,
+    WorkOrder,
+    ServiceReport,
+)
+
+OPTION_CACHE_TIMEOUT = 300  # seconds; versions make this a safety net only
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+# Models whose rows appear in another model's __str__
+LABEL_DEPENDENCIES = {
+    Instrument: (InstrumentType,),
+    ServiceAgreement: (Customer,),
+    Entitlement: (EntitlementType, Instrument, InstrumentType, WorkOrder),
+    WorkOrder: (Instrument, InstrumentType),
+    ServiceReport: (WorkOrder, Instrument, InstrumentType),
+    Contact: (Customer,),
+}
+
+async def adependency_stamp(models):
+    """Version stamp covering the given models, read in one cache call"""
+    return await atag_stamp([model_tag(model) for model in models])
+
+def label_dependencies(model):
+    return (model,) + LABEL_DEPENDENCIES.get(model, ())
+
+class OptionSource:
+    model = None
+    # Field options are sorted by; also the field prefix search applies to
+    order_field = None
+    # GET parameter -> ORM lookup; values must be integer ids
+    filter_params = {}
+    # Filter parameters without which the list is empty
+    required_params = ()
+    # Small reference lists are also kept in process (see reference_data)
+    local = False
+
+    @property
+    def depends_on(self):
+        return label_dependencies(self.model)
+
+    def get_queryset(self):
+        return self.model._default_manager.all()
+
+    def serialize(self, obj):
+        return {'value': obj.pk, 'label': str(obj)}
+
+    async def abuild(self, filters, search, limit, cursor):
+        """Return the payload for one page of options"""
+        queryset = (self.get_queryset()
+                    .filter(**filters)
+                    .annotate(option_order=F(self.order_field))
+                    .order_by('option_order', 'pk'))
+        if search:
+            queryset = queryset.filter(**{f'{self.order_field}__istartswith': search})
+        if cursor:
+            order, pk = cursor
+            queryset = queryset.filter(Q(option_order__gt=order) | Q(option_order=order, pk__gt=pk))
+
+        objs = [obj async for obj in queryset[:limit + 1]]
+        next_cursor = None
+        if len(objs) > limit:
+            objs = objs[:limit]
+            last = objs[-1]
+            next_cursor = encode_cursor(last.option_order, last.pk)
+        return {
+            'results': [self.serialize(obj) for obj in objs],
+            'next': next_cursor,
+        }
+
+class InstrumentOptions(OptionSource):
+    model = Instrument
+    order_field = 'serial_number'
+    filter_params = {'customer': 'customer_id'}
+    required_params = ('customer',)
+
+    def get_queryset(self):
+        return Instrument.objects.with_labels()
+
+    def serialize(self, obj):
+        return {'value': obj.pk, 'label': str(obj), 'serial_number': obj.serial_number}
+
+class EntitlementOptions(OptionSource):
+    model = Entitlement
+    order_field = 'entitlement_type__name'
+    filter_params = {'instrument': 'instrument_id', 'agreement': 'agreement_id'}
+    required_params = ('instrument',)
+
+    def get_queryset(self):
+        return Entitlement.objects.filter(is_active=True).with_labels()
+
+    def serialize(self, obj):
+        return {
+            'value': obj.pk,
+            'label': str(obj),
+            'entitlement_type': obj.entitlement_type_name,
+            'remaining': obj.remaining,
+        }
+
+class InstrumentTypeOptions(OptionSource):
+    model = InstrumentType
+    order_field = 'name'
+    local = True
+
+OPTION_SOURCES = {
+    'instruments': InstrumentOptions(),
+    'entitlements': EntitlementOptions(),
+    'instrumenttypes': InstrumentTypeOptions(),
+}
+
+def encode_cursor(order, pk):
+    raw = json.dumps([order, pk], cls=DjangoJSONEncoder).encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def decode_cursor(value):
+    try:
+        order, pk = json.loads(base64.urlsafe_b64decode(value.encode()))
+        return order, int(pk)
+    except (ValueError, TypeError):
+        return None
+
+def encode_payload(payload):
+    """Serialize a payload to (body, etag)"""
+    body = json.dumps(payload, cls=DjangoJSONEncoder).encode()
+    return body, '"%s"' % hashlib.md5(body).hexdigest()
+
+# Payloads of local sources, keyed by the dependency stamp like the shared entries
+_local_payloads = LocalCache(max_entries=128, timeout=OPTION_CACHE_TIMEOUT)
+
+async def _acached_payload(key, build, local=False):
+    """Return (body, etag) from the cache, building and storing it on a miss"""
+    cached = _local_payloads.get(key) if local else None
+    if cached is not None:
+        return cached
+    cached = await cache.aget(key)
+    if cached is None:
+        cached = encode_payload(await build())
+        await cache.aset(key, cached, OPTION_CACHE_TIMEOUT)
+    if local:
+        _local_payloads.set(key, cached)
+    return cached
+
+async def aoption_list(source_name, params):
+    """Return (body, etag) for a page of options, or None for an unknown source.
+
+    `params` is the request's GET QueryDict: the source's filter
+    parameters plus optional `q` (prefix search), `limit` and `cursor`.
+    """
+    source = OPTION_SOURCES.get(source_name)
+    if source is None:
+        return None
+
+    filters = {}
+    for param, lookup in source.filter_params.items():
+        value = params.get(param)
+        if value:
+            try:
+                filters[lookup] = int(value)
+            except ValueError:
+                return _empty_page()
+    if any(not params.get(param) for param in source.required_params):
+        return _empty_page()
+
+    search = params.get('q', '').strip()
+    try:
+        limit = min(max(int(params.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    cursor = decode_cursor(params['cursor']) if params.get('cursor') else None
+
+    fingerprint = hashlib.md5(
+        json.dumps([sorted(filters.items()), search, limit, cursor]).encode()
+    ).hexdigest()
+    key = f'options:{source_name}:{await adependency_stamp(source.depends_on)}:{fingerprint}'
+    return await _acached_payload(
+        key, lambda: source.abuild(filters, search, limit, cursor), local=source.local,
+    )
+
+def _empty_page():
+    return encode_payload({'results': [], 'next': None})
+
+def object_label(obj):
+    """Label shown for a single object picked in an admin popup"""
+    if hasattr(obj, 'name'):
+        return obj.name
+    elif hasattr(obj, 'get_full_name'):
+        return obj.get_full_name() or str(obj)
+    return str(obj)
+
+def _object_labels(objs):
+    return {pk: {'value': str(obj.pk), 'label': object_label(obj)} for pk, obj in objs.items()}
+
+async def aobject_options(model, pks):
+    """Return {pk: option} for the given pks of `model`, skipping missing rows.
+
+    Options cached by earlier lookups are read in one cache call; the rest
+    are resolved with a single in_bulk() query.
+    """
+    stamp = await adependency_stamp(label_dependencies(model))
+    keys = {pk: f'options:object:{model._meta.label_lower}:{stamp}:{pk}' for pk in pks}
+    cached = await cache.aget_many(keys.values())
+    options = {pk: cached[key] for pk, key in keys.items() if key in cached}
+
+    missing = [pk for pk in keys if pk not in options]
+    if missing:
+        queryset = model._default_manager.all()
+        if hasattr(queryset, 'with_labels'):
+            queryset = queryset.with_labels()
+        objs = await queryset.ain_bulk(missing)
+        # Models without with_labels() may follow a foreign key in __str__
+        found = await sync_to_async(_object_labels)(objs)
+        await cache.aset_many({keys[pk]: option for pk, option in found.items()}, OPTION_CACHE_TIMEOUT)
+        options.update(found)
+    return options
+
+async def aobject_option(model, pk):
+    """Return (body, etag) for one object's option, or None if it does not exist"""
+    option = (await aobject_options(model, [pk])).get(pk)
+    if option is None:
+        return None
+    return encode_payload(option)
@@ -0,0 +1,66 @@
+"""Hot querysets whose plans are checked by `manage.py explain_hot_queries`.
+
+Each entry mirrors a query the dashboard or a changelist runs on every
+load. Register new ones with @hot_query whenever an index is added for an
+access path, so a later schema or query change that loses the index shows
+up as a sequential scan.
+"""
+import re
+from datetime import timedelta
+from django.utils import timezone
+from ..models import Contact, Entitlement, ServiceAgreement, ServiceReport, WorkOrder
+
+HOT_QUERIES = {}
+
+def hot_query(name):
+    def register(func):
+        HOT_QUERIES[name] = func
+        return func
+    return register
+
+@hot_query('workorders_by_status')
+def workorders_by_status():
+    return WorkOrder.objects.filter(status=WorkOrder.STATUS_OPEN).order_by('-created_at')[:100]
+
+@hot_query('recent_workorders')
+def recent_workorders():
+    return WorkOrder.objects.order_by('-created_at')[:5]
+
+@hot_query('reports_awaiting_approval')
+def reports_awaiting_approval():
+    return ServiceReport.objects.filter(approval_status=ServiceReport.STATUS_AWAITING)[:100]
+
+@hot_query('recent_reports')
+def recent_reports():
+    return ServiceReport.objects.order_by('-service_date')[:5]
+
+@hot_query('agreements_expiring_soon')
+def agreements_expiring_soon():
+    today = timezone.now().date()
+    return ServiceAgreement.objects.filter(
+        status=ServiceAgreement.STATUS_ACTIVE,
+        end_date__lte=today + timedelta(days=30),
+    )
+
+@hot_query('instrument_entitlements')
+def instrument_entitlements():
+    instrument_id = Entitlement.objects.values_list('instrument_id', flat=True).first()
+    return Entitlement.objects.filter(instrument_id=instrument_id, is_active=True)
+
+@hot_query('customer_contacts')
+def customer_contacts():
+    customer_id = Contact.objects.values_list('customer_id', flat=True).first()
+    return Contact.objects.filter(customer_id=customer_id)
+
+# Plan lines reading a whole table, per database vendor
+SEQUENTIAL_SCAN_PATTERNS = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)\s*$', re.MULTILINE),
+}
+
+def sequential_scans(plan, vendor):
+    """Return the tables `plan` reads with a sequential scan"""
+    pattern = SEQUENTIAL_SCAN_PATTERNS.get(vendor)
+    if pattern is None:
+        return []
+    return sorted(set(pattern.findall(plan)))
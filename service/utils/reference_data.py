@@ -0,0 +1,127 @@
+"""In-process copies of small, rarely changing tables.
+
+Work order and service report forms list every user, instrument type or
+entitlement type on each render. Those lists are kept in process memory
+under the stamp of their model tags in the shared cache
+(service.utils.cache_tags): a save in any worker bumps the tag and every
+worker reloads on its next lookup. The versions of all reference tags
+are read in one cache call per request, so a warm render lists them
+without touching the database.
+"""
+import functools
+import threading
+import time
+from collections import OrderedDict
+from django.contrib.auth.models import User
+from django.forms import ModelChoiceField
+from django.forms.models import ModelChoiceIterator
+from ..middleware.current_user import get_request_context
+from ..models import EntitlementType, InstrumentType
+from .cache_tags import PANEL_CACHE_TIMEOUT, load_tag_versions, model_tag, tag_stamp
+
+_MISSING = object()
+
+class LocalCache:
+    """Bounded LRU dict shared by the threads of one process.
+
+    Keys carry the tag stamp they were built under, so a bumped tag simply
+    stops matching and the old entry falls off the end. Entries also expire
+    after `timeout` seconds, which bounds how long a bump lost by the shared
+    cache (evicted, or a backend outage) can leave a process behind.
+    """
+
+    def __init__(self, max_entries=256, timeout=PANEL_CACHE_TIMEOUT):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            expires, value = self._entries[key]
+            if expires < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+_local = LocalCache()
+
+# Every tag a reference set depends on, read together once per request
+REFERENCE_TAGS = []
+
+def reference_data(*models):
+    """Keep the result of the decorated loader in process until one of `models` changes"""
+    tags = [model_tag(model) for model in models]
+    REFERENCE_TAGS.extend(tag for tag in tags if tag not in REFERENCE_TAGS)
+
+    def decorator(load):
+        name = f'{load.__module__}.{load.__qualname__}'
+
+        @functools.wraps(load)
+        def wrapper():
+            if get_request_context() is not None:
+                load_tag_versions(REFERENCE_TAGS)
+            key = f'{name}:{tag_stamp(tags)}'
+            value = _local.get(key, _MISSING)
+            if value is _MISSING:
+                value = load()
+                _local.set(key, value)
+            return value
+        return wrapper
+    return decorator
+
+def _choices(queryset):
+    return [(obj.pk, str(obj)) for obj in queryset]
+
+@reference_data(User)
+def user_choices():
+    return [(user.pk, user.get_full_name() or user.username)
+            for user in User.objects.order_by('first_name', 'last_name')]
+
+@reference_data(InstrumentType)
+def instrument_type_choices():
+    return _choices(InstrumentType.objects.all())
+
+@reference_data(EntitlementType)
+def entitlement_type_choices():
+    return _choices(EntitlementType.objects.all())
+
+REFERENCE_CHOICES = {
+    User: user_choices,
+    InstrumentType: instrument_type_choices,
+    EntitlementType: entitlement_type_choices,
+}
+
+class ReferenceChoiceIterator(ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ('', self.field.empty_label)
+        yield from self.field.load_choices()
+
+    def __len__(self):
+        return len(self.field.load_choices()) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.load_choices())
+
+class ReferenceChoiceField(ModelChoiceField):
+    """ModelChoiceField rendering its options from a reference_data loader.
+
+    Only the listing comes from memory; a submitted value is still
+    validated against the queryset.
+    """
+    iterator = ReferenceChoiceIterator
+
+    def __init__(self, queryset, *, load_choices=None, **kwargs):
+        self.load_choices = load_choices or REFERENCE_CHOICES[queryset.model]
+        super().__init__(queryset, **kwargs)
@@ -0,0 +1,159 @@
+"""Indexed search for the admin changelists.
+
+On PostgreSQL, WorkOrder and ServiceReport keep a `search_vector` column
+covering their own text and the names they are searched by. Signals keep
+it up to date, and a GIN index serves prefix queries against it. Names
+and serial numbers are also matched as substrings, as the plain admin
+search did, through the trigram-indexed subqueries below. The rest of
+the document (descriptions, user names) is matched by word prefix only:
+"pum" finds "Replace pump seal", "ump" does not. Customer, Instrument
+and agreement searches run each related-name match as a subquery on the
+related table, where a trigram index answers the icontains. Other
+databases run the same subqueries without the indexes, and match
+descriptions as substrings.
+
+Tokens such as WO-1234, SR-77 or SA-5 go straight to a primary-key lookup.
+"""
+import re
+from django.contrib.postgres.search import SearchQuery, SearchVector
+from django.db import connections
+from django.db.models import OuterRef, Q, Subquery
+from django.utils.text import smart_split, unescape_string_literal
+from ..models import ServiceReport, WorkOrder
+
+SEARCH_CONFIG = 'simple'
+ID_TOKEN_RE = re.compile(r'^(WO|SR|SA)-?(\d+)$', re.IGNORECASE)
+
+# Fields folded into each model's search_vector
+SEARCH_DOCUMENTS = {
+    WorkOrder: (
+        'description',
+        'customer__name',
+        'instrument__serial_number',
+        'created_by__username',
+        'created_by__first_name',
+        'created_by__last_name',
+    ),
+    ServiceReport: (
+        'work_order__instrument__serial_number',
+        'work_order__customer__name',
+        'created_by__username',
+        'created_by__first_name',
+        'created_by__last_name',
+    ),
+}
+
+# Document fields still matched as substrings on PostgreSQL, so that "12345"
+# finds serial "ABC12345"; each has a trigram index on its own table
+SUBSTRING_FIELDS = {
+    WorkOrder: ('customer__name', 'instrument__serial_number'),
+    ServiceReport: ('work_order__customer__name', 'work_order__instrument__serial_number'),
+}
+
+def is_postgres(queryset):
+    return connections[queryset.db].vendor == 'postgresql'
+
+def _document_part(model, path):
+    """Expression for one document field, as a subquery when it crosses a relation"""
+    name, _, rest = path.partition('__')
+    if not rest:
+        return name
+    field = model._meta.get_field(name)
+    return Subquery(
+        field.related_model._default_manager
+        .filter(pk=OuterRef(field.attname))
+        .values(rest)[:1]
+    )
+
+def search_vector_expression(model):
+    return SearchVector(
+        *[_document_part(model, path) for path in SEARCH_DOCUMENTS[model]],
+        config=SEARCH_CONFIG,
+    )
+
+def refresh_search_vectors(queryset):
+    """Recompute search_vector for every row in `queryset` with one UPDATE"""
+    if not is_postgres(queryset):
+        return 0
+    return queryset.update(search_vector=search_vector_expression(queryset.model))
+
+def prefix_query(term):
+    """tsquery matching every word of `term` as a word prefix"""
+    words = re.findall(r'\w+', term)
+    if not words:
+        return None
+    return SearchQuery(
+        ' & '.join(f'{word}:*' for word in words),
+        search_type='raw',
+        config=SEARCH_CONFIG,
+    )
+
+def _field_q(model, path, word):
+    """icontains on `path`, routed through the related table for FK paths"""
+    name, _, rest = path.partition('__')
+    if rest:
+        field = model._meta.get_field(name)
+        if field.many_to_one or field.one_to_one:
+            related = field.related_model._default_manager.all()
+            return Q(**{f'{field.attname}__in': related.filter(
+                _field_q(field.related_model, rest, word)
+            ).values('pk')})
+    return Q(**{f'{path}__icontains': word})
+
+def _words(term):
+    """Words of `term` split as the stock admin search splits them"""
+    for word in smart_split(term):
+        if word.startswith(('"', "'")) and word[0] == word[-1]:
+            word = unescape_string_literal(word)
+        yield word
+
+def _any_field_q(model, search_fields, word):
+    return Q.create([_field_q(model, path, word) for path in search_fields], connector=Q.OR)
+
+def search_q(model, search_fields, term):
+    """Every word must match one of `search_fields`, as in the stock admin search"""
+    q = Q()
+    for word in _words(term):
+        q &= _any_field_q(model, search_fields, word)
+    return q
+
+def document_search_q(model, term):
+    """Every word must prefix a word of the search document or be part of
+    a name or serial number in SUBSTRING_FIELDS
+    """
+    q = Q()
+    for word in _words(term):
+        word_q = _any_field_q(model, SUBSTRING_FIELDS[model], word)
+        query = prefix_query(word)
+        if query is not None:
+            word_q |= Q(search_vector=query)
+        q &= word_q
+    return q
+
+class IndexedSearchMixin:
+    """ModelAdmin mixin replacing the join-heavy icontains search.
+
+    `search_tokens` maps an id prefix (WO, SR, SA) to the lookup it resolves
+    to on this admin's model. Models listed in SEARCH_DOCUMENTS search
+    their search_vector and SUBSTRING_FIELDS on PostgreSQL; everything
+    else goes through search_q() over `search_fields`.
+    """
+    search_tokens = {}
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+
+        match = ID_TOKEN_RE.match(term)
+        if match and match.group(1).upper() in self.search_tokens:
+            lookup = self.search_tokens[match.group(1).upper()]
+            return queryset.filter(**{lookup: int(match.group(2))}), False
+
+        if self.model in SEARCH_DOCUMENTS and is_postgres(queryset):
+            return queryset.filter(document_search_q(self.model, term)), False
+
+        fields = self.get_search_fields(request)
+        if not fields:
+            return queryset, False
+        return queryset.filter(search_q(self.model, fields, term)), False
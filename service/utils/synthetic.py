@@ -0,0 +1,283 @@
+"""Deterministic synthetic dataset for measuring performance changes.
+
+Everything is drawn from one random.Random(seed) in a fixed order and
+dated relative to an anchor date, so the same seed and anchor always give
+the same rows. Customer sizes follow a Pareto distribution: most customers
+own a handful of instruments, a few own hundreds. Rows are written with
+bulk_create a batch of customers at a time, so memory stays bounded
+whatever the requested size.
+"""
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as dt_time, timedelta
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.utils import timezone
+from ..models import (
+    Customer,
+    Contact,
+    Instrument,
+    InstrumentType,
+    ServiceAgreement,
+    EntitlementType,
+    Entitlement,
+    WorkOrder,
+    ServiceReport,
+)
+from .cache_tags import invalidate_model
+from .search import refresh_search_vectors
+
+INSTRUMENT_TYPES = [
+    'Mass Spectrometer', 'HPLC System', 'Gas Chromatograph', 'Centrifuge',
+    'Spectrophotometer', 'Flow Cytometer', 'PCR Thermocycler', 'Microplate Reader',
+    'Electron Microscope', 'NMR Spectrometer', 'Liquid Handler', 'Incubator',
+]
+ENTITLEMENT_TYPES = ['Preventive Maintenance', 'Repair Visit', 'Calibration', 'Qualification']
+FIRST_NAMES = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Robin', 'Quinn']
+LAST_NAMES = ['Garcia', 'Chen', 'Okafor', 'Novak', 'Silva', 'Haddad', 'Kowalski', 'Tanaka', 'Larsen', 'Mehta']
+COMPANY_WORDS = ['Bio', 'Gen', 'Lab', 'Pharma', 'Analytics', 'Sciences', 'Diagnostics', 'Research', 'Clinical', 'Labs']
+ROLES = ['Lab Manager', 'Purchasing', 'Principal Investigator', 'Facilities', 'QA Lead']
+WORK = ['Annual preventive maintenance', 'Replace pump seals', 'Recalibrate detector',
+        'Investigate pressure fluctuation', 'Firmware upgrade', 'Replace lamp', 'Leak check']
+FINDINGS = ['Worn seals', 'Detector drift within tolerance', 'Vacuum leak at inlet',
+            'Lamp hours exceeded', 'No faults found']
+ACTIONS = ['Replaced seals and verified pressure', 'Recalibrated and documented',
+           'Tightened fittings, leak test passed', 'Replaced lamp', 'Ran system suitability']
+
+TECHNICIAN_COUNT = 25
+# Pareto shape for customer size: ~80% of instruments sit with ~20% of customers
+SIZE_ALPHA = 1.16
+
+@contextmanager
+def explicit_timestamps(*fields):
+    """Let bulk_create write our own values into auto_now_add fields"""
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+class SyntheticDataGenerator:
+    def __init__(self, seed=42, anchor=None, chunk_size=5000, max_instruments=500,
+                 batch_customers=500, log=None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.anchor = anchor or timezone.now().date()
+        self.chunk_size = chunk_size
+        self.max_instruments = max_instruments
+        self.batch_customers = batch_customers
+        self.log = log or (lambda message: None)
+        self.counts = dict.fromkeys(
+            ['customers', 'contacts', 'instruments', 'agreements',
+             'entitlements', 'workorders', 'servicereports'], 0)
+        self._serials = 0
+
+    @property
+    def prefix(self):
+        return f'SYN{self.seed}'
+
+    def already_seeded(self):
+        return Instrument.objects.filter(serial_number__startswith=f'{self.prefix}-').exists()
+
+    def reference_data(self):
+        """Technicians and types shared by every batch, created if missing"""
+        managers, _ = Group.objects.get_or_create(name='Manager')
+        technicians = []
+        for n in range(TECHNICIAN_COUNT):
+            user, created = User.objects.get_or_create(
+                username=f'synthetic_tech_{n:02d}',
+                defaults={
+                    'first_name': FIRST_NAMES[n % len(FIRST_NAMES)],
+                    'last_name': LAST_NAMES[(n // len(FIRST_NAMES)) % len(LAST_NAMES)],
+                    'is_staff': True,
+                },
+            )
+            if created and n < 3:
+                user.groups.add(managers)
+            technicians.append(user)
+
+        self.technicians = technicians
+        self.managers = technicians[:3]
+        self.instrument_types = [
+            InstrumentType.objects.get_or_create(name=name)[0] for name in INSTRUMENT_TYPES
+        ]
+        self.entitlement_types = [
+            EntitlementType.objects.get_or_create(name=name)[0] for name in ENTITLEMENT_TYPES
+        ]
+
+    def moment(self, day, hour_span=10):
+        """Aware datetime on `day` during working hours"""
+        naive = datetime.combine(day, dt_time(8)) + timedelta(minutes=self.rng.randrange(hour_span * 60))
+        return timezone.make_aware(naive) if timezone.is_naive(naive) else naive
+
+    def run(self, customers):
+        self.reference_data()
+        started = time.monotonic()
+        for start in range(0, customers, self.batch_customers):
+            count = min(self.batch_customers, customers - start)
+            with transaction.atomic():
+                customer_ids = self.write_batch(start, count)
+                Customer.refresh_summaries(customer_ids)
+                refresh_search_vectors(WorkOrder.objects.filter(customer_id__in=customer_ids))
+                refresh_search_vectors(ServiceReport.objects.filter(work_order__customer_id__in=customer_ids))
+            rows = sum(self.counts.values())
+            elapsed = time.monotonic() - started
+            self.log(f'{start + count}/{customers} customers, {rows} rows '
+                     f'({rows / elapsed if elapsed else 0:.0f} rows/s)')
+
+        for model in (Customer, Contact, Instrument, ServiceAgreement, Entitlement,
+                      WorkOrder, ServiceReport):
+            invalidate_model(model)
+        return self.counts
+
+    def write_batch(self, start, count):
+        rng = self.rng
+        customers = [
+            Customer(
+                name=f'{rng.choice(COMPANY_WORDS)}{rng.choice(COMPANY_WORDS).lower()} '
+                     f'{self.prefix}-{start + i:07d}',
+                address=f'{rng.randint(1, 9999)} Research Park Dr, Suite {rng.randint(100, 999)}',
+                website=f'https://customer{start + i}.example.com',
+                created_at=self.moment(self.anchor - timedelta(days=rng.randint(400, 3000))),
+            )
+            for i in range(count)
+        ]
+        with explicit_timestamps(Customer._meta.get_field('created_at')):
+            Customer.objects.bulk_create(customers, batch_size=self.chunk_size)
+
+        contacts, instruments = [], []
+        sizes = {}
+        for index, customer in enumerate(customers, start):
+            for n in range(rng.randint(1, 4)):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                contacts.append(Contact(
+                    customer=customer,
+                    name=f'{first} {last}',
+                    # From the seeded index, not the pk, so reruns produce the same data
+                    email=f'{first}.{last}{index}@example.com'.lower(),
+                    phone=f'555-{rng.randint(0, 9999):04d}',
+                    role=rng.choice(ROLES),
+                    primary_contact=(n == 0),
+                ))
+            sizes[customer.pk] = min(self.max_instruments, int(rng.paretovariate(SIZE_ALPHA)))
+            for _ in range(sizes[customer.pk]):
+                self._serials += 1
+                instruments.append(Instrument(
+                    instrument_type=rng.choice(self.instrument_types),
+                    customer=customer,
+                    serial_number=f'{self.prefix}-{self._serials:09d}',
+                    installation_date=self.anchor - timedelta(days=rng.randint(30, 3000)),
+                    assigned_to=rng.choice(self.technicians),
+                ))
+        Contact.objects.bulk_create(contacts, batch_size=self.chunk_size)
+        Instrument.objects.bulk_create(instruments, batch_size=self.chunk_size)
+
+        by_customer = {}
+        for instrument in instruments:
+            by_customer.setdefault(instrument.customer_id, []).append(instrument)
+
+        agreements = []
+        for customer in customers:
+            for _ in range(1 + (sizes[customer.pk] > 3) + (sizes[customer.pk] > 30)):
+                start_date = self.anchor - timedelta(days=rng.randint(-60, 1500))
+                end_date = start_date + timedelta(days=rng.choice([365, 365, 730, 1095]))
+                if start_date > self.anchor or rng.random() < 0.03:
+                    status = ServiceAgreement.STATUS_DRAFT
+                elif end_date < self.anchor:
+                    status = ServiceAgreement.STATUS_EXPIRED
+                else:
+                    status = ServiceAgreement.STATUS_ACTIVE
+                agreements.append(ServiceAgreement(
+                    customer=customer,
+                    po_number=f'PO-{rng.randint(100000, 999999)}',
+                    start_date=start_date,
+                    end_date=end_date,
+                    status=status,
+                ))
+        ServiceAgreement.objects.bulk_create(agreements, batch_size=self.chunk_size)
+
+        entitlements = []
+        for agreement in agreements:
+            for instrument in by_customer.get(agreement.customer_id, []):
+                if rng.random() < 0.7:
+                    entitlements.append(Entitlement(
+                        agreement=agreement,
+                        entitlement_type=rng.choice(self.entitlement_types),
+                        instrument=instrument,
+                        total=rng.choice([1, 2, 2, 4, 4, 6, 12]),
+                    ))
+
+        work_orders = []
+        for entitlement in entitlements:
+            agreement = entitlement.agreement
+            last_day = min(agreement.end_date, self.anchor)
+            span = max((last_day - agreement.start_date).days, 1)
+            completed = rng.randint(0, entitlement.total)
+            entitlement.used_count = completed
+            for n in range(completed + rng.choice([0, 0, 0, 1, 2])):
+                if n < completed:
+                    status = WorkOrder.STATUS_COMPLETED
+                else:
+                    status = rng.choice([WorkOrder.STATUS_DRAFT, WorkOrder.STATUS_OPEN,
+                                         WorkOrder.STATUS_IN_PROGRESS])
+                work_orders.append(self.work_order(
+                    entitlement.instrument, entitlement, status,
+                    agreement.start_date + timedelta(days=rng.randrange(span)),
+                ))
+        Entitlement.objects.bulk_create(entitlements, batch_size=self.chunk_size)
+
+        # Unplanned requests raised without an entitlement stay drafts
+        for instrument in instruments:
+            if rng.random() < 0.2:
+                work_orders.append(self.work_order(
+                    instrument, None, WorkOrder.STATUS_DRAFT,
+                    self.anchor - timedelta(days=rng.randint(0, 365)),
+                ))
+        with explicit_timestamps(WorkOrder._meta.get_field('created_at')):
+            WorkOrder.objects.bulk_create(work_orders, batch_size=self.chunk_size)
+
+        reports = []
+        for work_order in work_orders:
+            if work_order.status == WorkOrder.STATUS_COMPLETED:
+                reports.append(self.report(work_order, ServiceReport.STATUS_APPROVED))
+            elif work_order.status == WorkOrder.STATUS_IN_PROGRESS:
+                reports.append(self.report(work_order, rng.choice([
+                    ServiceReport.STATUS_DRAFT, ServiceReport.STATUS_AWAITING,
+                ])))
+        ServiceReport.objects.bulk_create(reports, batch_size=self.chunk_size)
+
+        for key, rows in (('customers', customers), ('contacts', contacts),
+                          ('instruments', instruments), ('agreements', agreements),
+                          ('entitlements', entitlements), ('workorders', work_orders),
+                          ('servicereports', reports)):
+            self.counts[key] += len(rows)
+        return [customer.pk for customer in customers]
+
+    def work_order(self, instrument, entitlement, status, day):
+        return WorkOrder(
+            customer_id=instrument.customer_id,
+            instrument=instrument,
+            entitlement=entitlement,
+            description=self.rng.choice(WORK),
+            created_by=self.rng.choice(self.technicians),
+            assigned_to=self.rng.choice(self.technicians),
+            created_at=self.moment(day),
+            status=status,
+        )
+
+    def report(self, work_order, approval_status):
+        service_day = work_order.created_at.date() + timedelta(days=self.rng.randint(0, 14))
+        approved = approval_status == ServiceReport.STATUS_APPROVED
+        return ServiceReport(
+            work_order=work_order,
+            created_by=work_order.assigned_to,
+            service_date=service_day,
+            findings=self.rng.choice(FINDINGS),
+            actions_taken=self.rng.choice(ACTIONS),
+            approval_status=approval_status,
+            approval_date=self.moment(service_day + timedelta(days=1)) if approved else None,
+            approved_by=self.rng.choice(self.managers) if approved else None,
+        )
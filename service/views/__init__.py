@@ -1,4 +1,4 @@
 from .landing_page import LandingPageView
-from .health_check import health_check
+from .health_check import liveness, readiness_check
 
-__all__ = ['LandingPageView', 'health_check']
+__all__ = ['LandingPageView', 'liveness', 'readiness_check']
@@ -1,36 +1,34 @@
-from django.http import JsonResponse
+from django.http import HttpResponse, Http404
 from django.contrib.admin.views.decorators import staff_member_required
-from django.db.models import F
-from ..models import Instrument, Entitlement
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.gzip import gzip_page
+from ..utils.options import aoption_list
 
+def option_response(request, result):
+    """JSON response for a cached (body, etag) pair, or a 304 if the client has it"""
+    body, etag = result
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+    # Browsers may keep the payload but must revalidate it on every use
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+@gzip_page
+@staff_member_required
+async def option_list_view(request, source):
+    result = await aoption_list(source, request.GET)
+    if result is None:
+        raise Http404(f'Unknown option source: {source}')
+    return option_response(request, result)
+
+@gzip_page
 @staff_member_required
-def filter_instruments(request):
-    customer_id = request.GET.get('customer')
-    if customer_id:
-        instruments = (Instrument.objects
-                      .filter(customer_id=customer_id)
-                      .values('id', 'serial_number'))
-        return JsonResponse(list(instruments), safe=False)
-    return JsonResponse([], safe=False)
+async def filter_instruments(request):
+    return option_response(request, await aoption_list('instruments', request.GET))
 
+@gzip_page
 @staff_member_required
-def filter_entitlements(request):
-    instrument_id = request.GET.get('instrument')
-    if instrument_id:
-        entitlements = (Entitlement.objects
-                       .filter(
-                           instrument_id=instrument_id,
-                           is_active=True
-                       )
-                       .select_related('entitlement_type')
-                       .annotate(
-                           remaining=F('total_visits') - F('used_visits')
-                       )
-                       .values('id', 'entitlement_type__name', 'remaining'))
-        
-        return JsonResponse([{
-            'id': e['id'],
-            'entitlement_type': e['entitlement_type__name'],
-            'remaining': e['remaining']
-        } for e in entitlements], safe=False)
-    return JsonResponse([], safe=False)
\ No newline at end of file
+async def filter_entitlements(request):
+    return option_response(request, await aoption_list('entitlements', request.GET))
@@ -1,19 +1,24 @@
 from django.http import JsonResponse
-from django.db import connection
-from django.db.utils import OperationalError
+from django.views.decorators.cache import never_cache
+from ..utils.health import areadiness
 
-def health_check(request):
+@never_cache
+async def liveness(request):
     """
-    Health check endpoint that verifies database connectivity.
-    Used by DigitalOcean's App Platform to verify the application is running.
+    The process is up and serving requests. Touches no backing service,
+    so a database outage does not get every instance restarted.
     """
-    try:
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-            cursor.fetchone()
-        return JsonResponse({"status": "healthy", "database": "connected"}, status=200)
-    except OperationalError:
-        return JsonResponse(
-            {"status": "unhealthy", "database": "disconnected"}, 
-            status=503
-        )
+    return JsonResponse({"status": "alive"})
+
+@never_cache
+async def readiness_check(request):
+    """
+    Whether this instance should receive traffic: database latency,
+    pending migrations and cache reachability. Results are reused for a
+    few seconds (see service.utils.health).
+    """
+    ready, checks, age = await areadiness()
+    return JsonResponse(
+        {"status": "ready" if ready else "unavailable", "checked_seconds_ago": age, "checks": checks},
+        status=200 if ready else 503,
+    )
@@ -0,0 +1,24 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.cache import never_cache
+
+@never_cache
+async def metrics_view(request):
+    """Prometheus scrape endpoint, aggregated across gunicorn workers.
+
+    When METRICS_TOKEN is set the scraper must send it as a bearer token.
+    """
+    if not settings.PROMETHEUS_METRICS:
+        raise Http404
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {token}'
+    ):
+        return HttpResponse('Unauthorized', status=401)
+
+    from ..utils.metrics import render_metrics
+    # Collectors are synchronous and the backlog gauges query the database
+    body, content_type = await sync_to_async(render_metrics)()
+    return HttpResponse(body, content_type=content_type)
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 import os
 from pathlib import Path
+import dj_database_url
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -38,6 +39,8 @@ if not DEBUG:
     SECURE_SSL_REDIRECT = True
     SESSION_COOKIE_SECURE = True
     CSRF_COOKIE_SECURE = True
+    # Scrapers and health probes reach the app over plain HTTP inside the private network
+    SECURE_REDIRECT_EXEMPT = [r'^metrics$', r'^health/']
 else:
     # Disable SSL settings in development
     SECURE_SSL_REDIRECT = False
@@ -65,6 +68,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'service.middleware.server_timing.ServerTimingMiddleware',
+    'service.middleware.replica_pinning.PrimaryPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -73,8 +78,38 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'service.middleware.current_user.CurrentUserMiddleware',
+    'service.middleware.query_inspector.QueryInspectorMiddleware',
 ]
 
+# Per-request db/template/cache timing: Server-Timing header for staff and a log line
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'False') == 'True'
+
+# /health/ready: reuse check results this long; fail when SELECT 1 is slower than the limit
+HEALTH_CHECK_CACHE_SECONDS = float(os.getenv('HEALTH_CHECK_CACHE_SECONDS', '5'))
+HEALTH_DB_MAX_LATENCY_MS = float(os.getenv('HEALTH_DB_MAX_LATENCY_MS', '500'))
+
+# Prometheus scrape endpoint at /metrics; set METRICS_TOKEN to require a bearer token
+PROMETHEUS_METRICS = os.getenv('PROMETHEUS_METRICS', 'False') == 'True'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+# Development N+1 detector; logs repeated queries and feeds the admin query report
+QUERY_INSPECTOR = os.getenv('QUERY_INSPECTOR', 'False') == 'True'
+QUERY_INSPECTOR_THRESHOLD = int(os.getenv('QUERY_INSPECTOR_THRESHOLD', '3'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'service': {
+            'handlers': ['console'],
+            'level': os.getenv('SERVICE_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
 ROOT_URLCONF = 'service_manager.urls'
 
 TEMPLATES = [
@@ -99,16 +134,87 @@ WSGI_APPLICATION = 'service_manager.wsgi.application'
 
 
 # Database configuration
-DATABASES = {
-    'default': {
+# DATABASE_URL, when set, replaces the POSTGRES_* variables. Connections are
+# either pooled per worker by psycopg 3 (DB_POOL=True) or kept open between
+# requests for DB_CONN_MAX_AGE seconds; both are health-checked before reuse.
+# Under ASGI each request runs its queries in a fresh thread, where persistent
+# connections would leak, so ASGI deployments pool by default.
+ASGI = os.getenv('ASGI', 'False') == 'True'
+DB_POOL = os.getenv('DB_POOL', str(ASGI)) == 'True'
+DB_CONN_MAX_AGE = 0 if DB_POOL else int(os.getenv('DB_CONN_MAX_AGE', '60'))
+DB_CONN_HEALTH_CHECKS = os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True'
+
+if os.getenv('DATABASE_URL'):
+    default_database = dj_database_url.parse(
+        os.getenv('DATABASE_URL'),
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=DB_CONN_HEALTH_CHECKS,
+    )
+else:
+    default_database = {
         'ENGINE': 'django.db.backends.postgresql',
         'NAME': os.getenv('POSTGRES_DB'),
         'USER': os.getenv('POSTGRES_USER'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('POSTGRES_HOST', 'db'),
         'PORT': os.getenv('POSTGRES_PORT', '5432'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
     }
+
+def configure_connections(database):
+    if database['ENGINE'] == 'django.db.backends.postgresql':
+        # The stock backend plus connection checkout and pool metrics
+        database['ENGINE'] = 'service.db.postgresql'
+        if DB_POOL:
+            database.setdefault('OPTIONS', {})['pool'] = {
+                'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+                'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '4')),
+                'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+            }
+    return database
+
+DATABASES = {'default': configure_connections(default_database)}
+
+# Read replica for reporting reads (see service/db/routers.py). After a write a
+# browser stays on the primary for REPLICA_PIN_SECONDS. Cached panels built from
+# the replica live REPLICA_CACHE_SECONDS; keep that plus the replica's lag below
+# the pin time.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '15'))
+REPLICA_CACHE_SECONDS = int(os.getenv('REPLICA_CACHE_SECONDS', '5'))
+if os.getenv('DATABASE_REPLICA_URL'):
+    DATABASES['replica'] = configure_connections({
+        **dj_database_url.parse(
+            os.getenv('DATABASE_REPLICA_URL'),
+            conn_max_age=DB_CONN_MAX_AGE,
+            conn_health_checks=DB_CONN_HEALTH_CHECKS,
+        ),
+        'TEST': {'MIRROR': 'default'},
+    })
+    DATABASE_ROUTERS = ['service.db.routers.ReplicaRouter']
+
+# One cache shared by every worker, so a tag bumped in one process
+# (service/utils/cache_tags.py) expires the entries of all of them. 'db' needs
+# `manage.py createcachetable`; 'redis' needs the redis package installed.
+CACHE_BACKENDS = {
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'service_cache'),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', '/tmp/service-cache'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', 'redis://localhost:6379/0'),
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', 'service'),
 }
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'db')
+cache_backend, cache_location = CACHE_BACKENDS[CACHE_BACKEND]
+CACHES = {
+    'default': {
+        'BACKEND': cache_backend,
+        'LOCATION': os.getenv('CACHE_LOCATION', cache_location),
+    },
+}
+if CACHE_BACKEND != 'redis':
+    # The default of 300 entries would cull option lists long before they expire
+    CACHES['default']['OPTIONS'] = {
+        'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '20000')),
+    }
 
 # Media files configuration
 MEDIA_URL = '/media/'
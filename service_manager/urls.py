@@ -2,18 +2,20 @@
 URL configuration for service_manager project.
 """
 from django.contrib import admin
-from django.urls import path
-from django.http import HttpResponse
+from django.urls import include, path
 from service.views.landing_page import LandingPageView
+from service.views.health_check import liveness, readiness_check
+from service.views.metrics import metrics_view
 from service.admin.site import admin_site  # Import the custom admin site
 from django.contrib.auth.views import LogoutView
 
-def health_check(request):
-    return HttpResponse("OK")
-
 urlpatterns = [
     path('', LandingPageView.as_view(), name='landing'),  # Add landing page
+    path('', include('service.urls')),  # Option endpoints; must precede the admin catch-all
     path('admin/', admin_site.urls),  # Use custom admin site
-    path('health/', health_check, name='health_check'),
+    path('health/', liveness, name='health_check'),  # Kept for existing probes
+    path('health/live', liveness, name='health_live'),
+    path('health/ready', readiness_check, name='health_ready'),
+    path('metrics', metrics_view, name='metrics'),
     path('admin/logout/', LogoutView.as_view(next_page='admin:login'), name='admin_logout'),
 ]